@@ -0,0 +1,71 @@
+"""
+A script that benchmarks the :py:class:`~swisstext.cmd.scraping.tools.SwigspotLangid` called page by page
+(as in the pipeline workers) against the :py:class:`~swisstext.cmd.scraping.batch_detector.BatchDetector`,
+fed by concurrent threads.
+
+The sentences are read from a text file (one sentence per line) and grouped into pages of ``--page-size``
+sentences. If no file is given, sentences are generated from a small vocabulary.
+
+Example:
+```bash
+python extra/bench_batch_detector.py --sentences sentences.txt --threads 16 --batch-size 2048
+```
+"""
+
+import argparse
+import random
+import time
+from concurrent.futures import ThreadPoolExecutor
+
+from swisstext.cmd.scraping.batch_detector import BatchDetector
+from swisstext.cmd.scraping.tools import SwigspotLangid
+
+
+def generate(num_sentences):
+    random.seed(0)
+    words = ('ich bi de chli hans und wohne z bärn . das isch es schöns huus , gäll ? '
+             'je suis le petit hans et j habite à berne . the house is nice , is it not ? '
+             'das ist ein schönes haus und ich wohne hier seit jahren').split()
+    return [' '.join(random.choice(words) for _ in range(random.randint(5, 25))) for _ in range(num_sentences)]
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sentences', help='file with one sentence per line. If not set, sentences are generated')
+    parser.add_argument('-n', '--num', type=int, default=20000, help='number of sentences to generate')
+    parser.add_argument('--page-size', type=int, default=30, help='number of sentences per page')
+    parser.add_argument('--threads', type=int, default=16, help='number of threads calling the batch detector')
+    parser.add_argument('--batch-size', type=int, default=2048, help='max_batch_size of the batch detector')
+    parser.add_argument('--max-wait', type=float, default=.05, help='max_wait of the batch detector')
+    args = parser.parse_args()
+
+    if args.sentences:
+        with open(args.sentences) as f:
+            sentences = [l.strip() for l in f if l.strip()]
+    else:
+        sentences = generate(args.num)
+    pages = [sentences[i:i + args.page_size] for i in range(0, len(sentences), args.page_size)]
+    print(f'{len(sentences)} sentences, {len(pages)} pages')
+
+    detector = SwigspotLangid()
+
+    start = time.time()
+    expected = [detector.predict(page) for page in pages]
+    per_page = time.time() - start
+    print(f'page by page: {len(sentences) / per_page:10.0f} sentences/s')
+
+    batcher = BatchDetector(detector, max_batch_size=args.batch_size, max_wait=args.max_wait)
+    start = time.time()
+    with ThreadPoolExecutor(max_workers=args.threads) as executor:
+        results = list(executor.map(batcher.predict, pages))
+    batched = time.time() - start
+    batcher.close()
+    print(f'batched:      {len(sentences) / batched:10.0f} sentences/s '
+          f'({batcher.num_batches} batches, {batcher.mean_batch_size:.0f} sentences/batch)')
+
+    same = all(abs(a - b) < 1e-9 for r, e in zip(results, expected) for a, b in zip(r, e))
+    print(f'Speedup: x{per_page / batched:.1f}, same probabilities: {same}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,93 @@
+"""
+A script that benchmarks the text extraction of the :py:class:`~swisstext.cmd.scraping.tools.JustextCrawler`
+against its single-parse variant, the :py:class:`~swisstext.cmd.scraping.tools.LxmlJustextCrawler`.
+
+Only the parsing is measured (CPU time), on a corpus of pages saved in a directory (one raw HTML file per page).
+The corpus can be created from a list of URLs using the ``--fetch`` option. The script also reports the number of
+pages for which the two crawlers disagree (text or links).
+
+Example:
+```bash
+# save the pages first (one URL per line)
+python extra/bench_justext_crawler.py /tmp/corpus --fetch urls.txt
+# then run the benchmark
+python extra/bench_justext_crawler.py /tmp/corpus -n 5
+```
+"""
+
+import argparse
+import os
+import time
+
+from swisstext.cmd.scraping.interfaces import ICrawler
+from swisstext.cmd.scraping.tools import JustextCrawler, LxmlJustextCrawler
+
+
+def fetch(corpus_dir, urlfile):
+    crawler = JustextCrawler()
+    os.makedirs(corpus_dir, exist_ok=True)
+    with open(urlfile) as f:
+        urls = [l.strip() for l in f if l.startswith('http')]
+    for i, url in enumerate(urls):
+        try:
+            content, _ = crawler.get_content(url)
+            with open(os.path.join(corpus_dir, '%05d.html' % i), 'wb') as out:
+                out.write(url.encode('utf-8') + b'\n' + content)  # the first line holds the URL
+        except ICrawler.CrawlError as e:
+            print(f'{url}: {e}')
+    print(f'Saved {len(os.listdir(corpus_dir))} pages to {corpus_dir}.')
+
+
+def load(corpus_dir):
+    pages = []
+    for name in sorted(os.listdir(corpus_dir)):
+        with open(os.path.join(corpus_dir, name), 'rb') as f:
+            url, content = f.read().split(b'\n', 1)
+            pages.append((url.decode('utf-8'), content))
+    return pages
+
+
+def run(crawler, pages, repeat):
+    results, errors = [], 0
+    start = time.process_time()
+    for _ in range(repeat):
+        results.clear()
+        for url, content in pages:
+            try:
+                results.append(crawler.parse(url, content))
+            except ICrawler.CrawlError:
+                results.append(None)
+                errors += 1
+    elapsed = time.process_time() - start
+    return elapsed / (repeat * len(pages)), results, errors // repeat
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('corpus_dir', help='directory holding the saved pages')
+    parser.add_argument('--fetch', metavar='URLFILE', help='save the pages listed in this file first')
+    parser.add_argument('-n', '--repeat', type=int, default=3, help='number of passes over the corpus')
+    parser.add_argument('--good', action='store_true', help='keep only good|neargood paragraphs (keep_bad=False)')
+    args = parser.parse_args()
+
+    if args.fetch:
+        fetch(args.corpus_dir, args.fetch)
+    pages = load(args.corpus_dir)
+    print(f'{len(pages)} pages, {sum(len(c) for _, c in pages) / 1e6:.1f} MB')
+
+    print(f'{"crawler":20s} {"ms/page":>8s} {"errors":>7s}')
+    timings, all_results = [], []
+    for cls in [JustextCrawler, LxmlJustextCrawler]:
+        per_page, results, errors = run(cls(keep_bad=not args.good), pages, args.repeat)
+        print(f'{cls.__name__:20s} {per_page * 1000:8.2f} {errors:7d}')
+        timings.append(per_page)
+        all_results.append(results)
+
+    diff_text = sum(1 for a, b in zip(*all_results) if a and b and a.text != b.text)
+    diff_links = sum(1 for a, b in zip(*all_results) if a and b and a.links != b.links)
+    print(f'CPU saved per page: {(timings[0] - timings[1]) * 1000:.2f} ms ({1 - timings[1] / timings[0]:.0%})')
+    print(f'Pages with a different text: {diff_text}, with different links: {diff_links}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,83 @@
+"""
+A script that benchmarks the link extractors of the :py:class:`~swisstext.cmd.scraping.tools.BsCrawler`
+(``link_extractor`` crawler option):
+
+* ``bs4``: walk the soup with ``find_all('a', href=True)`` and resolve each href with
+  :py:meth:`~swisstext.cmd.link_utils.filter_links`;
+* ``lxml``: parse the page with lxml and resolve the hrefs with the memoized
+  :py:meth:`~swisstext.cmd.link_utils.filter_links_fast`.
+
+As for ``bs4`` the soup is built anyway (to extract the text), its construction is not part of the timings.
+
+The pages are either read from a directory (same format as ``bench_justext_crawler.py``: one file per page, the
+first line holding the URL) or generated: forum-like pages with many, often duplicated, links.
+
+Example:
+```bash
+python extra/bench_link_extractors.py --pages 50 --links 500
+python extra/bench_link_extractors.py --corpus /tmp/corpus
+```
+"""
+
+import argparse
+import os
+import random
+import time
+
+from bs4 import BeautifulSoup
+from swisstext.cmd.scraping.tools import BsCrawler
+
+
+def generate(num_pages, num_links):
+    random.seed(0)
+    hrefs = ['viewtopic.php?f=%d&t=%d' % (random.randint(1, 10), random.randint(1, 200)) for _ in range(100)] + \
+            ['/memberlist.php?mode=viewprofile&u=%d&sid=abcdef' % i for i in range(50)] + \
+            ['#p%d' % i for i in range(20)] + \
+            ['https://www.facebook.com/sharer.php?u=x', 'https://twitter.com/share?text=x', 'mailto:a@b.ch',
+             'https://other.example.ch/page', './posting.php?mode=reply', '../index.php', '/images/smile.gif']
+    pages = []
+    for i in range(num_pages):
+        links = ''.join('<li><a href="%s">link</a></li>' % random.choice(hrefs) for _ in range(num_links))
+        html = f'<html><body><h1>Thread {i}</h1><p>Some text.</p><ul>{links}</ul></body></html>'
+        pages.append((f'http://forum.example.ch/viewtopic.php?t={i}', html.encode('utf-8')))
+    return pages
+
+
+def load(corpus_dir):
+    pages = []
+    for name in sorted(os.listdir(corpus_dir)):
+        with open(os.path.join(corpus_dir, name), 'rb') as f:
+            url, content = f.read().split(b'\n', 1)
+            pages.append((url.decode('utf-8'), content))
+    return pages
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--corpus', help='directory holding saved pages. If not set, pages are generated')
+    parser.add_argument('--pages', type=int, default=50, help='number of pages to generate')
+    parser.add_argument('--links', type=int, default=500, help='number of links per generated page')
+    parser.add_argument('-n', '--repeat', type=int, default=3, help='number of passes over the pages')
+    args = parser.parse_args()
+
+    pages = load(args.corpus) if args.corpus else generate(args.pages, args.links)
+    soups = [BeautifulSoup(content, 'html.parser') for _, content in pages]
+    print(f'{len(pages)} pages, {sum(len(s.find_all("a")) for s in soups)} <a> tags')
+
+    print(f'{"extractor":10s} {"ms/page":>8s} {"links":>7s}')
+    timings, results = [], []
+    for extractor in BsCrawler.link_extractors:
+        crawler = BsCrawler(link_extractor=extractor)
+        start = time.process_time()
+        for _ in range(args.repeat):
+            links = [crawler.get_links(url, soup, content) for (url, content), soup in zip(pages, soups)]
+        per_page = (time.process_time() - start) / (args.repeat * len(pages))
+        timings.append(per_page)
+        results.append(links)
+        print(f'{extractor:10s} {per_page * 1000:8.2f} {sum(len(l) for l in links):7d}')
+
+    print(f'Speedup: x{timings[0] / timings[1]:.1f}, same links: {results[0] == results[1]}')
+
+
+if __name__ == '__main__':
+    main()
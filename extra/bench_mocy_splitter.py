@@ -0,0 +1,131 @@
+"""
+A micro-benchmark of :py:class:`~swisstext.cmd.scraping.tools.MocySplitter`, comparing it against the original
+implementation (patterns looked up in the regex cache on every call, per-word regexes and string concatenations).
+
+The texts are read from files (e.g. pages saved by ``extra/bench_justext_crawler.py --fetch``, or any text file).
+If no file is given, the golden page of the tests is repeated to make a large page. The script also checks
+that both implementations return the same sentences.
+
+Example:
+```bash
+python extra/bench_mocy_splitter.py pages/*.txt -n 5
+```
+"""
+
+import argparse
+import os
+import re
+import time
+
+import regex
+
+from swisstext.cmd.scraping.tools import MocySplitter
+from swisstext.cmd.scraping.tools.mocy_splitter import _ANY, _NUMERIC_ONLY, _UNDEF
+
+_golden_page = os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'tests', 'normalizer_golden',
+                            'forum_page.expected.txt')
+
+
+class OriginalMocySplitter(MocySplitter):
+
+    def split_sentences(self, input_text):
+        return sum((
+            self.split_paragraph(p, self.nb_prefixes, self.more)
+            for p in input_text.split('\n')
+            if p and not p.isspace()
+        ), [])
+
+    def split_text(self, input_text):
+        current_paragraph = ''
+        splits = []
+        for line in input_text.split('\n'):
+            if not line or line.isspace():
+                if current_paragraph:
+                    splits.extend(self.split_paragraph(current_paragraph, self.nb_prefixes, self.more))
+                    current_paragraph = ""
+            else:
+                current_paragraph += line + ' '
+        if current_paragraph:
+            splits.extend(self.split_paragraph(current_paragraph, self.nb_prefixes, self.more))
+        return splits
+
+    @classmethod
+    def cleanup_spaces(cls, text):
+        text = re.sub(' +', ' ', text)
+        text = re.sub('\n ', '\n', text)
+        text = re.sub(' \n ', '\n', text)
+        return text.strip()
+
+    @classmethod
+    def split_paragraph(cls, text, nb_prefixes, more=False):
+        if not text:
+            return ''
+        text = cls.cleanup_spaces(text)
+        if more:
+            text = regex.sub(r'([\:;])([^\d\)\(/-])', r'\1\n\2', text)
+        text = regex.sub(r'([\?!]+)([^\?!\p{Pe}\p{Pf}\"])', r'\1\n\2', text)
+        text = regex.sub(r'(\.[\.]+) +([\'\"\(\[\¿\¡\p{Pi}]*[\p{L}])', r'\1\n\2', text)
+        text = regex.sub(r'([?!\.][\ ]*[\'\"\)\]\p{Pf}]+) +([\'\"\(\[\¿\¡\p{Pi}]*[\ ]*[\p{Lu}])', r'\1\n\2', text)
+        text = regex.sub(r'([?!\.]) +([\'\"\(\[\¿\¡\p{Pi}]+[\ ]*[\p{L}])', r'\1\n\2', text)
+
+        words = text.split(' ')
+        text = ''
+        for i in range(len(words) - 1):
+            m = regex.search(r'([\p{IsAlnum}\.\-]*)([\'\"\)\]\%\p{Pf}]*)(\.+)$', words[i])
+            if m is not None:
+                prefix, starting_punct, _ = m.groups()
+                if prefix and nb_prefixes.get(prefix, _UNDEF) == _ANY and not starting_punct:
+                    pass
+                elif regex.search(r'(\.)[\p{IsUpper}\-]+(\.+)$', words[i]) is not None:
+                    pass
+                elif regex.search(r'^([ ]*[\'\"\(\[\¿\¡\p{Pi}]*[ ]*[\p{L}0-9])', words[i + 1]):
+                    if prefix and nb_prefixes.get(prefix, _UNDEF) == _NUMERIC_ONLY and not starting_punct \
+                            and regex.search('^[0-9]+', words[i + 1]):
+                        pass
+                    else:
+                        words[i] = words[i] + '\n'
+            text += words[i] + ' '
+        text = text + words[-1]
+        text = cls.cleanup_spaces(text)
+        return text.split('\n')
+
+
+def run(splitter, texts, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        results = [splitter.split(t) for t in texts]
+    return (time.process_time() - start) / repeat, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('files', nargs='*', help='text files to split. If not set, use a generated page')
+    parser.add_argument('--size', type=int, default=300, help='size of the generated page, in KB')
+    parser.add_argument('-n', '--repeat', type=int, default=3, help='number of passes over the texts')
+    parser.add_argument('-m', '--more', action='store_true', help='split on :; as well')
+    parser.add_argument('--no-newlines', action='store_true', help='set keep_newlines=False (split_text)')
+    args = parser.parse_args()
+
+    if args.files:
+        texts = []
+        for path in args.files:
+            with open(path, errors='replace') as f:
+                texts.append(f.read())
+    else:
+        with open(_golden_page) as f:
+            page = f.read()
+        texts = [page * (args.size * 1024 // len(page) + 1)]
+    print(f'{len(texts)} texts, {sum(map(len, texts)) / 1024:.0f} KB')
+
+    kwargs = dict(more=args.more, keep_newlines=not args.no_newlines)
+    splitter = MocySplitter(**kwargs)
+    original = OriginalMocySplitter(**kwargs)
+    t_orig, expected = run(original, texts, args.repeat)
+    t_new, results = run(splitter, texts, args.repeat)
+    print(f'original:  {t_orig * 1000:8.1f} ms')
+    print(f'optimized: {t_new * 1000:8.1f} ms')
+    print(f'Speedup: x{t_orig / t_new:.1f}, identical output: {results == expected}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,112 @@
+"""
+A micro-benchmark of the existence lookups done by the scraper and searcher: the mongoengine way
+(``objects(id=...).count()``, ``objects(url=...).first()``, ``objects(id__in=...).scalar('id')``) against the raw
+pymongo lookups of :py:mod:`swisstext.mongo.abstract.lookups` (``_id``-only projections, no document instantiation).
+
+The script fills a throw-away database (dropped at the end) with ``--num`` sentences and blacklisted URLs,
+then looks up as many items, half of them present. It needs a local ``mongod``, or ``mongomock``
+(``pip install mongomock``) with ``--mongomock`` (useful to compare the client-side overhead only).
+
+Example:
+```bash
+python extra/bench_mongo_lookups.py --db st_bench -n 5000
+```
+"""
+
+import argparse
+import random
+import time
+
+from mongoengine import connect, disconnect
+
+from swisstext.mongo.abstract.lookups import find_ids, find_values
+from swisstext.mongo.models import MongoBlacklist, MongoSentence
+
+
+def original_sentence_exists(text):
+    return MongoSentence.objects(id=MongoSentence.get_hash(text)).count() == 1
+
+
+def original_is_blacklisted(url):
+    return MongoBlacklist.objects(url=url).first() is not None
+
+
+def run(name, fn, items, expected):
+    start = time.time()
+    results = fn(items)
+    elapsed = time.time() - start
+    assert results == expected, f'{name}: wrong results'
+    print(f'{name:40s} {len(items) / elapsed:10.0f} lookups/s')
+    return elapsed
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--db', default='st_bench', help='database to use (dropped at the end!)')
+    parser.add_argument('--host', default='localhost')
+    parser.add_argument('--port', type=int, default=27017)
+    parser.add_argument('--mongomock', action='store_true', help='use mongomock instead of a mongod server')
+    parser.add_argument('-n', '--num', type=int, default=5000, help='number of documents and lookups')
+    parser.add_argument('--batch-size', type=int, default=100, help='number of items per batch lookup')
+    args = parser.parse_args()
+
+    if args.mongomock:
+        import mongomock
+        client = connect(args.db, host='mongodb://localhost', mongo_client_class=mongomock.MongoClient)
+    else:
+        client = connect(args.db, host=args.host, port=args.port)
+
+    try:
+        random.seed(0)
+        sentences = [f'Das isch dr Satz nummer {i}.' for i in range(2 * args.num)]
+        urls = [f'http://example.ch/page/{i}' for i in range(2 * args.num)]
+        MongoSentence._get_collection().insert_many(
+            [{'_id': MongoSentence.get_hash(s), 'text': s} for s in sentences[:args.num]])
+        MongoBlacklist.ensure_indexes()
+        MongoBlacklist._get_collection().insert_many(
+            [{'_id': MongoBlacklist.get_hash(u), 'url': u} for u in urls[:args.num]])
+
+        sentences = random.sample(sentences, args.num)  # half of them present
+        urls = random.sample(urls, args.num)
+        expected_s = [MongoSentence.exists(s) for s in sentences]
+        expected_u = [MongoBlacklist.exists(u) for u in urls]
+        print(f'{args.num} lookups, {sum(expected_s)} sentences and {sum(expected_u)} urls present')
+
+        def batched(lookup, items, to_key):
+            results = []
+            for i in range(0, len(items), args.batch_size):
+                batch = items[i:i + args.batch_size]
+                keys = [to_key(x) for x in batch]
+                found = lookup(keys)
+                results.extend(k in found for k in keys)
+            return results
+
+        timings = [
+            (run('sentences, count()', lambda items: [original_sentence_exists(s) for s in items],
+                 sentences, expected_s),
+             run('sentences, find_one(_id)', lambda items: [MongoSentence.exists(s) for s in items],
+                 sentences, expected_s)),
+            (run('sentences, batched scalar(id)',
+                 lambda items: batched(lambda keys: set(MongoSentence.objects(id__in=keys).scalar('id')),
+                                       items, MongoSentence.get_hash), sentences, expected_s),
+             run('sentences, batched find_ids',
+                 lambda items: batched(lambda keys: find_ids(MongoSentence, keys), items, MongoSentence.get_hash),
+                 sentences, expected_s)),
+            (run('blacklist, first()', lambda items: [original_is_blacklisted(u) for u in items], urls, expected_u),
+             run('blacklist, find_one(url)', lambda items: [MongoBlacklist.exists(u) for u in items],
+                 urls, expected_u)),
+            (run('blacklist, batched scalar(url)',
+                 lambda items: batched(lambda keys: set(MongoBlacklist.objects(url__in=keys).scalar('url')),
+                                       items, str), urls, expected_u),
+             run('blacklist, batched find_values',
+                 lambda items: batched(lambda keys: find_values(MongoBlacklist, 'url', keys), items, str),
+                 urls, expected_u)),
+        ]
+        print('Speedups: ' + ', '.join(f'x{t_orig / t_new:.1f}' for t_orig, t_new in timings))
+    finally:
+        client.drop_database(args.db)
+        disconnect()
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,70 @@
+"""
+A micro-benchmark of :py:func:`~swisstext.cmd.scraping.tools.norm_punc.normalize_text`, comparing the fused
+normalization steps against the original implementation (one ``re.sub`` / ``str.replace`` per pattern).
+
+The texts are read from files (e.g. pages saved by ``extra/bench_justext_crawler.py --fetch``, or any text file).
+If no file is given, the golden page of the tests is repeated to make a large page. The script also checks
+that both implementations return the same texts.
+
+Example:
+```bash
+python extra/bench_normalizer.py pages/*.txt -n 5
+```
+"""
+
+import argparse
+import os
+import re
+import time
+
+from swisstext.cmd.scraping.tools import norm_punc
+
+_golden_page = os.path.join(os.path.dirname(__file__), '..', 'src', 'backend', 'tests', 'normalizer_golden',
+                            'forum_page.txt')
+
+
+def original_normalize_text(text):
+    text = norm_punc.unicodedata.normalize('NFC', text)
+    text = norm_punc.emoji_pattern.sub(' ', text)
+    for typ, pattern, replace in norm_punc.normalization_patterns:
+        text = pattern.sub(replace, text) if typ == norm_punc.REG else text.replace(pattern, replace)
+    text = norm_punc.spaces_pattern.sub(' ', text)
+    text = re.sub(r'(^|\n)\s+', r'\1', text)
+    text = re.sub(r'\s+(\n|$)', r'\1', text)
+    return text
+
+
+def run(fn, texts, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        results = [fn(t) for t in texts]
+    return (time.process_time() - start) / repeat, results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('files', nargs='*', help='text files to normalize. If not set, use a generated page')
+    parser.add_argument('--size', type=int, default=300, help='size of the generated page, in KB')
+    parser.add_argument('-n', '--repeat', type=int, default=3, help='number of passes over the texts')
+    args = parser.parse_args()
+
+    if args.files:
+        texts = []
+        for path in args.files:
+            with open(path, errors='replace') as f:
+                texts.append(f.read())
+    else:
+        with open(_golden_page) as f:
+            page = f.read()
+        texts = [page * (args.size * 1024 // len(page) + 1)]
+    print(f'{len(texts)} texts, {sum(map(len, texts)) / 1024:.0f} KB')
+
+    t_orig, expected = run(original_normalize_text, texts, args.repeat)
+    t_new, results = run(lambda t: norm_punc.normalize_text(t, strip_emojis=True), texts, args.repeat)
+    print(f'original: {t_orig * 1000:8.1f} ms')
+    print(f'fused:    {t_new * 1000:8.1f} ms')
+    print(f'Speedup: x{t_orig / t_new:.1f}, identical output: {results == expected}')
+
+
+if __name__ == '__main__':
+    main()
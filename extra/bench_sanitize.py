@@ -0,0 +1,68 @@
+"""
+A micro-benchmark of :py:meth:`~swisstext.cmd.scraping.tools.SwigspotLangid.sanitize` (one ``str.translate``
+and one regex) against the original implementation (four ``re.sub`` passes).
+
+The sentences are read from a text file (one sentence per line) or generated. The script also checks that
+both implementations return the same strings.
+
+Example:
+```bash
+python extra/bench_sanitize.py --sentences sentences.txt -n 5
+```
+"""
+
+import argparse
+import random
+import re
+import time
+
+from swisstext.cmd.scraping.tools import SwigspotLangid
+
+_RR = re.compile(r"[^\w \.,]|\d|_")
+
+
+def original_sanitize(s: str) -> str:
+    san = s.lower()
+    san = re.sub(_RR, "", san)
+    san = re.sub(" +", " ", san)
+    san = re.sub(r" \.", ".", san)
+    return san.strip()
+
+
+def generate(num_sentences):
+    random.seed(0)
+    words = ('Ich bi de chli Hans und wohne z Bärn . Das isch es schöns Huus , gäll ? 2019 (!) - '
+             'je suis le petit Hans et j\'habite à Berne . « The house » is nice : 42 €').split()
+    return [' '.join(random.choice(words) for _ in range(random.randint(5, 25))) for _ in range(num_sentences)]
+
+
+def run(fn, sentences, repeat):
+    start = time.process_time()
+    for _ in range(repeat):
+        results = [fn(s) for s in sentences]
+    return (time.process_time() - start) / (repeat * len(sentences)), results
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sentences', help='file with one sentence per line. If not set, sentences are generated')
+    parser.add_argument('--num', type=int, default=50000, help='number of sentences to generate')
+    parser.add_argument('-n', '--repeat', type=int, default=3, help='number of passes over the sentences')
+    args = parser.parse_args()
+
+    if args.sentences:
+        with open(args.sentences) as f:
+            sentences = [l.rstrip('\n') for l in f]
+    else:
+        sentences = generate(args.num)
+    print(f'{len(sentences)} sentences')
+
+    t_orig, expected = run(original_sanitize, sentences, args.repeat)
+    t_new, results = run(SwigspotLangid.sanitize, sentences, args.repeat)
+    print(f'original: {t_orig * 1e6:6.2f} us/sentence')
+    print(f'fused:    {t_new * 1e6:6.2f} us/sentence')
+    print(f'Speedup: x{t_orig / t_new:.1f}, identical output: {results == expected}')
+
+
+if __name__ == '__main__':
+    main()
@@ -0,0 +1,119 @@
+"""
+A script that benchmarks the scraping engines (threads vs asyncio) of ``st_scrape``.
+
+It launches a local HTTP server serving canned HTML pages (with a configurable latency to simulate the network),
+then crawls them using the :py:class:`~swisstext.cmd.scraping.pipeline.PipelineWorker` (threads) and the
+:py:class:`~swisstext.cmd.scraping.pipeline.AsyncPipelineWorker` (event loop). No MongoDB is needed, the tools
+used are the default implementations of the interfaces, a :py:class:`~swisstext.cmd.scraping.tools.BsCrawler`
+and a :py:class:`~swisstext.cmd.scraping.tools.ConsoleSaver`.
+
+Example:
+```bash
+python extra/bench_scraping_engines.py --seeds 8 --fanout 25 --latency 0.1 -w 1 -w 8 -c 50 -c 200
+```
+"""
+
+import argparse
+import contextlib
+import io
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+from swisstext.cmd.scraping.interfaces import *
+from swisstext.cmd.scraping.page_queue import PageQueue
+from swisstext.cmd.scraping.pipeline import Pipeline, PipelineWorker, AsyncPipelineWorker
+from swisstext.cmd.scraping.scheduler import Scheduler
+from swisstext.cmd.scraping.tools import BsCrawler, ConsoleSaver
+
+PARAGRAPH = '<p>Mir sind hüt go wandere und s\'Wätter isch eifach wunderbar gsi, drum simer no lang bliibe.</p>'
+
+
+class CannedPages:
+    """Pages 0 to seeds-1 are seeds, each seed i links to the pages seeds + i * fanout + [0, fanout[."""
+
+    def __init__(self, seeds, fanout, paragraphs):
+        self.seeds, self.fanout, self.paragraphs = seeds, fanout, paragraphs
+        self.num_pages = seeds + seeds * fanout
+
+    def html(self, i):
+        links = ''
+        if i < self.seeds:
+            links = ''.join(f'<a href="/p/{self.seeds + i * self.fanout + j}">link</a>' for j in range(self.fanout))
+        return f'<html><body><h1>Page {i}</h1>{PARAGRAPH * self.paragraphs}{links}</body></html>'.encode('utf-8')
+
+
+def start_server(pages: CannedPages, latency: float) -> ThreadingHTTPServer:
+    class Handler(BaseHTTPRequestHandler):
+        def do_GET(self):
+            time.sleep(latency)
+            try:
+                body = pages.html(int(self.path.rsplit('/', 1)[-1]))
+                self.send_response(200)
+                self.send_header('Content-Type', 'text/html; charset=utf-8')
+                self.send_header('Content-Length', str(len(body)))
+                self.end_headers()
+                self.wfile.write(body)
+            except ValueError:
+                self.send_error(404)
+
+        def log_message(self, *args):
+            pass  # silence
+
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    return server
+
+
+def create_pipeline():
+    return Pipeline(BsCrawler(), INormalizer(), ISplitter(), ISentenceFilter(), ISgDetector(),
+                    None, IUrlFilter(), IDecider(), ConsoleSaver())
+
+
+def run(base_url, pages: CannedPages, worker_factory, num_threads=1):
+    pipeline = create_pipeline()
+    queue = PageQueue()
+    for i in range(pages.seeds):
+        queue.put((pipeline.saver.get_page(f'{base_url}/p/{i}'), 1))
+
+    new_sentences = []
+    args = (queue, pipeline, new_sentences, 2)
+    scheduler = Scheduler(queue, max_depth=2)
+    start = time.time()
+    with contextlib.redirect_stdout(io.StringIO()):  # the ConsoleSaver is quite verbose
+        threads = [threading.Thread(target=worker_factory(i, scheduler).run, args=args) for i in range(num_threads)]
+        for t in threads: t.start()
+        for t in threads: t.join()
+    elapsed = time.time() - start
+    return elapsed, len(pipeline.saver._pages)
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--seeds', type=int, default=8, help='number of seed URLs')
+    parser.add_argument('--fanout', type=int, default=25, help='number of child URLs per seed')
+    parser.add_argument('--paragraphs', type=int, default=20, help='number of paragraphs per page')
+    parser.add_argument('--latency', type=float, default=0.1, help='server latency, in seconds')
+    parser.add_argument('-w', '--workers', type=int, action='append', help='num_workers for the thread engine')
+    parser.add_argument('-c', '--concurrency', type=int, action='append', help='max_concurrency for the async engine')
+    args = parser.parse_args()
+
+    pages = CannedPages(args.seeds, args.fanout, args.paragraphs)
+    server = start_server(pages, args.latency)
+    base_url = 'http://127.0.0.1:%d' % server.server_address[1]
+    print(f'Serving {pages.num_pages} pages on {base_url} (latency={args.latency}s)')
+
+    print(f'{"engine":30s} {"pages":>6s} {"time (s)":>9s} {"pages/s":>8s}')
+    for w in args.workers or [1, 8]:
+        elapsed, n = run(base_url, pages, lambda i, s: PipelineWorker(i, scheduler=s), num_threads=w)
+        print(f'{"thread (num_workers=%d)" % w:30s} {n:6d} {elapsed:9.2f} {n / elapsed:8.1f}')
+    for c in args.concurrency or [100]:
+        elapsed, n = run(base_url, pages, lambda i, s: AsyncPipelineWorker(i, max_concurrency=c, scheduler=s))
+        print(f'{"async (max_concurrency=%d)" % c:30s} {n:6d} {elapsed:9.2f} {n / elapsed:8.1f}')
+
+    server.shutdown()
+
+
+if __name__ == '__main__':
+    main()
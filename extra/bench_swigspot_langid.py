@@ -0,0 +1,69 @@
+"""
+A script that benchmarks the :py:class:`~swisstext.cmd.scraping.tools.SwigspotLangid` (pickled scikit-learn
+pipeline) against the :py:class:`~swisstext.cmd.scraping.tools.CompiledSwigspotLangid` (memory-mapped NumPy arrays):
+instantiation time, prediction time and largest difference between the probabilities.
+
+The sentences are read from a text file (one sentence per line). If no file is given, sentences are generated
+from a small vocabulary. The compiled model is exported to ``--model-dir`` first if it doesn't exist.
+
+Example:
+```bash
+python extra/bench_swigspot_langid.py --sentences sentences.txt --model-dir /tmp/swigspot_langid.model
+```
+"""
+
+import argparse
+import os
+import random
+import time
+
+from swisstext.cmd.scraping.tools import SwigspotLangid, CompiledSwigspotLangid
+from swisstext.cmd.scraping.tools.swigspot_langid import export_model
+
+
+def generate(num_sentences):
+    random.seed(0)
+    words = ('ich bi de chli hans und wohne z bärn . das isch es schöns huus , gäll ? '
+             'je suis le petit hans et j habite à berne . the house is nice , is it not ? '
+             'das ist ein schönes haus und ich wohne hier seit jahren').split()
+    return [' '.join(random.choice(words) for _ in range(random.randint(5, 25))) for _ in range(num_sentences)]
+
+
+def timed(fn, *args):
+    start = time.perf_counter()
+    result = fn(*args)
+    return time.perf_counter() - start, result
+
+
+def main():
+    parser = argparse.ArgumentParser()
+    parser.add_argument('--sentences', help='file with one sentence per line. If not set, sentences are generated')
+    parser.add_argument('-n', '--num', type=int, default=20000, help='number of sentences to generate')
+    parser.add_argument('--batch-size', type=int, default=30, help='number of sentences per call to predict')
+    parser.add_argument('--model-dir', default='swigspot_langid.model', help='directory of the compiled model')
+    args = parser.parse_args()
+
+    if args.sentences:
+        with open(args.sentences) as f:
+            sentences = [l.rstrip('\n') for l in f]
+    else:
+        sentences = generate(args.num)
+    batches = [sentences[i:i + args.batch_size] for i in range(0, len(sentences), args.batch_size)]
+    print(f'{len(sentences)} sentences, {len(batches)} batches')
+
+    t_load, reference = timed(SwigspotLangid)
+    if not os.path.exists(args.model_dir):
+        export_model(args.model_dir, reference.pipe)
+    t_load_compiled, compiled = timed(CompiledSwigspotLangid, args.model_dir)
+    print(f'load:    pickle {t_load * 1000:8.1f} ms, compiled {t_load_compiled * 1000:8.1f} ms')
+
+    predict_all = lambda detector: [p for batch in batches for p in detector.predict(batch)]
+    t_pred, expected = timed(predict_all, reference)
+    t_pred_compiled, results = timed(predict_all, compiled)
+    print(f'predict: pickle {t_pred * 1000:8.1f} ms, compiled {t_pred_compiled * 1000:8.1f} ms '
+          f'(x{t_pred / t_pred_compiled:.1f})')
+    print(f'max difference: {max(abs(a - b) for a, b in zip(expected, results)):.2e}')
+
+
+if __name__ == '__main__':
+    main()
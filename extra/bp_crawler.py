@@ -11,9 +11,10 @@ class BpCrawler(ICrawler):
             raise Exception(f'{extractor} is not a valid boilerpipe extractor class')
 
         self.extractor = Extractor(extractor, kMin=min_words)
+        self.bs_crawler = BsCrawler()
 
     def crawl(self, url: str) -> ICrawler.CrawlResults:
-        soup, content = BsCrawler.get_soup(url)
+        soup, content = self.bs_crawler.get_soup(url)
         sentences = self.extractor.getTextBlocks(html=str(soup))
         text = '\n'.join(sentences)
 
@@ -15,7 +15,8 @@ setuptools.setup(
     url='https://github.com/derlin/swisstext',
 
     packages=setuptools.find_packages(),
-    package_data={'': ['*.yaml', '*.pickle', '*.txt']},  # include yaml and pickle from any module
+    # include yaml and pickle from any module, and the compiled langid model if exported before the build
+    package_data={'': ['*.yaml', '*.pickle', '*.txt', 'swigspot_langid.model/*']},
     entry_points={
         'console_scripts': [
             'st_scrape = swisstext.cmd.scraping.__main__:main',
@@ -171,34 +171,42 @@ class BaseConfig(ABC):
         :return: a list of tool instances, in the same order as :py:attr:`interfaces_package`
         :raises RuntimeError: if a tool could not be instantiated
         """
-        tools = []
+        return [self.instantiate_tool(e) for e in self.valid_tool_entries]
+
+    def instantiate_tool(self, e: str, arguments: Optional[Dict] = None) -> object:
+        """
+        Create an instance of one tool, see :py:meth:`instantiate_tools`.
+
+        :param e: the tool entry, one of :py:attr:`valid_tool_entries`
+        :param arguments: the arguments to pass to the tool constructor, default to the ``[e]_options`` entry
+        :return: the tool instance
+        :raises RuntimeError: if the tool could not be instantiated
+        """
         root = self.conf[self.tool_entry_name]
         base_package = root.get('_base_package', '')
 
-        for e in self.valid_tool_entries:
-            if e not in root:
-                self.logger.warning("missing entry in toolchain '%s'" % e)
+        if e not in root:
+            self.logger.warning("missing entry in toolchain '%s'" % e)
 
-            if e not in root or root[e] == self.INTERFACE_WILDCARD:
-                module_name = self.interfaces_package
-                class_name = "I%s" % self._to_camelcase(e)
-            else:
-                qualified_name = root[e]
-                if base_package and qualified_name.startswith("."):
-                    qualified_name = base_package + qualified_name
-                module_name, class_name = qualified_name.rsplit(".", 1)
+        if e not in root or root[e] == self.INTERFACE_WILDCARD:
+            module_name = self.interfaces_package
+            class_name = "I%s" % self._to_camelcase(e)
+        else:
+            qualified_name = root[e]
+            if base_package and qualified_name.startswith("."):
+                qualified_name = base_package + qualified_name
+            module_name, class_name = qualified_name.rsplit(".", 1)
 
+        if arguments is None:
             arguments = self.conf.get("%s_options" % e) or {}
 
-            try:
-                ToolClass = getattr(importlib.import_module(module_name), class_name)
-                tools.append(ToolClass(**arguments))
-            except Exception as err:
-                raise RuntimeError(
-                    "Error instantiating %s (%s.%s(%s))" %
-                    (e, module_name, class_name, arguments))
-
-        return tools
+        try:
+            ToolClass = getattr(importlib.import_module(module_name), class_name)
+            return ToolClass(**arguments)
+        except Exception as err:
+            raise RuntimeError(
+                "Error instantiating %s (%s.%s(%s))" %
+                (e, module_name, class_name, arguments))
 
     @staticmethod
     def _to_camelcase(text):
@@ -156,6 +156,37 @@ def filter_links(base_url: str, links: Iterable[str]) -> Generator[str, None, No
             seen.add(fixed_url[:-1] if fixed_url.endswith('/') else fixed_url + '/')
 
 
+def filter_links_fast(base_url: str, links: Iterable[str]) -> Generator[str, None, None]:
+    """
+    Same as :py:meth:`filter_links`, but faster on pages with many links.
+
+    The resolution is memoized for the page: each distinct href is fixed only once (forums and the like often
+    repeat the same links many times). Moreover, absolute HTTP links skip the join with the base URL entirely.
+
+    :param base_url: the URL of the current page
+    :param links: a list of links found, relative or absolute
+    :return: a generator of unique absolute URLs, all beginning with `http`
+    """
+    seen = set()
+    if base_url is not None:
+        seen.update([base_url, base_url + '/'])
+
+    resolved = dict()  # href => (fixed_url, ok)
+    for link in links:
+        if link in resolved:
+            continue  # already yielded or not interesting
+        if link.startswith('http://') or link.startswith('https://'):
+            # urljoin would return the link as-is (modulo a parse/unparse round trip done by fix_url anyway)
+            fixed_url, ok = fix_url(link)
+        else:
+            fixed_url, ok = fix_url(link, base_url)
+        resolved[link] = (fixed_url, ok)
+        if ok and fixed_url not in seen:
+            yield fixed_url
+            seen.add(fixed_url)
+            seen.add(fixed_url[:-1] if fixed_url.endswith('/') else fixed_url + '/')
+
+
 def fix_url(url: str, base_url: str = None) -> (str, bool):
     """
     Fix/normalize and URL and decide if it is interesting to crawl.
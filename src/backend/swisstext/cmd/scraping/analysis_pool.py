@@ -0,0 +1,92 @@
+"""
+This module makes it possible to run the CPU-bound stages of the scraping pipeline (normalize, split, filter and
+detect) in a pool of processes, thus escaping the GIL.
+
+Each process of the :py:class:`AnalysisPool` is *pre-warmed*: it instantiates the normalizer, splitter, sentence
+filter and Swiss German detector from the configuration once (loading the rules, pickle models, etc.), then
+only receives the raw text of the pages to analyse. Crawling, persistence and enqueueing children stay in the
+pipeline workers (I/O threads), which just wait for the results.
+
+.. code-block:: python
+
+    from swisstext.cmd.scraping.analysis_pool import AnalysisPool
+
+    with AnalysisPool(config, max_workers=16) as pool:
+        worker = PipelineWorker(analysis_pool=pool)
+        worker.run(queue, pipeline, new_sentences, max_depth=config.options.crawl_depth)
+"""
+
+import logging
+import multiprocessing
+import os
+import signal
+from concurrent.futures import ProcessPoolExecutor, Future
+from typing import List, Tuple
+
+from .config import Config
+from .pipeline import Pipeline, PipelineWorker
+
+logger = logging.getLogger(__name__)
+
+#: the tools (pipeline entries) used by the CPU-bound stages
+_analysis_entries = ['normalizer', 'splitter', 'sentence_filter', 'sg_detector']
+
+#: maximum time to wait for all the processes to be ready, in seconds
+_warm_up_timeout = 600
+
+#: pipeline holding the analysis tools, set in each process of the pool by :py:func:`_init_process`
+_process_pipeline: Pipeline = None
+
+#: barrier shared by all the processes of the pool, set by :py:func:`_init_process`
+_ready = None
+
+
+def _init_process(config: Config, ready):
+    global _process_pipeline, _ready
+    # the parent process handles ctrl+c and will shutdown the pool properly
+    signal.signal(signal.SIGINT, signal.SIG_IGN)
+    normalizer, splitter, sentence_filter, sg_detector = (config.instantiate_tool(e) for e in _analysis_entries)
+    _process_pipeline = Pipeline(None, normalizer, splitter, sentence_filter, sg_detector, None, None, None, None)
+    _ready = ready  # synchronization primitives can only be passed at process creation
+
+
+def _warm_up():
+    # block until every process runs a warm-up task: no process can run two of them, so the pool has to start
+    # all its processes, and each one has run _init_process
+    _ready.wait()
+
+
+def _analyse(text: str) -> Tuple[str, List[Tuple[str, float]]]:
+    return PipelineWorker._analyse(_process_pipeline, text)
+
+
+class AnalysisPool(ProcessPoolExecutor):
+    """
+    A :py:class:`~concurrent.futures.ProcessPoolExecutor` whose processes hold their own instances of the
+    analysis tools, as defined in the configuration.
+    """
+
+    def __init__(self, config: Config, max_workers: int = None):
+        """
+        Create the pool and wait for all the processes to be ready.
+
+        :param config: the configuration used to instantiate the tools in each process
+        :param max_workers: the number of processes, defaults to the number of CPUs
+        """
+        max_workers = max_workers or os.cpu_count() or 1
+        ready = multiprocessing.Barrier(max_workers, timeout=_warm_up_timeout)
+        super().__init__(max_workers=max_workers, initializer=_init_process, initargs=(config, ready))
+        # processes are started on demand: submit one blocking task per process and wait, so the tools are
+        # loaded in all the processes before the crawl starts (raises BrokenBarrierError on timeout)
+        for future in [self.submit(_warm_up) for _ in range(max_workers)]:
+            future.result()
+        logger.info(f'AnalysisPool: {max_workers} processes ready.')
+
+    def analyse(self, text: str) -> Future:
+        """
+        Submit the raw text of a page for analysis.
+
+        :return: a future holding the tuple (normalized text, list of (sentence, Swiss German proba)),
+            see :py:meth:`~swisstext.cmd.scraping.pipeline.PipelineWorker._analyse`
+        """
+        return self.submit(_analyse, text)
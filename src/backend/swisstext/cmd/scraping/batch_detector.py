@@ -0,0 +1,177 @@
+"""
+This module contains the :py:class:`BatchDetector`, a Swiss German detector that groups the sentences of many pages
+into large batches before calling the actual detector.
+
+Language identifiers such as the :py:class:`~swisstext.cmd.scraping.tools.swigspot_langid.SwigspotLangid` pay a
+fixed overhead on each call (TF-IDF vectorization setup, sparse matrix allocation, classifier call), which dominates
+when they are called page by page with a few dozen sentences. The :py:class:`BatchDetector` instead accumulates
+the sentences submitted by concurrent workers in a background thread and calls the wrapped detector once per batch,
+when either:
+
+* the batch holds at least :py:attr:`BatchDetector.max_batch_size` sentences, or
+* the oldest request has waited for :py:attr:`BatchDetector.max_wait` seconds.
+
+The probabilities are then dispatched back to the waiting pages.
+
+Batching only pays off when many pages are analysed at the same time, that is with ``num_workers > 1`` or the
+``async`` engine: with a single worker, each page just waits ``max_wait`` seconds for nothing.
+
+.. code-block:: python
+
+    from swisstext.cmd.scraping.batch_detector import BatchDetector
+
+    pipeline.detector = BatchDetector(pipeline.detector, max_batch_size=2048, max_wait=.05)
+    # ... launch the workers, then
+    pipeline.detector.close()
+"""
+
+import logging
+import time
+from concurrent.futures import Future
+from threading import Condition, Thread
+from typing import List, Tuple
+
+from .interfaces import ISgDetector
+
+logger = logging.getLogger(__name__)
+
+
+class BatchDetector(ISgDetector):
+    """
+    Wrap an :py:class:`~swisstext.cmd.scraping.interfaces.ISgDetector` and call it on batches of sentences coming
+    from concurrent calls to :py:meth:`predict` (or :py:meth:`submit`). The results are the same as calling the
+    wrapped detector directly, as long as its predictions are independent of the other sentences of the batch.
+    """
+
+    def __init__(self, detector: ISgDetector, max_batch_size=2048, max_wait=.05):
+        """
+        :param detector: the detector doing the actual predictions
+        :param max_batch_size: number of sentences triggering a call to the detector. Sentences of the same
+            request are never split, so a batch may be larger if a single page has more sentences
+        :param max_wait: maximum time a request waits for other requests to fill the batch, in seconds
+        """
+        if max_batch_size < 1:
+            raise ValueError('max_batch_size should be > 0')
+        if max_wait < 0:
+            raise ValueError('max_wait should be >= 0')
+
+        self.detector = detector  #: the wrapped detector
+        self.max_batch_size = max_batch_size  #: number of sentences triggering a call to the detector
+        self.max_wait = max_wait  #: maximum time a request waits for the batch to fill, in seconds
+
+        self.num_batches = 0  #: number of calls to the wrapped detector
+        self.num_sentences = 0  #: number of sentences predicted
+
+        self._requests: List[Tuple[List[str], Future, float]] = []  # (sentences, future, submit time)
+        self._pending = 0  # number of sentences in _requests
+        self._cond = Condition()
+        self._closed = False
+        self._thread = None
+
+    def submit(self, sentences: List[str]) -> Future:
+        """
+        Add sentences to the next batch.
+
+        :return: a future holding the list of probabilities, in the same order as the sentences
+        """
+        future = Future()
+        if not sentences:
+            future.set_result([])
+            return future
+
+        with self._cond:
+            if self._closed:
+                raise RuntimeError('BatchDetector is closed')
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name='batch-detector', daemon=True)
+                self._thread.start()
+            self._requests.append((sentences, future, time.time()))
+            self._pending += len(sentences)
+            if self._pending >= self.max_batch_size:
+                self._cond.notify()
+            elif len(self._requests) == 1:
+                self._cond.notify()  # wake up the thread to start the timer
+        return future
+
+    def predict(self, sentences: List[str]) -> List[float]:
+        """Submit the sentences and wait for the batch to be processed."""
+        return self.submit(sentences).result()
+
+    def _next_batch(self) -> List[Tuple[List[str], Future, float]]:
+        # wait for a full batch, max_wait or close, then take the requests fitting in max_batch_size
+        with self._cond:
+            while True:
+                if self._requests:
+                    remaining = self._requests[0][2] + self.max_wait - time.time()
+                    if self._pending >= self.max_batch_size or remaining <= 0 or self._closed:
+                        break
+                    self._cond.wait(remaining)
+                elif self._closed:
+                    return []
+                else:
+                    self._cond.wait()
+
+            size, end = 0, 0
+            for sentences, _, _ in self._requests:
+                if end > 0 and size + len(sentences) > self.max_batch_size:
+                    break
+                size += len(sentences)
+                end += 1
+            batch = self._requests[:end]
+            del self._requests[:end]
+            self._pending -= size
+            return batch
+
+    def _run(self):
+        while True:
+            batch = self._next_batch()
+            if not batch:
+                break
+            # skip the cancelled requests (e.g. by asyncio.wrap_future), the others can't be cancelled anymore
+            batch = [req for req in batch if req[1].set_running_or_notify_cancel()]
+            if not batch:
+                continue
+            try:
+                self._process(batch)
+            except Exception as e:
+                # never stop the thread, or all the later requests would wait forever
+                logger.exception('BatchDetector: failed to deliver the predictions')
+                for _, future, _ in batch:
+                    if not future.done():
+                        future.set_exception(e)
+
+    def _process(self, batch: List[Tuple[List[str], Future, float]]):
+        sentences = [s for req in batch for s in req[0]]
+        try:
+            probas = self.detector.predict(sentences)
+        except Exception as e:
+            for _, future, _ in batch:
+                future.set_exception(e)
+            return
+
+        self.num_batches += 1
+        self.num_sentences += len(sentences)
+        if len(probas) != len(sentences):
+            raise ValueError(f'{len(probas)} probabilities returned for {len(sentences)} sentences')
+        start = 0
+        for req, future, _ in batch:
+            future.set_result(probas[start:start + len(req)])
+            start += len(req)
+
+    @property
+    def mean_batch_size(self) -> float:
+        """Average number of sentences per call to the wrapped detector."""
+        return self.num_sentences / self.num_batches if self.num_batches > 0 else 0.
+
+    def log_stats(self):
+        """Log the number of batches and sentences."""
+        logger.info('BatchDetector: %d sentences predicted in %d batches (%.1f sentences/batch)' % (
+            self.num_sentences, self.num_batches, self.mean_batch_size))
+
+    def close(self):
+        """Process the pending requests and stop the background thread."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
@@ -0,0 +1,174 @@
+"""
+This module contains a :py:class:`ScalableBloomFilter`, used by the
+:py:class:`~swisstext.cmd.scraping.tools.mongo_saver.MongoSaver` to answer "does this sentence exist?" and
+"is this URL blacklisted?" without a query when the answer is a definite no.
+
+A Bloom filter never has false negatives: if it says an item is absent, it is. If it says an item may be present,
+the database is queried to be sure (false positives happen at most :py:attr:`ScalableBloomFilter.error_rate`
+of the time). Since the filter only grows, the scalable variant (Almeida et al., 2007) stacks filters of
+increasing capacity and decreasing error rates as items are added, so the capacity doesn't have to be known
+in advance.
+
+The items are 64-bit hashes: the ids of the ``sentences`` and ``blacklist`` collections are already
+CityHash64 values, so there is no need to hash them again. The positions of the bits are derived from the
+two halves of the hash (double hashing).
+
+.. code-block:: python
+
+    from swisstext.cmd.scraping.bloom_filter import ScalableBloomFilter
+
+    bloom = ScalableBloomFilter()
+    bloom.add_all([1234, 5678])
+    5678 in bloom  # True
+    42 in bloom  # False (most certainly)
+    bloom.save('/tmp/sentences.bloom')
+    bloom = ScalableBloomFilter.load('/tmp/sentences.bloom')
+"""
+
+import json
+import math
+from threading import Lock
+from typing import Iterable, List
+
+import numpy as np
+
+_LN2 = math.log(2)
+
+
+class BloomFilter:
+    """
+    A Bloom filter of fixed capacity over 64-bit hashes, backed by a NumPy bit array.
+    This class is not thread-safe for writes, see :py:class:`ScalableBloomFilter`.
+    """
+
+    def __init__(self, capacity: int, error_rate: float, bits: np.ndarray = None, count=0):
+        """
+        :param capacity: number of items the filter can hold while keeping the error rate
+        :param error_rate: false positive rate once the filter holds ``capacity`` items
+        :param bits: the bit array, when loading an existing filter
+        :param count: the number of items already added, when loading an existing filter
+        """
+        self.capacity = capacity  #: number of items the filter can hold while keeping the error rate
+        self.error_rate = error_rate  #: false positive rate at full capacity
+        self.num_bits = max(8, int(math.ceil(-capacity * math.log(error_rate) / _LN2 ** 2)))  #: size of the filter
+        self.num_hashes = max(1, int(round(self.num_bits / capacity * _LN2)))  #: number of bits per item
+        self.count = count  #: number of items added (duplicates included)
+        self.bits = np.zeros((self.num_bits + 7) // 8, dtype=np.uint8) if bits is None else bits
+
+    def _positions(self, hashes: np.ndarray) -> np.ndarray:
+        # double hashing: position i = (h1 + i * h2) % num_bits, shape (num_hashes, len(hashes))
+        h1 = hashes & np.uint64(0xFFFFFFFF)
+        h2 = (hashes >> np.uint64(32)) | np.uint64(1)  # odd, so the positions don't collapse
+        i = np.arange(self.num_hashes, dtype=np.uint64)[:, None]
+        return (h1 + i * h2) % np.uint64(self.num_bits)
+
+    def add_all(self, hashes: np.ndarray):
+        """Add the hashes (an array of uint64)."""
+        positions = self._positions(hashes).ravel()
+        masks = np.left_shift(np.uint8(1), (positions & np.uint64(7)).astype(np.uint8))
+        np.bitwise_or.at(self.bits, positions >> np.uint64(3), masks)
+        self.count += len(hashes)
+
+    def contains_all(self, hashes: np.ndarray) -> np.ndarray:
+        """Return a boolean array, False where a hash is definitely absent."""
+        positions = self._positions(hashes)
+        bits = self.bits[positions >> np.uint64(3)] >> (positions & np.uint64(7)).astype(np.uint8) & 1
+        return bits.all(axis=0)
+
+    @property
+    def is_full(self) -> bool:
+        return self.count >= self.capacity
+
+
+class ScalableBloomFilter:
+    """
+    A Bloom filter growing as items are added: when the current filter is full, a new one with
+    ``growth`` times the capacity and ``tightening`` times the error rate is added, so the overall false
+    positive rate stays below :py:attr:`error_rate`. This class is thread-safe.
+    """
+
+    def __init__(self, initial_capacity=1000000, error_rate=.001, growth=2, tightening=.5):
+        """
+        :param initial_capacity: capacity of the first filter
+        :param error_rate: overall false positive rate
+        :param growth: capacity ratio between two consecutive filters
+        :param tightening: error rate ratio between two consecutive filters
+        """
+        if initial_capacity < 1:
+            raise ValueError('initial_capacity should be > 0')
+        if not 0 < error_rate < 1:
+            raise ValueError('error_rate should be in ]0, 1[')
+
+        self.initial_capacity = initial_capacity  #: capacity of the first filter
+        self.error_rate = error_rate  #: overall false positive rate
+        self.growth = growth  #: capacity ratio between two consecutive filters
+        self.tightening = tightening  #: error rate ratio between two consecutive filters
+        self.filters: List[BloomFilter] = []  #: the stacked filters, the last one receives the new items
+        self.metadata = {}  #: the metadata restored by :py:meth:`load`
+        self._lock = Lock()
+
+    def _new_filter(self) -> BloomFilter:
+        n = len(self.filters)
+        # the error rates form a geometric series, whose sum is error_rate
+        return BloomFilter(capacity=int(self.initial_capacity * self.growth ** n),
+                           error_rate=self.error_rate * (1 - self.tightening) * self.tightening ** n)
+
+    @staticmethod
+    def to_hashes(ids: Iterable) -> np.ndarray:
+        """Convert 64-bit hashes (ints or strings of digits, like the Mongo ids) to an array."""
+        return np.fromiter((int(i) for i in ids), dtype=np.uint64)
+
+    def add_all(self, ids: Iterable):
+        """Add 64-bit hashes (see :py:meth:`to_hashes`)."""
+        hashes = self.to_hashes(ids)
+        with self._lock:
+            while len(hashes):
+                if not self.filters or self.filters[-1].is_full:
+                    self.filters.append(self._new_filter())
+                current = self.filters[-1]
+                n = current.capacity - current.count
+                current.add_all(hashes[:n])
+                hashes = hashes[n:]
+
+    def add(self, id):
+        """Add a single 64-bit hash."""
+        self.add_all([id])
+
+    def contains_all(self, ids: Iterable) -> List[bool]:
+        """Return, for each 64-bit hash, False if it is definitely absent and True if it may be present."""
+        hashes = self.to_hashes(ids)
+        found = np.zeros(len(hashes), dtype=bool)
+        for f in list(self.filters):
+            found |= f.contains_all(hashes)
+        return found.tolist()
+
+    def __contains__(self, id) -> bool:
+        return self.contains_all([id])[0]
+
+    def __len__(self):
+        """Number of items added (duplicates included)."""
+        return sum(f.count for f in self.filters)
+
+    def save(self, path: str, **metadata):
+        """
+        Save the filters to a file (NumPy ``.npz`` format). The ``metadata`` (JSON-serializable) are saved
+        alongside, and restored in the ``metadata`` attribute by :py:meth:`load`.
+        """
+        with self._lock:
+            params = dict(initial_capacity=self.initial_capacity, error_rate=self.error_rate, growth=self.growth,
+                          tightening=self.tightening, counts=[f.count for f in self.filters], metadata=metadata)
+            arrays = {f'bits_{i}': f.bits for i, f in enumerate(self.filters)}
+            with open(path, 'wb') as fp:
+                np.savez(fp, params=np.array(json.dumps(params)), **arrays)
+
+    @classmethod
+    def load(cls, path: str) -> 'ScalableBloomFilter':
+        """Load filters saved by :py:meth:`save`."""
+        with np.load(path) as data:
+            params = json.loads(str(data['params']))
+            bloom = cls(params['initial_capacity'], params['error_rate'], params['growth'], params['tightening'])
+            for i, count in enumerate(params['counts']):
+                f = bloom._new_filter()
+                bloom.filters.append(BloomFilter(f.capacity, f.error_rate, bits=data[f'bits_{i}'], count=count))
+        bloom.metadata = params['metadata']
+        return bloom
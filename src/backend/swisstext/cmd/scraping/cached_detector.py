@@ -0,0 +1,95 @@
+"""
+This module contains the :py:class:`CachedDetector`, a Swiss German detector that remembers the probabilities
+of the last sentences it saw.
+
+Many sentences are repeated on thousands of pages: forum templates, signatures, cookie banners, quoted replies, etc.
+The :py:class:`CachedDetector` keeps the probabilities of the most recently seen sentences in an LRU cache and
+only calls the wrapped detector for the sentences it doesn't know yet.
+
+The cache is enabled from the configuration, by setting ``cache_size`` in the ``sg_detector_options``
+(this option is not passed to the detector itself):
+
+.. code-block:: yaml
+
+    sg_detector_options:
+      cache_size: 100000 # number of sentences to remember, 0 to disable the cache
+
+The hit rate is logged at the end of ``st_scrape``. When ``num_processes > 0``, each process has its own cache.
+"""
+
+import logging
+from collections import OrderedDict
+from threading import Lock
+from typing import List
+
+from .interfaces import ISgDetector
+
+logger = logging.getLogger(__name__)
+
+
+class CachedDetector(ISgDetector):
+    """
+    Wrap an :py:class:`~swisstext.cmd.scraping.interfaces.ISgDetector` and cache its predictions. The results are
+    the same as calling the wrapped detector directly, as long as its predictions are deterministic.
+    This class is thread-safe.
+    """
+
+    def __init__(self, detector: ISgDetector, max_size=100000):
+        """
+        :param detector: the detector doing the actual predictions
+        :param max_size: maximum number of sentences in the cache. When full, the least recently used are evicted
+        """
+        if max_size < 1:
+            raise ValueError('max_size should be > 0')
+
+        self.detector = detector  #: the wrapped detector
+        self.max_size = max_size  #: maximum number of sentences in the cache
+
+        self.hits = 0  #: number of sentences found in the cache
+        self.misses = 0  #: number of sentences sent to the wrapped detector
+
+        self._cache = OrderedDict()  # sentence -> proba, from the least to the most recently used
+        self._lock = Lock()
+
+    def predict(self, sentences: List[str]) -> List[float]:
+        """Return the cached probabilities and call the wrapped detector for the other sentences only."""
+        probas = [None] * len(sentences)
+        missing = OrderedDict()  # sentence -> indices, duplicates are predicted only once
+        with self._lock:
+            for i, s in enumerate(sentences):
+                proba = self._cache.get(s)
+                if proba is None:
+                    missing.setdefault(s, []).append(i)
+                else:
+                    self._cache.move_to_end(s)
+                    probas[i] = proba
+            self.hits += len(sentences) - len(missing)
+            self.misses += len(missing)
+
+        if missing:
+            # don't hold the lock during the prediction, other threads may use the cache in the meantime
+            predictions = self.detector.predict(list(missing.keys()))
+            with self._lock:
+                for (s, indices), proba in zip(missing.items(), predictions):
+                    for i in indices:
+                        probas[i] = proba
+                    self._cache[s] = proba
+                    self._cache.move_to_end(s)
+                while len(self._cache) > self.max_size:
+                    self._cache.popitem(last=False)
+
+        return probas
+
+    def __len__(self):
+        return len(self._cache)
+
+    @property
+    def hit_rate(self) -> float:
+        """Ratio of sentences found in the cache."""
+        total = self.hits + self.misses
+        return self.hits / total if total > 0 else 0.
+
+    def log_stats(self):
+        """Log the number of hits and misses."""
+        logger.info('CachedDetector: %d hits, %d misses (hit rate=%.0f%%), %d sentences cached' % (
+            self.hits, self.misses, self.hit_rate * 100, len(self)))
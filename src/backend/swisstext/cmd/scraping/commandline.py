@@ -18,9 +18,13 @@ import click
 
 from swisstext.cmd import link_utils
 from .page_queue import PageQueue
+from .host_queue import HostQueue
+from .sqlite_queue import SqlitePageQueue
+from .cached_detector import CachedDetector
 from .config import Config
 from .interfaces import *
-from .pipeline import PipelineWorker, Pipeline
+from .pipeline import PipelineWorker, AsyncPipelineWorker, Pipeline
+from .scheduler import Scheduler
 
 # ============== global variables
 
@@ -33,20 +37,25 @@ click.option = partial(click.option, show_default=True)  # show default in help
 class GlobalOptions:
     """Hold the options used by all tools, using lazy instantiation if possible."""
 
-    def __init__(self, config_path: str = None, gen_seeds=False, db: str = None):
+    def __init__(self, config_path: str = None, gen_seeds=False, db: str = None, engine: str = 'thread',
+                 frontier: str = None):
         """
         :param config_path: path to an optional user configuration path
         :param gen_seeds: whether or not to generate seeds
         :param db: name of the mongo db to use
+        :param engine: the scraping engine, either "thread" or "async"
+        :param frontier: path to the SQLite file holding the queue (overrides the config)
         """
         self.gen_seeds = gen_seeds
+        self.engine = engine
 
         self._config_path = config_path
         self._config: Config = None
         self._db = db
+        self._frontier = frontier
+        self.resume = False  #: whether the crawl resumes the one stored in the frontier
         self._pipeline: Pipeline = None
-
-        self.queue = PageQueue()
+        self._queue: PageQueue = None
 
     @property
     def config(self) -> Config:
@@ -54,6 +63,7 @@ class GlobalOptions:
         if self._config is None:
             self._config = Config() if self._config_path is None else Config(self._config_path)
             if self._db: self._config.set('saver_options.db', self._db)
+            if self._frontier: self._config.set('options.frontier', self._frontier)
         return self._config
 
     @property
@@ -63,6 +73,24 @@ class GlobalOptions:
             self._pipeline = self.config.create_pipeline()
         return self._pipeline
 
+    @property
+    def queue(self) -> PageQueue:
+        """The page queue, persistent or with per-host politeness depending on the options (lazy loaded)."""
+        if self._queue is None:
+            opts = self.config.options
+            if opts.frontier:
+                self._queue = SqlitePageQueue(opts.frontier, resume=self.resume)
+            elif opts.host_queue:
+                self._queue = HostQueue(max_per_host=opts.max_per_host, min_delay=opts.min_host_delay)
+            else:
+                self._queue = PageQueue()
+        return self._queue
+
+    @property
+    def worker_cls(self):
+        """The pipeline worker class to use, depending on the engine."""
+        return AsyncPipelineWorker if self.engine == 'async' else PipelineWorker
+
 
 # ============== main entrypoint
 
@@ -71,8 +99,12 @@ class GlobalOptions:
               default=logger_default_level)
 @click.option('-c', '--config-path', type=click.Path(dir_okay=False), default=None)
 @click.option('-d', '--db', default=None, help='If set, this will override the database set in the config')
+@click.option('-e', '--engine', type=click.Choice(['thread', 'async']), default='thread',
+              help='Process pages using threads (num_workers) or an event loop (max_concurrency)')
+@click.option('-f', '--frontier', type=click.Path(dir_okay=False), default=None,
+              help='If set, store the queue in this SQLite file (overrides the config), so the crawl can be resumed')
 @click.pass_context
-def cli(ctx, log_level, config_path, db):
+def cli(ctx, log_level, config_path, db, engine, frontier):
     import sys
     # configure all loggers (log to stderr)
     logging.basicConfig(
@@ -86,7 +118,7 @@ def cli(ctx, log_level, config_path, db):
     logging.getLogger('swisstext.cmd.scraping.tools.pattern_sentence_filter').setLevel(level=logging.WARNING)
 
     # instantiate configuration and global variables
-    ctx.obj = GlobalOptions(config_path, gen_seeds, db)
+    ctx.obj = GlobalOptions(config_path, gen_seeds, db, engine, frontier)
 
 
 # ============== available commands
@@ -219,7 +251,7 @@ def crawl_mongo(ctx, num_urls, what, how):
                 logger.error(f"URL {u['url']} not enqueued.")
 
     logger.info("Enqueued %d URLs from Mongo" % ctx.queue.unfinished_tasks)
-    _scrape(ctx.config, ctx.queue, ctx.pipeline)
+    _scrape(ctx.config, ctx.queue, ctx.pipeline, ctx.worker_cls)
 
 
 @cli.command('from_file')
@@ -238,7 +270,23 @@ def crawl_from_file(ctx, urlfile):
             _enqueue(ctx, u)
 
     logger.info(f'enqueued {ctx.queue.unfinished_tasks}/{i + 1} URLs from {urlfile.name}.')
-    _scrape(ctx.config, ctx.queue, ctx.pipeline)
+    _scrape(ctx.config, ctx.queue, ctx.pipeline, ctx.worker_cls)
+
+
+@cli.command('resume')
+@click.pass_obj
+def resume(ctx):
+    """
+    Resume an interrupted crawl.
+
+    This script runs the scraping pipeline on the pages left in the frontier (see the --frontier option),
+    i.e. pages that were enqueued but not processed during the previous runs, with their original depth.
+    """
+    if not ctx.config.options.frontier:
+        raise click.UsageError('resume requires a frontier: use --frontier or set options.frontier in the config.')
+    ctx.resume = True
+    logger.info(f'{ctx.queue.unfinished_tasks} URLs pending in {ctx.config.options.frontier}')
+    _scrape(ctx.config, ctx.queue, ctx.pipeline, ctx.worker_cls)
 
 
 # ============== main methods
@@ -251,31 +299,54 @@ def _enqueue(ctx, url, **kwargs) -> bool:
     return False
 
 
-def _scrape(config, queue, pipeline, worker_cls=PipelineWorker):
-    # stop right away if nothing to scrape
-    if queue.empty():
-        print('Nothing to scrape.')
-        return
-
-    # do the magic
-    logger.info('Using config:\n' + config.dumps())
+def _run_pipeline(config, worker_cls, args, scheduler, pipeline):
+    # run the workers until the queue is empty, using the analysis pool or the batch detector if configured
+    if config.options.num_processes > 0:
+        # run the CPU-bound stages in pre-warmed processes, workers only handle the I/O
+        from .analysis_pool import AnalysisPool
+        with AnalysisPool(config, max_workers=config.options.num_processes) as analysis_pool:
+            _run_workers(config, worker_cls, args, scheduler, analysis_pool)
+    elif config.options.detector_batch_size > 0:
+        # detect the sentences of concurrent pages in batches
+        from .batch_detector import BatchDetector
+        detector = pipeline.detector
+        pipeline.detector = BatchDetector(detector, max_batch_size=config.options.detector_batch_size,
+                                          max_wait=config.options.detector_max_wait)
+        try:
+            _run_workers(config, worker_cls, args, scheduler)
+        finally:
+            pipeline.detector.close()
+            pipeline.detector.log_stats()
+            pipeline.detector = detector
+    else:
+        _run_workers(config, worker_cls, args, scheduler)
 
-    import time
-    start = time.time()
 
-    MAX_DEPTH = config.options.crawl_depth
+def _run_workers(config, worker_cls, args, scheduler, analysis_pool=None):
+    # launch multiple workers
     NUM_WORKERS = config.options.num_workers
 
-    new_sentences: List[str] = []
-    args = (queue, pipeline, new_sentences, MAX_DEPTH)  # what to pass to the PipelineWorker's run method
+    if issubclass(worker_cls, AsyncPipelineWorker):
+        # one worker is enough: pages are processed concurrently on an event loop
+        from concurrent.futures import ThreadPoolExecutor
+        with ThreadPoolExecutor(max_workers=NUM_WORKERS, thread_name_prefix='cpu') as cpu_executor:
+            worker = worker_cls(max_concurrency=config.options.max_concurrency, cpu_executor=cpu_executor,
+                                analysis_pool=analysis_pool, scheduler=scheduler)
 
-    # launch multiple workers
-    # TODO: use https://docs.python.org/3/library/concurrent.futures.html#processpoolexecutor instead ?
-    if NUM_WORKERS > 1:
-        # use multiple threads
+            import signal
+            def handler(signum, frame):
+                print("Ctrl-c received! Finishing pages in progress... Press again to force stop.")
+                worker.kill_received = True
+                signal.signal(signal.SIGINT, signal.default_int_handler)
+
+            signal.signal(signal.SIGINT, handler)
+            worker.run(*args)
+
+    elif NUM_WORKERS > 1:
+        # use multiple threads: the scheduler keeps them alive until all the work is done
         threads = []
-        for i in range(min(NUM_WORKERS, queue.unfinished_tasks)):
-            worker = worker_cls(i)
+        for i in range(NUM_WORKERS):
+            worker = worker_cls(i, analysis_pool=analysis_pool, scheduler=scheduler)
             t = threading.Thread(target=worker.run, args=args)
             t.start()
             threads.append((worker, t))
@@ -297,28 +368,63 @@ def _scrape(config, queue, pipeline, worker_cls=PipelineWorker):
 
     else:
         # only one worker -> don't bother with threads
-        worker = worker_cls()
+        worker = worker_cls(analysis_pool=analysis_pool, scheduler=scheduler)
         try:
             worker.run(*args)
         except KeyboardInterrupt:
             print('Interrupt received. Cleaning up...')
             pass
 
-    logger.info("Found %d new sentences." % len(new_sentences))
-
-    logger.debug('Saving non-scraped pages for later.')
-    saved_urls = 0
-    while not queue.empty():
-        page, _ = queue.get()
-        if page.parent_url is not None:
-            try:
-                # parent is None for initial URLs
-                pipeline.saver.save_url(page.url, page.parent_url)
-                saved_urls += 1
-            except:
-                logger.exception(f'Failed to save {page.url} for later.')
-        queue.task_done()
-    logger.info('Saved {} for later.'.format(saved_urls))
+
+def _scrape(config, queue, pipeline, worker_cls=PipelineWorker):
+    # stop right away if nothing to scrape
+    if queue.empty():
+        print('Nothing to scrape.')
+        queue.close()
+        return
+
+    # do the magic
+    logger.info('Using config:\n' + config.dumps())
+
+    import time
+    start = time.time()
+
+    MAX_DEPTH = config.options.crawl_depth
+
+    new_sentences: List[str] = []
+    args = (queue, pipeline, new_sentences, MAX_DEPTH)  # what to pass to the PipelineWorker's run method
+    scheduler = Scheduler(queue, MAX_DEPTH)  # shared by all workers
+
+    try:
+        _run_pipeline(config, worker_cls, args, scheduler, pipeline)
+
+        logger.info("Found %d new sentences." % len(new_sentences))
+        scheduler.log_stats()
+        pipeline.crawler.log_stats()
+        if isinstance(pipeline.detector, CachedDetector):
+            pipeline.detector.log_stats()
+
+        logger.debug('Saving non-scraped pages for later.')
+        saved_urls = 0
+        pending = scheduler.leftovers
+        if queue.persistent and not scheduler.is_done():
+            # interrupted: keep the pages in the frontier, the next run will pick them up
+            logger.info(f'{queue.qsize()} pages left in the frontier, use st_scrape resume to continue.')
+        else:
+            pending = pending + queue.drain()
+        for page, _ in pending:
+            if page.parent_url is not None:
+                try:
+                    # parent is None for initial URLs
+                    pipeline.saver.save_url(page.url, page.parent_url)
+                    saved_urls += 1
+                except:
+                    logger.exception(f'Failed to save {page.url} for later.')
+        logger.info('Saved {} for later.'.format(saved_urls))
+    finally:
+        # persist what the saver may have buffered (see BulkMongoSaver, AsyncMongoSaver): nothing can be saved after
+        pipeline.saver.close()
+        queue.close()
 
     stop = time.time()
     print("Done. It took {} seconds.".format(stop - start))
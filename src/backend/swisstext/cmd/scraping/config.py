@@ -1,5 +1,5 @@
 from io import IOBase
-from typing import Optional, List, Union
+from typing import Optional, List, Union, Dict
 
 from .interfaces import ISaver
 from .pipeline import Pipeline
@@ -28,10 +28,26 @@ class Config(BaseConfig):
     class Options:
         """Holds the general options for the scraping pipeline."""
 
-        def __init__(self, num_workers=1, min_proba=0.85, crawl_depth=2, **kwargs):
+        def __init__(self, num_workers=1, min_proba=0.85, crawl_depth=2, max_concurrency=100, num_processes=0,
+                     host_queue=False, max_per_host=2, min_host_delay=1., frontier=None,
+                     detector_batch_size=0, detector_max_wait=.05, **kwargs):
             # do some checks first
             if num_workers < 0:
                 raise Exception('Wrong value for argument num_workers: should be > 0')
+            if max_concurrency < 1:
+                raise Exception('Wrong value for argument max_concurrency: should be > 0')
+            if num_processes < 0:
+                raise Exception('Wrong value for argument num_processes: should be >= 0')
+            if max_per_host < 1:
+                raise Exception('Wrong value for argument max_per_host: should be > 0')
+            if min_host_delay < 0:
+                raise Exception('Wrong value for argument min_host_delay: should be >= 0')
+            if host_queue and frontier:
+                raise Exception('Options host_queue and frontier are mutually exclusive')
+            if detector_batch_size < 0:
+                raise Exception('Wrong value for argument detector_batch_size: should be >= 0')
+            if detector_max_wait < 0:
+                raise Exception('Wrong value for argument detector_max_wait: should be >= 0')
             if not 0 <= min_proba <= 1:
                 raise Exception('Wrong value for argument min_proba: should be between 0 and 1')
             if crawl_depth < 0:
@@ -40,6 +56,15 @@ class Config(BaseConfig):
             self.num_workers = num_workers  #: maximum number of threads to use
             self.min_proba = min_proba  #: minimum Swiss German probability to keep a sentence
             self.crawl_depth = crawl_depth  #: maximum depth of the crawl, inclusive.
+            self.max_concurrency = max_concurrency  #: maximum number of pages processed at once (async engine)
+            self.num_processes = num_processes  #: if > 0, number of processes for the CPU-bound stages
+            self.host_queue = host_queue  #: if set, use a :py:class:`~swisstext.cmd.scraping.host_queue.HostQueue`
+            self.max_per_host = max_per_host  #: maximum number of pages of the same host processed at once
+            self.min_host_delay = min_host_delay  #: minimum delay between two pages of the same host (seconds)
+            self.frontier = frontier  #: if set, path to a SQLite file holding the queue, to resume interrupted crawls
+            #: if > 0, sentences of concurrent pages are sent to the Swiss German detector in batches of this size
+            self.detector_batch_size = detector_batch_size
+            self.detector_max_wait = detector_max_wait  #: maximum time a page waits for the batch to fill (seconds)
 
     def __init__(self, config: Union[str, dict, IOBase] = None):
         super().__init__(self._get_relative_path(__file__), Config.Options, config)
@@ -56,6 +81,26 @@ class Config(BaseConfig):
     def tool_entry_name(self) -> str:
         return 'pipeline'
 
+    def instantiate_tool(self, e: str, arguments: Optional[Dict] = None) -> object:
+        """
+        Create an instance of one tool, see :py:meth:`~swisstext.cmd.base_config.BaseConfig.instantiate_tool`.
+
+        If ``sg_detector_options`` has a ``cache_size`` > 0, the Swiss German detector is wrapped into a
+        :py:class:`~swisstext.cmd.scraping.cached_detector.CachedDetector` holding that many sentences.
+        """
+        if e != 'sg_detector' or arguments is not None:
+            return super().instantiate_tool(e, arguments)
+
+        arguments = dict(self.conf.get('sg_detector_options') or {})
+        cache_size = arguments.pop('cache_size', 0)  # not an argument of the detector
+        if cache_size < 0:
+            raise Exception('Wrong value for sg_detector_options.cache_size: should be >= 0')
+        detector = super().instantiate_tool(e, arguments)
+        if cache_size > 0:
+            from .cached_detector import CachedDetector
+            detector = CachedDetector(detector, max_size=cache_size)
+        return detector
+
     def create_pipeline(self) -> Pipeline:
         """
         Instantiate a pipeline from the YAML configuration.
@@ -47,6 +47,9 @@ class Page:
         self.sentence_count = 0  #: total number of sentences on the page
         self.sg_count = 0  #: number of Swiss German sentences on the page, wether they are new or not
         self.score: PageScore = score or PageScore()  #: page score
+        self.etag = None  #: the HTTP ETag returned on the last visit, if known
+        self.last_modified = None  #: the HTTP Last-Modified returned on the last visit, if known
+        self.text_hash = None  #: hash of the raw text found on the last visit, if known (depends on the saver)
 
     def is_new(self) -> bool:
         """Test if the page is new or not, based on the :py:attr:`delta_date`."""
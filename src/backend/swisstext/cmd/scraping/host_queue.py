@@ -0,0 +1,162 @@
+"""
+This module contains a drop-in replacement for the :py:class:`~swisstext.cmd.scraping.page_queue.PageQueue`
+that is polite towards the crawled websites.
+
+Pages are partitioned by host (i.e. the netloc of the URL), with one FIFO sub-queue per host.
+Hosts are visited in a round-robin fashion, so that a website yielding hundreds of child URLs doesn't starve the
+others. Moreover, a page is returned by :py:meth:`HostQueue.get` only if:
+
+* less than :py:attr:`HostQueue.max_per_host` pages of the same host are being processed, and
+* the last page of the same host was pulled at least :py:attr:`HostQueue.min_delay` seconds ago.
+
+Running many workers thus increases the number of hosts crawled in parallel, not the load on a given host.
+
+.. note::
+
+    The queue knows a page is processed when :py:meth:`HostQueue.release` is called, which the
+    :py:class:`~swisstext.cmd.scraping.scheduler.Scheduler` does automatically.
+"""
+
+import time
+from collections import deque
+from queue import Empty
+from typing import Deque, Dict, List, Optional, Tuple
+from urllib.parse import urlparse
+
+from .data import Page
+from .page_queue import PageQueue
+
+
+class HostQueue(PageQueue):
+    """
+    A :py:class:`~swisstext.cmd.scraping.page_queue.PageQueue` with one sub-queue per host, enforcing a
+    per-host concurrency and a minimum delay between two pages of the same host.
+
+    Note that :py:meth:`~queue.Queue.qsize` and :py:meth:`~queue.Queue.empty` take into account all the pages
+    in the queue, while :py:meth:`get` only returns pages fulfilling the constraints (and blocks otherwise).
+    """
+
+    def __init__(self, maxsize=0, max_per_host=2, min_delay=1.):
+        """
+        :param maxsize: see :py:class:`~queue.Queue`
+        :param max_per_host: maximum number of pages of the same host processed at the same time
+        :param min_delay: minimum delay between two pages of the same host, in seconds
+        """
+        if max_per_host < 1:
+            raise ValueError('max_per_host should be > 0')
+        self.max_per_host = max_per_host  #: maximum number of pages of the same host processed at the same time
+        self.min_delay = min_delay  #: minimum delay between two pages of the same host, in seconds
+        super().__init__(maxsize)
+
+    def _init(self, maxsize):
+        super()._init(maxsize)
+        self._hosts: Dict[str, Deque[Tuple[Page, int]]] = dict()  # host => tasks
+        self._ring: Deque[str] = deque()  # round-robin on hosts with pending tasks
+        self._active: Dict[str, int] = dict()  # host => pages being processed
+        self._last_get: Dict[str, float] = dict()  # host => time of the last get (while it matters)
+        self._next_purge = 0.  # next time the expired entries of _last_get are removed
+        self._size = 0
+
+    def _qsize(self):
+        return self._size
+
+    def _put(self, task):
+        host = self.get_host(task[0].url)
+        if host not in self._hosts:
+            self._hosts[host] = deque()
+            self._ring.append(host)
+        self._hosts[host].append(task)
+        self._size += 1
+
+    def _get(self):
+        # ignore the constraints, only used by drain
+        host = self._ring.popleft()
+        tasks = self._hosts[host]
+        task = tasks.popleft()
+        if tasks:
+            self._ring.append(host)
+        else:
+            del self._hosts[host]
+        self._size -= 1
+        return task
+
+    def get(self, block=True, timeout=None) -> Tuple[Page, int]:
+        """
+        Remove and return the next task (page, depth) available, in a round-robin fashion across hosts.
+        See :py:meth:`queue.Queue.get` for the meaning of the arguments.
+        """
+        with self.not_empty:
+            end = None if timeout is None else time.time() + timeout
+            while True:
+                task, wait = self._get_available()
+                if task is not None:
+                    self.not_full.notify()
+                    return task
+                if not block:
+                    raise Empty
+                if end is not None:
+                    remaining = end - time.time()
+                    if remaining <= 0:
+                        raise Empty
+                    wait = remaining if wait is None else min(wait, remaining)
+                self.not_empty.wait(wait)
+
+    def release(self, page: Page):
+        """Free a slot for the host of the page, see :py:attr:`max_per_host`."""
+        host = self.get_host(page.url)
+        with self.not_empty:
+            if self._active.get(host, 0) > 1:
+                self._active[host] -= 1
+            else:
+                self._active.pop(host, None)  # don't keep track of all the hosts ever crawled
+            self._purge_last_get(time.time())
+            self.not_empty.notify()
+
+    def _get_available(self) -> Tuple[Optional[Tuple[Page, int]], Optional[float]]:
+        # Return (task, None) if a task is available, else (None, time to wait before the next available task).
+        # The time is None if we need to wait for a page to be released.
+        now = time.time()
+        self._purge_last_get(now)
+        wait = None
+        for _ in range(len(self._ring)):
+            host = self._ring[0]
+            self._ring.rotate(-1)  # the host is now at the end of the ring
+
+            if self._active.get(host, 0) >= self.max_per_host:
+                continue
+            ready_in = self._last_get.get(host, 0) + self.min_delay - now
+            if ready_in > 0:
+                wait = ready_in if wait is None else min(wait, ready_in)
+                continue
+
+            tasks = self._hosts[host]
+            task = tasks.popleft()
+            if not tasks:
+                del self._hosts[host]
+                self._ring.pop()
+            self._active[host] = self._active.get(host, 0) + 1
+            self._last_get[host] = now
+            self._size -= 1
+            return task, None
+
+        return None, wait
+
+    def _purge_last_get(self, now: float):
+        # forget the hosts without pending tasks whose delay has passed, at most once per min_delay
+        if now < self._next_purge:
+            return
+        self._next_purge = now + self.min_delay
+        expired = [host for host, t in self._last_get.items()
+                   if t + self.min_delay <= now and host not in self._hosts]
+        for host in expired:
+            del self._last_get[host]
+
+    def hosts(self) -> List[str]:
+        """Hosts with tasks in the queue."""
+        with self.mutex:
+            return list(self._ring)
+
+    @staticmethod
+    def get_host(url: str) -> str:
+        """Get the host of a URL, i.e. the netloc part (lowercase)."""
+        return urlparse(url).netloc.lower()
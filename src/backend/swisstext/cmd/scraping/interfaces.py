@@ -6,7 +6,7 @@ See the :py:mod:`swisstext.cmd.scraping.tools` module for implementations.
 """
 
 from abc import abstractmethod, ABC
-from typing import List, Optional, Set
+from typing import Iterable, Iterator, List, Optional, Set
 
 from .data import Page
 
@@ -34,7 +34,8 @@ class ICrawler(ABC):
     class CrawlResults:
         """Holds the results of a page crawl."""
 
-        def __init__(self, text: str, links: List[str]):
+        def __init__(self, text: str, links: List[str], etag: str = None, last_modified: str = None,
+                     not_modified=False):
             self.text: str = text
             """the clean text found in the page, free of any structural marker such as HTML tags, etc."""
             self.links: List[str] = links
@@ -44,17 +45,43 @@ class ICrawler(ABC):
             * if possible, no link pointing to unparseable resources (zip files, images, etc.)
             The method :py:meth:`swisstext.cmd.link_utils.filter_links` is available to do the filtering. 
             """
+            self.etag: Optional[str] = etag
+            """The HTTP ETag header of the response, if any."""
+            self.last_modified: Optional[str] = last_modified
+            """The HTTP Last-Modified header of the response, if any."""
+            self.not_modified: bool = not_modified
+            """True if the page didn't change since the last visit (HTTP 304), in which case text and links are empty."""
 
         @classmethod
         def empty(cls):
             return cls(text='', links=[])
 
+        @classmethod
+        def unchanged(cls, etag: str = None, last_modified: str = None):
+            return cls(text='', links=[], etag=etag, last_modified=last_modified, not_modified=True)
+
     @abstractmethod
     def crawl(self, url: str) -> CrawlResults:
         """[ABSTRACT]
         Should crawl the page and extract the text and the links into a :py:class:`ICrawler.CrawlResults` instance."""
         pass
 
+    def crawl_page(self, page: Page) -> CrawlResults:
+        """
+        Crawl a page, possibly using information from the previous visit. This is what the pipeline calls.
+
+        Subclasses supporting conditional requests should send the validators of the last visit
+        (:py:attr:`~swisstext.cmd.scraping.data.Page.etag` and
+        :py:attr:`~swisstext.cmd.scraping.data.Page.last_modified`) and return
+        :py:meth:`ICrawler.CrawlResults.unchanged` if the server answers "304 Not Modified".
+        The default implementation just calls :py:meth:`crawl`.
+        """
+        return self.crawl(page.url)
+
+    def log_stats(self):
+        """Log statistics about the pages crawled so far (called at the end of a run). Does nothing by default."""
+        pass
+
 
 class INormalizer:
     """
@@ -86,6 +113,14 @@ class ISplitter:
         """Takes a list of texts and returns a list of sentences (see :py:meth:`split`)."""
         return [splitted for t in texts for splitted in self.split(t)]
 
+    def iter_split(self, text: str) -> Iterator[str]:
+        """
+        Same as :py:meth:`split`, but yield the sentences one by one. This is what the pipeline calls.
+        The default implementation just iterates over :py:meth:`split`: override it to avoid building the list
+        of all the sentences of a [long] text.
+        """
+        yield from self.split(text)
+
 
 class IUrlFilter:
     """
@@ -123,6 +158,12 @@ class ISentenceFilter:
         """Filter a list of sentences by calling :py:meth:`ISentenceFilter.is_valid` on each element."""
         return [s for s in sentences if self.is_valid(s)]
 
+    def iter_filter(self, sentences: Iterable[str]) -> Iterator[str]:
+        """
+        Same as :py:meth:`filter`, but consume and yield the sentences one by one. This is what the pipeline calls.
+        """
+        return (s for s in sentences if self.is_valid(s))
+
 
 class ISgDetector:
     """
@@ -230,6 +271,14 @@ class ISaver(ABC):
         """
         pass
 
+    def urls_blacklisted(self, urls: List[str]) -> List[bool]:
+        """
+        Same as :py:meth:`is_url_blacklisted`, but for a list of URLs (in order). Savers backed by a database
+        should override it to check all the URLs with a single query.
+        The default implementation calls :py:meth:`is_url_blacklisted` on each URL.
+        """
+        return [self.is_url_blacklisted(url) for url in urls]
+
     @abstractmethod
     def save_url(self, url: str, parent: str = None):
         """
@@ -249,6 +298,14 @@ class ISaver(ABC):
         """
         pass
 
+    def sentences_exist(self, sentences: List[str]) -> List[bool]:
+        """
+        Same as :py:meth:`sentence_exists`, but for a list of sentences (in order). Savers backed by a database
+        should override it to check all the sentences with a single query.
+        The default implementation calls :py:meth:`sentence_exists` on each sentence.
+        """
+        return [self.sentence_exists(s) for s in sentences]
+
     @abstractmethod
     def save_page(self, page: Page):
         """
@@ -258,6 +315,23 @@ class ISaver(ABC):
         """
         pass
 
+    def is_page_unchanged(self, page: Page) -> bool:
+        """
+        Tells if the raw text of a page (``page.crawl_results.text``) is the same as on the last visit.
+        If so, the page is not analysed again (see :py:meth:`save_unchanged_page`).
+        The default implementation always returns False.
+        """
+        return False
+
+    def save_unchanged_page(self, page: Page):
+        """
+        Record a visit to a page that didn't change since the last visit, either because the server answered
+        "304 Not Modified" or because :py:meth:`is_page_unchanged` returned true.
+        In this case, the page was not analysed, so only the URL and ``page.crawl_results`` are meaningful.
+        The default implementation does nothing.
+        """
+        pass
+
     @abstractmethod
     def get_page(self, url: str, **kwargs) -> Page:
         """
@@ -267,6 +341,13 @@ class ISaver(ABC):
         """
         pass
 
+    def get_pages(self, urls: List[str], **kwargs) -> List[Page]:
+        """
+        Same as :py:meth:`get_page`, but for a list of URLs (in order). The ``kwargs`` are passed to all the pages.
+        The default implementation calls :py:meth:`get_page` on each URL.
+        """
+        return [self.get_page(url, **kwargs) for url in urls]
+
     @abstractmethod
     def save_seed(self, seed: str):
         """
@@ -278,3 +359,10 @@ class ISaver(ABC):
         """Persist multiple seeds (see :py:meth:`save_seed`)."""
         for seed in seeds:
             self.save_seed(seed)
+
+    def close(self):
+        """
+        Called once the workers are done (or interrupted). Savers buffering writes should persist everything
+        at this point. The default implementation does nothing.
+        """
+        pass
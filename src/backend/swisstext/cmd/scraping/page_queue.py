@@ -1,7 +1,7 @@
 import logging
 from queue import Queue
 from threading import Lock
-from typing import Set
+from typing import List, Set, Tuple
 
 from .data import Page
 
@@ -27,24 +27,60 @@ class PageQueue(Queue):
 
     lock = Lock()
 
+    #: whether the tasks left in the queue survive the process (see :py:meth:`drain`)
+    persistent = False
+
     def _init(self, maxsize):
         super()._init(maxsize)
         self.uniq: Set[Page] = set()
 
-    def _put(self, tup):
+    def put(self, tup, block=True, timeout=None):
+        """
+        Put a tuple (page, depth) in the queue, unless the page URL was already enqueued.
+        Duplicates are ignored here (not in :py:meth:`_put`) so that they don't increment
+        :py:attr:`~queue.Queue.unfinished_tasks`.
+        """
+        page, depth = self._as_task(tup)
+        url = page.url
+        with self.lock:  # better safe than sorry...
+            if url in self.uniq:
+                return
+            self.uniq.add(url)
+        super().put((page, depth), block, timeout)
+
+    @staticmethod
+    def _as_task(tup) -> Tuple[Page, int]:
         if type(tup) is Page:
-            page, depth = tup, 1
             logger.warning(f"The element to enqueue is missing depth information: '${tup}'. Set depth to 1.")
-        else:
-            assert type(tup) is tuple
-            page, depth = tup
-            assert isinstance(page, Page)
+            return tup, 1
+        assert type(tup) is tuple
+        page, depth = tup
+        assert isinstance(page, Page)
+        return page, depth
 
-        url = page.url
-        try:
-            self.lock.acquire() # better safe than sorry...
-            if url not in self.uniq:
-                self.uniq.add(url)
-                super()._put((page, depth))
-        finally:
-            self.lock.release()
+    def release(self, page: Page):
+        """
+        Called (by the :py:class:`~swisstext.cmd.scraping.scheduler.Scheduler`) once a page pulled from
+        the queue has been processed, just before :py:meth:`~queue.Queue.task_done`.
+        This does nothing by default, but subclasses may use it to enforce scheduling constraints.
+        """
+        pass
+
+    def close(self):
+        """Release the resources held by the queue, if any. Called at the end of the crawl."""
+        pass
+
+    def drain(self) -> List[Tuple[Page, int]]:
+        """
+        Remove and return all the tasks left in the queue, ignoring any scheduling constraint.
+        Each task removed is marked as done.
+        """
+        tasks = []
+        with self.mutex:
+            while self._qsize():
+                tasks.append(self._get())
+            self.unfinished_tasks -= len(tasks)
+            if self.unfinished_tasks <= 0:
+                self.all_tasks_done.notify_all()
+            self.not_full.notify_all()
+        return tasks
@@ -44,17 +44,20 @@ Here is an example usage.
     What should we do when an error occurs during download ? Should an inaccessible page be blacklisted ?
 """
 
+import asyncio
 import logging
-from queue import Queue, Empty
+import time
+from concurrent.futures import Executor, ThreadPoolExecutor
+from queue import Queue
+from typing import Tuple
 
 from .interfaces import *
+from .batch_detector import BatchDetector
 from .data import Sentence
+from .scheduler import Scheduler, POLL_INTERVAL
 
 logger = logging.getLogger(__name__)
 
-GET_TIMEOUT = 60 * 3  # in seconds
-
-
 class Pipeline:
     """
     Holds instances of all needed interfaces and variables.
@@ -91,9 +94,19 @@ class PipelineWorker():
     Pipeline workers actually do the magic and can be run in parallel.
     """
 
-    def __init__(self, id=-1):
+    def __init__(self, id=-1, analysis_pool=None, scheduler: Scheduler = None):
         self.id = id
         """an identifier used in log messages, especially useful if multiple threads are used."""
+        self.scheduler = scheduler
+        """
+        The :py:class:`~swisstext.cmd.scraping.scheduler.Scheduler` distributing tasks, which must be shared by
+        all the workers. If None, it is created when calling :py:meth:`run`.
+        """
+        self.analysis_pool = analysis_pool
+        """
+        An optional :py:class:`~swisstext.cmd.scraping.analysis_pool.AnalysisPool`. If set, the CPU-bound stages
+        (see :py:meth:`_analyse`) are run in the pool's processes instead of the current thread.
+        """
         self.kill_received = False
         """
         If the worker is launched in a thread, you can use this flag to make it exit prematurely.
@@ -103,7 +116,18 @@ class PipelineWorker():
 
     def _crawl_page(self, crawler: ICrawler, page: Page):
         """ Override in case we need page information to crawl """
-        return crawler.crawl(page.url)
+        return crawler.crawl_page(page)
+
+    def _is_unchanged(self, p: Pipeline, page: Page) -> bool:
+        """
+        Check if the page crawled is the same as on the last visit. If so, record the visit
+        and return true: the other stages of the pipeline should be skipped.
+        """
+        if page.crawl_results.not_modified or p.saver.is_page_unchanged(page):
+            logger.debug(f'W[{self.id}]: {page.url} unchanged since the last visit')
+            p.saver.save_unchanged_page(page)
+            return True
+        return False
 
     def run(self, queue: Queue, p: Pipeline, new_sentences: List[str], max_depth=1):
         """
@@ -122,24 +146,18 @@ class PipelineWorker():
 
         This method will stop:
 
-        * when the queue is empty or
+        * when the queue is empty and no other worker is processing a page (see
+          :py:class:`~swisstext.cmd.scraping.scheduler.Scheduler`), or
         * if the :py:attr:`kill_received` is set to true. In this case, it finishes processing the current task and exit
 
+        Tasks with a depth > max_depth are not processed, but kept in the scheduler's ``leftovers``.
+
         .. warning::
 
             It is your responsibility to ensure that the URLs in the queue are not blacklisted.
 
         .. todo::
 
-            This piece of code (and the commandline) has many flaws and should clearly be enhanced... For example:
-
-            **Multithreading**: currently, the worker stops when the queue is empty. This also means that if
-            you launch the system with only 3 base urls but 5 workers, 2 workers will exit immediately instead
-            of waiting for new tasks to be added to the queue.
-
-            A better way would be to keep track of active workers and stop only when all workers are idle, or
-            when all workers reached a task with a depth > max depth...
-
             **Comportement on errors**: in case fetching the URL triggers an error, we currently just log the thing.
             Should we also remove/blacklist the URL ? Should we allow the URL to fail X times before removal ?
 
@@ -148,82 +166,234 @@ class PipelineWorker():
         :param new_sentences: all new sentences discovered will be added to this list
         :param max_depth: when do we stop (inclusive)
         """
-        while not queue.empty():
-
-            if self.kill_received:
-                logger.info(f'W[{self.id}]: Kill received, stopping.')
-                return
+        if self.scheduler is None:
+            self.scheduler = Scheduler(queue, max_depth)
 
-            try:
-                (page, page_depth) = queue.get(timeout=GET_TIMEOUT)  # blocking !!
-            except Empty:
-                logger.error(f'W[{self.id}]: Empty exception was raised.')
+        while True:
+            task = self.scheduler.next_task(self)
+            if task is None:
                 break
+            (page, page_depth) = task
+            start = time.time()
 
             logger.debug(f'W[{self.id}]: processing {page.url} (depth={page_depth})')
-            if page_depth > max_depth:
-                logger.info(
-                    f'W[{self.id}]: reached max depth for recursive scraping (still {queue.qsize()} links in queue).')
-                break
 
             if p.decider.should_page_be_crawled(page):
                 try:
                     page.crawl_results = self._crawl_page(p.crawler, page)
-                    page.text = p.normalizer.normalize(page.crawl_results.text)
-                    splitted: List[str] = self._uniq(p.splitter.split(page.text))
-                    sentences: List[str] = p.filter.filter(splitted)
-
-                    page.sentence_count = 0  # count all the sentences found
-                    ns = []  # register new sentences here
-
-                    # TODO: change the detector interface to avoid zipping ?
-                    for (s, proba) in zip(sentences, p.detector.predict(sentences)):
-                        page.sentence_count += 1
-                        if proba >= p.min_proba:
-                            page.sg_count += 1
-                            if not p.saver.sentence_exists(s):
-                                ns.append(s)
-                                page.new_sg.append(Sentence(s, proba))
-
-                    # update the new_sentences just once (extend is atomic)
-                    if ns: new_sentences.extend(ns)
-
-                    if p.decider.should_url_be_blacklisted(page):
-                        logger.info(f'W[{self.id}]: blacklisting {page.url}')
-                        p.saver.blacklist_url(page.url)
-
-                    else:
-                        p.saver.save_page(page)
-                        if p.decider.should_children_be_crawled(page):
-                            added_children = 0
-                            links = p.url_filter.filter(page.crawl_results.links)
-                            for l in links:
-                                if not p.saver.is_url_blacklisted(l):
-                                    child_page = p.saver.get_page(l, parent_url=page.url)
-                                    # TODO redondant ?
-                                    if p.decider.should_page_be_crawled(child_page):
-                                        queue.put((child_page, page_depth + 1))
-                                        added_children += 1
-                            logger.info(f'W[{self.id}] {page.url}: added {added_children} child URLs')
-
+                    if not self._is_unchanged(p, page):
+                        page.text, predictions = self._analyse_page(p, page.crawl_results.text)
+                        self._register_sentences(p, page, predictions, new_sentences)
+                        self._persist_page(queue, p, page, page_depth)
                 except Exception as e:
-                    if isinstance(e, ICrawler.CrawlError):
-                        p.saver.blacklist_url(page.url, error_message=e.name)
-                        logger.info(f'W[{self.id}]: exception -- {e}. {page.url} blacklisted.')
-                    else:
-                        logger.exception(f'An error occurred while processing {page.url}')
+                    self._handle_error(p, page, e)
 
             else:
                 logger.debug(f'W[{self.id}]: skipped {page.url}')
 
-            queue.task_done()
+            self.scheduler.task_done(self, page, time.time() - start)
 
-        if self.id >= 0:
+        self.scheduler.worker_done(self)
+        if self.kill_received:
+            logger.info(f'W[{self.id}]: Kill received, stopping.')
+        elif self.id >= 0:
             logger.info(f'W[{self.id}]: my job is done.')
 
+    def _analyse_page(self, p: Pipeline, text: str) -> Tuple[str, List[Tuple[str, float]]]:
+        """Call :py:meth:`_analyse`, either directly or through the :py:attr:`analysis_pool`."""
+        if self.analysis_pool is not None:
+            return self.analysis_pool.analyse(text).result()
+        return self._analyse(p, text)
+
+    @classmethod
+    def _analyse(cls, p: Pipeline, text: str) -> Tuple[str, List[Tuple[str, float]]]:
+        """
+        Run the CPU-bound stages of the pipeline on the raw text of a page: normalize, split, filter and detect.
+        This method doesn't touch the persistence layer, so it is safe to call from any thread or executor.
+
+        :return: a tuple (normalized text, list of (sentence, Swiss German proba))
+        """
+        text, sentences = cls._prepare(p, text)
+        # TODO: change the detector interface to avoid zipping ?
+        return text, list(zip(sentences, p.detector.predict(sentences)))
+
+    @classmethod
+    def _prepare(cls, p: Pipeline, text: str) -> Tuple[str, List[str]]:
+        """
+        Run the stages of :py:meth:`_analyse` preceding the detection: normalize, split and filter.
+
+        :return: a tuple (normalized text, list of unique sentences)
+        """
+        text = p.normalizer.normalize(text)
+        # stream the sentences through dedup and filtering, only the valid ones are stored
+        return text, list(p.filter.iter_filter(cls._uniq(p.splitter.iter_split(text))))
+
+    def _register_sentences(self, p: Pipeline, page: Page, predictions: List[Tuple[str, float]],
+                            new_sentences: List[str]):
+        """Update the page counts and add the new Swiss German sentences to the page and to ``new_sentences``."""
+        page.sentence_count = len(predictions)  # count all the sentences found
+        sg = [(s, proba) for (s, proba) in predictions if proba >= p.min_proba]
+        page.sg_count += len(sg)
+        ns = []  # register new sentences here
+
+        # check the existence of all the Swiss German sentences at once
+        exist = p.saver.sentences_exist([s for (s, _) in sg]) if sg else []
+        for (s, proba), exists in zip(sg, exist):
+            if not exists:
+                ns.append(s)
+                page.new_sg.append(Sentence(s, proba))
+
+        # update the new_sentences just once (extend is atomic)
+        if ns: new_sentences.extend(ns)
+
+    def _persist_page(self, queue: Queue, p: Pipeline, page: Page, page_depth: int):
+        """Blacklist or save the page and enqueue the interesting child URLs."""
+        if p.decider.should_url_be_blacklisted(page):
+            logger.info(f'W[{self.id}]: blacklisting {page.url}')
+            p.saver.blacklist_url(page.url)
+
+        else:
+            p.saver.save_page(page)
+            if p.decider.should_children_be_crawled(page):
+                added_children = 0
+                links = list(p.url_filter.filter(page.crawl_results.links))
+                # batch the lookups: one call for the blacklist, one for loading the pages
+                links = [l for l, blacklisted in zip(links, p.saver.urls_blacklisted(links)) if not blacklisted]
+                for child_page in p.saver.get_pages(links, parent_url=page.url):
+                    # TODO redondant ?
+                    if p.decider.should_page_be_crawled(child_page):
+                        queue.put((child_page, page_depth + 1))
+                        added_children += 1
+                logger.info(f'W[{self.id}] {page.url}: added {added_children} child URLs')
+
+    def _handle_error(self, p: Pipeline, page: Page, e: Exception):
+        """Blacklist the page on crawl errors, log anything else."""
+        if isinstance(e, ICrawler.CrawlError):
+            p.saver.blacklist_url(page.url, error_message=e.name)
+            logger.info(f'W[{self.id}]: exception -- {e}. {page.url} blacklisted.')
+        else:
+            # pass the exception explicitly, as this may be called outside of the except block (executors)
+            logger.exception(f'An error occurred while processing {page.url}', exc_info=e)
+
     @staticmethod
     def _uniq(seq):
-        # remove duplicates from a list while preserving order
+        # remove duplicates from an iterable while preserving order (lazily)
         seen = set()
         seen_add = seen.add
-        return [x for x in seq if not (x in seen or seen_add(x))]
\ No newline at end of file
+        return (x for x in seq if not (x in seen or seen_add(x)))
+
+
+class AsyncPipelineWorker(PipelineWorker):
+    """
+    A pipeline worker running on an :py:mod:`asyncio` event loop, able to process hundreds of pages concurrently.
+
+    The tools are the same as for the :py:class:`PipelineWorker`, and their interfaces are blocking.
+    The event loop thus delegates the work to two executors:
+
+    * the I/O executor (a large thread pool) handles the crawl and the calls to the saver, so at most
+      :py:attr:`max_concurrency` pages are downloaded at the same time;
+    * the CPU executor handles the CPU-bound stages (normalize, split, filter, detect), see :py:meth:`_analyse`.
+      If the detector is a :py:class:`~swisstext.cmd.scraping.batch_detector.BatchDetector`, the detection is
+      awaited on the event loop instead, so the CPU threads don't sit idle while the batches fill up.
+
+    Contrary to the :py:class:`PipelineWorker`, there is usually no need to launch more than one instance.
+    """
+
+    def __init__(self, id=-1, max_concurrency=100, cpu_executor: Executor = None, analysis_pool=None,
+                 scheduler: Scheduler = None):
+        """
+        :param id: an identifier used in log messages
+        :param max_concurrency: maximum number of pages processed at the same time
+        :param cpu_executor: executor used for the CPU-bound stages. If None, a thread pool with one thread is used.
+        :param analysis_pool: if set, the CPU-bound stages are run in this pool instead of the cpu_executor
+        :param scheduler: the scheduler, see :py:attr:`PipelineWorker.scheduler`
+        """
+        super().__init__(id, analysis_pool, scheduler)
+        self.max_concurrency = max_concurrency  #: maximum number of pages processed at the same time
+        self.cpu_executor = cpu_executor  #: executor for the CPU-bound stages (lazy created if None)
+
+    def run(self, queue: Queue, p: Pipeline, new_sentences: List[str], max_depth=1):
+        """
+        Same as :py:meth:`PipelineWorker.run`, but pages are processed concurrently.
+        This method blocks until the work is done (see :py:meth:`run_async` for the coroutine).
+        """
+        cpu_executor = self.cpu_executor or ThreadPoolExecutor(max_workers=1, thread_name_prefix='cpu')
+        with ThreadPoolExecutor(max_workers=self.max_concurrency, thread_name_prefix='io') as io_executor:
+            loop = asyncio.new_event_loop()
+            try:
+                loop.run_until_complete(
+                    self.run_async(queue, p, new_sentences, max_depth, io_executor, cpu_executor))
+            finally:
+                loop.close()
+                if self.cpu_executor is None:
+                    cpu_executor.shutdown()
+
+    async def run_async(self, queue: Queue, p: Pipeline, new_sentences: List[str], max_depth: int,
+                        io_executor: Executor, cpu_executor: Executor):
+        """
+        Pull pages from the queue and process them concurrently, until:
+
+        * the queue is empty and all pages in progress are done, or
+        * :py:attr:`kill_received` is set (pages in progress are still finished).
+        """
+        if self.scheduler is None:
+            self.scheduler = Scheduler(queue, max_depth)
+        pending = set()
+
+        while True:
+            while len(pending) < self.max_concurrency:
+                task = self.scheduler.next_task(self, block=False)
+                if task is None:
+                    break
+                (page, page_depth) = task
+                pending.add(asyncio.ensure_future(self._process_async(
+                    queue, p, page, page_depth, new_sentences, io_executor, cpu_executor)))
+
+            if not pending:
+                if self.kill_received or self.scheduler.is_done():
+                    break
+                # tasks are left, but not available yet (e.g. politeness delay of a HostQueue)
+                await asyncio.sleep(POLL_INTERVAL)
+                continue
+            # wait for at least one page to finish (it may have added children to the queue)
+            # or for a task to become available
+            _, pending = await asyncio.wait(pending, timeout=POLL_INTERVAL, return_when=asyncio.FIRST_COMPLETED)
+
+        self.scheduler.worker_done(self)
+        if self.kill_received:
+            logger.info(f'W[{self.id}]: Kill received, stopping.')
+        logger.info(f'W[{self.id}]: my job is done.')
+
+    async def _process_async(self, queue: Queue, p: Pipeline, page: Page, page_depth: int, new_sentences: List[str],
+                             io_executor: Executor, cpu_executor: Executor):
+        logger.debug(f'W[{self.id}]: processing {page.url} (depth={page_depth})')
+        loop = asyncio.get_event_loop()
+        start = time.time()
+
+        if not p.decider.should_page_be_crawled(page):
+            logger.debug(f'W[{self.id}]: skipped {page.url}')
+            self.scheduler.task_done(self, page, 0)
+            return
+
+        try:
+            page.crawl_results = await loop.run_in_executor(io_executor, self._crawl_page, p.crawler, page)
+            if await loop.run_in_executor(io_executor, self._is_unchanged, p, page):
+                return  # the finally clause marks the task as done
+            if self.analysis_pool is not None:
+                page.text, predictions = await asyncio.wrap_future(
+                    self.analysis_pool.analyse(page.crawl_results.text))
+            elif isinstance(p.detector, BatchDetector):
+                # don't block a CPU thread while the batch fills up
+                page.text, sentences = await loop.run_in_executor(
+                    cpu_executor, self._prepare, p, page.crawl_results.text)
+                predictions = list(zip(sentences, await asyncio.wrap_future(p.detector.submit(sentences))))
+            else:
+                page.text, predictions = await loop.run_in_executor(
+                    cpu_executor, self._analyse, p, page.crawl_results.text)
+            await loop.run_in_executor(
+                io_executor, self._register_sentences, p, page, predictions, new_sentences)
+            await loop.run_in_executor(io_executor, self._persist_page, queue, p, page, page_depth)
+        except Exception as e:
+            await loop.run_in_executor(io_executor, self._handle_error, p, page, e)
+        finally:
+            self.scheduler.task_done(self, page, time.time() - start)
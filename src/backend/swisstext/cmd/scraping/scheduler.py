@@ -0,0 +1,141 @@
+"""
+This module contains the :py:class:`Scheduler`, which distributes the tasks of a queue between pipeline workers.
+
+Workers ask the scheduler for their next task and notify it when they are done. In between, they may add new tasks
+(child pages) to the queue. The scheduler thus only stops a worker when *the queue is drained and no other
+worker is processing a task*, i.e. when no new task can possibly appear. This ensures that every worker
+stays alive during the whole run, even if only a few seed URLs were enqueued at the beginning.
+
+Tasks with a depth above the maximum crawl depth are never returned: they are kept aside in
+:py:attr:`Scheduler.leftovers`, so they can be saved for later at the end of the run.
+
+Finally, the scheduler records statistics about each worker (see :py:class:`WorkerStats`).
+"""
+
+import logging
+import time
+from queue import Empty
+from threading import Lock
+from typing import Dict, List, Optional, Tuple
+
+from .data import Page
+from .page_queue import PageQueue
+
+logger = logging.getLogger(__name__)
+
+#: how long to wait for a task before checking again if the work is done (in seconds)
+POLL_INTERVAL = .5
+
+
+class WorkerStats:
+    """Utilization statistics of a worker."""
+
+    def __init__(self, id):
+        self.id = id  #: the worker identifier
+        self.pages = 0  #: number of tasks processed
+        self.busy_time = 0.  #: total time spent processing tasks, in seconds
+        self.start = time.time()  #: when the worker asked for its first task
+        self.end = None  #: when the worker exited, None if still running
+
+    @property
+    def elapsed(self) -> float:
+        """Total lifetime of the worker, in seconds."""
+        return (self.end or time.time()) - self.start
+
+    @property
+    def utilization(self) -> float:
+        """
+        Ratio between the time spent processing tasks and the worker lifetime.
+        For workers processing multiple tasks concurrently, this is the average number of tasks in progress.
+        """
+        return self.busy_time / self.elapsed if self.elapsed > 0 else 0.
+
+    def __str__(self):
+        return "W[%d]: %d pages, busy %.1fs/%.1fs (utilization=%.0f%%)" % (
+            self.id, self.pages, self.busy_time, self.elapsed, self.utilization * 100)
+
+
+class Scheduler:
+    """
+    Distributes tasks, i.e. tuples (page, depth), from a queue to the workers, keeping track of active workers.
+
+    The queue must be a :py:class:`~swisstext.cmd.scraping.page_queue.PageQueue` (or a subclass), as the
+    scheduler relies on :py:attr:`~queue.Queue.unfinished_tasks` to know if a task is still in progress.
+    """
+
+    def __init__(self, queue: PageQueue, max_depth: int):
+        """
+        :param queue: the task queue
+        :param max_depth: tasks with a depth > max_depth are never returned (see :py:attr:`leftovers`)
+        """
+        self.queue = queue  #: the task queue
+        self.max_depth = max_depth  #: maximum depth of a task (inclusive)
+        self.leftovers: List[Tuple[Page, int]] = []  #: tasks pulled from the queue that were above the max depth
+        self.stats: Dict[int, WorkerStats] = dict()  #: statistics, by worker id
+        self._lock = Lock()
+
+    def next_task(self, worker, block=True) -> Optional[Tuple[Page, int]]:
+        """
+        Get the next task for a worker.
+
+        :param worker: the :py:class:`~swisstext.cmd.scraping.pipeline.PipelineWorker` asking.
+            Its ``id`` is used for the statistics and its ``kill_received`` flag is honored while waiting.
+        :param block: if set, wait until a task is available or the work is done.
+            If unset, return None as soon as the queue is empty.
+        :return: a tuple (page, depth), or None if the worker should stop/there is no task available
+        """
+        self._get_stats(worker.id)  # the first call starts the clock
+        while not worker.kill_received:
+            try:
+                (page, page_depth) = self.queue.get(block=block, timeout=POLL_INTERVAL if block else None)
+            except Empty:
+                if not block or self.is_done():
+                    break
+                continue
+
+            if page_depth > self.max_depth:
+                # keep it for later, but don't stop here: other tasks may still be in range
+                with self._lock:
+                    self.leftovers.append((page, page_depth))
+                self.queue.release(page)
+                self.queue.task_done()
+                continue
+
+            return page, page_depth
+
+        return None
+
+    def task_done(self, worker, page: Page, busy_time: float):
+        """
+        Notify the scheduler that a task returned by :py:meth:`next_task` is finished.
+        This must be called *after* the children of the page were added to the queue.
+
+        :param worker: the worker
+        :param page: the page of the task
+        :param busy_time: the time spent on the task, in seconds
+        """
+        stats = self._get_stats(worker.id)
+        stats.pages += 1
+        stats.busy_time += busy_time
+        self.queue.release(page)
+        self.queue.task_done()
+
+    def worker_done(self, worker):
+        """Notify the scheduler that a worker exited."""
+        self._get_stats(worker.id).end = time.time()
+
+    def is_done(self) -> bool:
+        """Returns true if the queue is empty and no task is in progress."""
+        with self.queue.mutex:
+            return self.queue.unfinished_tasks == 0
+
+    def log_stats(self):
+        """Log the statistics of each worker."""
+        for stats in sorted(self.stats.values(), key=lambda s: s.id):
+            logger.info(str(stats))
+
+    def _get_stats(self, id) -> WorkerStats:
+        with self._lock:
+            if id not in self.stats:
+                self.stats[id] = WorkerStats(id)
+            return self.stats[id]
@@ -0,0 +1,153 @@
+"""
+This module contains a :py:class:`~swisstext.cmd.scraping.page_queue.PageQueue` backed by a SQLite database,
+i.e. a crawl frontier stored on disk.
+
+Every URL ever enqueued is recorded in the database, along with its depth, its parent URL, its score and its
+state (pending, in progress or done). This has two benefits:
+
+* the frontier (and the set of URLs already seen) is not limited by the RAM, so millions of URLs can be enqueued;
+* the frontier survives the process: if ``st_scrape`` crashes or is interrupted, the next run using the same
+  database file picks up the pending pages where it stopped (pages that were in progress are crawled again).
+
+The pages crawled by a previous run are only remembered when resuming (``resume=True``), so they are not crawled
+twice. Otherwise, they are forgotten on creation, so a new crawl can enqueue them again.
+
+The database is written in `WAL mode <https://www.sqlite.org/wal.html>`_ with ``synchronous=NORMAL``, so that each
+operation is committed without waiting for the disk: it is safe against a crash of the process, not of the machine.
+
+.. code-block:: python
+
+    queue = SqlitePageQueue('frontier.db', resume=True)
+    queue.put((saver.get_page(url), 1))
+    ...
+    queue.close()
+"""
+
+import logging
+import sqlite3
+from datetime import datetime
+from typing import List, Tuple
+
+from .data import Page, PageScore
+from .page_queue import PageQueue
+
+logger = logging.getLogger(__name__)
+
+# states of a URL in the frontier
+_PENDING, _IN_PROGRESS, _DONE = 0, 1, 2
+
+_SCHEMA = '''
+CREATE TABLE IF NOT EXISTS frontier (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    url TEXT NOT NULL UNIQUE,
+    depth INTEGER NOT NULL,
+    parent_url TEXT,
+    score_count INTEGER NOT NULL DEFAULT 0,
+    score_delta_count INTEGER NOT NULL DEFAULT 0,
+    score_delta_date TEXT,
+    state INTEGER NOT NULL DEFAULT 0
+);
+CREATE INDEX IF NOT EXISTS frontier_state ON frontier (state, id);
+'''
+
+
+class SqlitePageQueue(PageQueue):
+    """
+    A :py:class:`~swisstext.cmd.scraping.page_queue.PageQueue` persisting its tasks (page, depth) in a SQLite file.
+    Pages are returned in FIFO order. Pages already in the file (pending, in progress or done during this run,
+    or during the interrupted run if resuming) are never enqueued twice.
+
+    Upon creation, the pending pages of a previous run are put back in the queue, so :py:meth:`~queue.Queue.qsize`
+    and :py:attr:`~queue.Queue.unfinished_tasks` may be > 0 right away.
+
+    .. note::
+
+        The ``maxsize`` argument of :py:class:`~queue.Queue` is not supported: the whole point of this queue
+        is to be unbounded, hence :py:meth:`put` never blocks.
+    """
+
+    persistent = True
+
+    def __init__(self, path: str, resume=False):
+        """
+        :param path: path to the SQLite database, created if it doesn't exist
+        :param resume: if False, forget the pages crawled by the previous runs (the pending pages are kept)
+        """
+        self.path = path  #: path to the SQLite database
+        self.resume = resume  #: whether the pages crawled by the previous runs are remembered
+        super().__init__()
+        self.unfinished_tasks = self._size  # resume
+        if self._size:
+            logger.info(f'Resuming crawl: {self._size} pages pending in {path}.')
+
+    def _init(self, maxsize):
+        # don't call super(): the uniq set and the deque are replaced by the database
+        self._conn = sqlite3.connect(self.path, check_same_thread=False)  # access is guarded by self.mutex
+        self._conn.execute('PRAGMA journal_mode=WAL')
+        self._conn.execute('PRAGMA synchronous=NORMAL')
+        with self._conn:
+            self._conn.executescript(_SCHEMA)
+            # pages being processed when the last run stopped were not finished
+            self._conn.execute('UPDATE frontier SET state=? WHERE state=?', (_PENDING, _IN_PROGRESS))
+            if not self.resume:
+                # a new crawl: pages crawled by the previous runs may be crawled again
+                self._conn.execute('DELETE FROM frontier WHERE state=?', (_DONE,))
+        self._size = self._conn.execute('SELECT COUNT(*) FROM frontier WHERE state=?', (_PENDING,)).fetchone()[0]
+
+    def _qsize(self):
+        return self._size
+
+    def put(self, tup, block=True, timeout=None):
+        """
+        Put a tuple (page, depth) in the queue, unless the page URL is already in the database.
+        This never blocks, so the arguments *block* and *timeout* are ignored.
+        """
+        page, depth = self._as_task(tup)
+        score = page.score
+        delta_date = score.delta_date.isoformat() if score.delta_date is not None else None
+        with self.mutex:
+            with self._conn:
+                cursor = self._conn.execute(
+                    'INSERT OR IGNORE INTO frontier'
+                    ' (url, depth, parent_url, score_count, score_delta_count, score_delta_date)'
+                    ' VALUES (?, ?, ?, ?, ?, ?)',
+                    (page.url, depth, page.parent_url, score.count, score.delta_count, delta_date))
+            if cursor.rowcount == 0:
+                return  # duplicate
+            self._size += 1
+            self.unfinished_tasks += 1
+            self.not_empty.notify()
+
+    def _get(self) -> Tuple[Page, int]:
+        row = self._conn.execute(
+            'SELECT id, url, depth, parent_url, score_count, score_delta_count, score_delta_date'
+            ' FROM frontier WHERE state=? ORDER BY id LIMIT 1', (_PENDING,)).fetchone()
+        id, url, depth, parent_url, count, delta_count, delta_date = row
+        with self._conn:
+            self._conn.execute('UPDATE frontier SET state=? WHERE id=?', (_IN_PROGRESS, id))
+        self._size -= 1
+        if delta_date is not None:
+            delta_date = datetime.fromisoformat(delta_date)
+        return Page(url, score=PageScore(count, delta_count, delta_date), parent_url=parent_url), depth
+
+    def release(self, page: Page):
+        """Mark the page as done in the database: it won't be crawled again if the crawl is resumed."""
+        with self.mutex:
+            with self._conn:
+                self._conn.execute('UPDATE frontier SET state=? WHERE url=?', (_DONE, page.url))
+
+    def drain(self) -> List[Tuple[Page, int]]:
+        """
+        Remove and return all the pending tasks, marking them as done in the database.
+        The pages won't be crawled again if the crawl is resumed.
+        """
+        tasks = super().drain()
+        with self.mutex:
+            with self._conn:
+                self._conn.executemany('UPDATE frontier SET state=? WHERE url=?', ((_DONE, p.url) for p, _ in tasks))
+        return tasks
+
+    def close(self):
+        """Close the connection to the database."""
+        with self.mutex:
+            self._conn.close()
@@ -16,7 +16,7 @@ from .basic_decider import BasicDecider, OnlyNewDecider, OneNewSgDecider
 from .basic_seed_creator import BasicSeedCreator, IdfSeedCreator
 # crawlers
 from .bs_crawler import BsCrawler, CleverBsCrawler
-from .justext_crawler import JustextCrawler
+from .justext_crawler import JustextCrawler, LxmlJustextCrawler
 # normalizers
 from .norm_punc import Normalizer
 # splitters
@@ -27,6 +27,6 @@ from .punkt_splitter import PunktSplitter
 from .pattern_sentence_filter import PatternSentenceFilter
 # savers
 from .console_saver import ConsoleSaver
-from .mongo_saver import MongoSaver
+from .mongo_saver import MongoSaver, BulkMongoSaver, AsyncMongoSaver
 # language id
-from .swigspot_langid import SwigspotLangid
\ No newline at end of file
+from .swigspot_langid import SwigspotLangid, CompiledSwigspotLangid
\ No newline at end of file
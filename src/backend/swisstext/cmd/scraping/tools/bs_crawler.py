@@ -3,13 +3,18 @@ This module contains the implementation of a :py:class:`~swisstext.cmd.scraping.
 that uses BeautifulSoup to extract text and links.
 """
 import logging
-from typing import Generator, Tuple
+from typing import Generator, List, Tuple
 
+import lxml.etree
+import lxml.html
+import requests
 from bs4 import BeautifulSoup
-from swisstext.cmd.link_utils import filter_links
+from swisstext.cmd.link_utils import filter_links, filter_links_fast
 
+from ..data import Page
 from ..interfaces import ICrawler
-from get_html.env_defined_get import do_get
+from .session_fetcher import SessionFetcher
+from get_html.env_defined_get import do_get, mode, Modes
 
 logger = logging.getLogger(__name__)
 
@@ -29,26 +34,91 @@ class BsCrawler(ICrawler):
         :py:class:`~swisstext.cmd.scraping.interfaces.ISplitter` (recall that the default implementation split text
         based on newlines...) such as the :py:class:`~swisstext.cmd.scraping.punkt_splitter.PunktSplitter`.
 
+    Pages are downloaded using a :py:class:`~.session_fetcher.SessionFetcher`, so connections are kept alive
+    and reused between pages of the same host. The only exception is when ``get_html`` is configured to render
+    the pages with a browser (``RENDER_HTML`` environment variable), in which case its ``do_get`` is used.
+
+    When a page was visited before, :py:meth:`crawl_page` sends a conditional request using the ETag and
+    Last-Modified validators of the last visit: if the server answers "304 Not Modified", the page is not
+    downloaded nor parsed.
+
     .. todo::
 
         Try using just the response.text from requests to get a proper encoding ?
     """
 
-    def __init__(self, joiner=' '):
+    #: available link extractors, see :py:meth:`get_links`
+    link_extractors = ['bs4', 'lxml']
+
+    def __init__(self, joiner=' ', pool_hosts=100, pool_per_host=10, pool_block=False,
+                 max_page_size=None, download_timeout=None, link_extractor='bs4'):
+        """
+        :param joiner: used to join text chunks
+        :param pool_hosts: number of hosts for which connections are kept alive
+        :param pool_per_host: maximum number of connections kept alive per host
+        :param pool_block: if set, never open more than *pool_per_host* connections to the same host
+        :param max_page_size: if set, abort downloads bigger than this size (in bytes) with a ``TooLargeError``
+        :param download_timeout: if set, abort downloads taking more than this time (in seconds) with a
+            ``DownloadTimeoutError``
+        :param link_extractor: how to extract the links, either ``bs4`` (soup) or ``lxml`` (faster),
+            see :py:meth:`get_links`
+        """
+        if link_extractor not in self.link_extractors:
+            raise ValueError(f'link_extractor should be one of {self.link_extractors}, got {link_extractor}')
         self.joiner = joiner  # used to join text chunks
+        self.link_extractor = link_extractor  #: how to extract the links, either bs4 or lxml
+        #: the fetcher used to download pages, None if get_html renders pages with a browser
+        self.fetcher = SessionFetcher(
+            pool_hosts, pool_per_host, pool_block, max_bytes=max_page_size, download_timeout=download_timeout) \
+            if mode == Modes.DEFAULT else None
 
     def crawl(self, url: str) -> ICrawler.CrawlResults:
         """Extract links and text from a URL."""
-        soup, content = self.get_soup(url)
+        return self.parse(url, self.get_content(url)[0])
+
+    def crawl_page(self, page: Page) -> ICrawler.CrawlResults:
+        """Extract links and text from a page, unless it didn't change since the last visit."""
+        headers = dict()
+        if page.etag is not None:
+            headers['If-None-Match'] = page.etag
+        if page.last_modified is not None:
+            headers['If-Modified-Since'] = page.last_modified
+
+        resp = self.fetch(page.url, headers)
+        etag, last_modified = resp.headers.get('etag'), resp.headers.get('last-modified')
+        if resp.status_code == 304:
+            return ICrawler.CrawlResults.unchanged(etag, last_modified)
+
+        results = self.parse(page.url, self.check_response(page.url, resp)[0])
+        results.etag, results.last_modified = etag, last_modified
+        return results
+
+    def parse(self, url: str, content: bytes) -> ICrawler.CrawlResults:
+        """Extract links and text from the raw content of a page."""
+        soup = BeautifulSoup(content, 'html.parser')
         # get links first, as extract_text_blocks is destructive
-        links = self.extract_links(url, soup)
+        links = self.get_links(url, soup, content)
         text_blocks = self.extract_text_blocks(soup)
         return ICrawler.CrawlResults(
             text=self.joiner.join(text_blocks),
             links=links)
 
-    @classmethod
-    def get_content(cls, url) -> Tuple[bytes, str]:
+    def fetch(self, url, headers: dict = None) -> requests.Response:
+        """
+        Do the GET request, wrapping any exception into a :py:class:`~ICrawler.CrawlError`.
+        When possible, the content-type is checked before downloading the body (see :py:meth:`check_headers`).
+        """
+        try:
+            if self.fetcher is not None:
+                return self.fetcher.get(url, headers=headers, check_headers=lambda resp: self.check_headers(url, resp))
+            return do_get(url, headers=headers)
+        except ICrawler.CrawlError:
+            raise
+        except Exception as e:
+            # here, don't use from_ex so we can trim the error message
+            raise ICrawler.CrawlError(name=e.__class__.__name__, message=str(e)[:50])
+
+    def get_content(self, url) -> Tuple[bytes, str]:
         """
         Get the raw content from a URL (as a string), with the response encoding as reported by the requests module.
         Exceptions may be raised if:
@@ -56,12 +126,13 @@ class BsCrawler(ICrawler):
         * the content-type is not of a supported type (namely html or text)
         * the response body is empty
         """
-        try:
-            resp = do_get(url)
-        except Exception as e:
-            # here, don't use from_ex so we can trim the error message
-            raise ICrawler.CrawlError(name=e.__class__.__name__, message=str(e)[:50])
+        return self.check_response(url, self.fetch(url))
 
+    @classmethod
+    def check_headers(cls, url, resp: requests.Response):
+        """Ensure the response content-type is HTML or text. 304 responses (not modified) are always accepted."""
+        if resp.status_code == 304:
+            return
         # try to avoid encoding issues
         # see https://stackoverflow.com/a/45643551/2667536
         # Note: the encoding might be wrong if the content-type is declaring a charset with
@@ -71,6 +142,11 @@ class BsCrawler(ICrawler):
         if not ('html' in ctype or 'text/plain' in ctype):
             raise ICrawler.CrawlError(name='CtypeError', message=f'{url} not HTML (ctype={ctype})')
 
+    @classmethod
+    def check_response(cls, url, resp: requests.Response) -> Tuple[bytes, str]:
+        """Ensure the response holds some HTML or text, see :py:meth:`get_content`."""
+        cls.check_headers(url, resp)
+
         # also test the .text, so that we avoid returning content with only unprintable chars, e.g. b'\xef\xbb\xbf'
         if len(resp.content) == 0 or len(resp.text.strip()) == 0:
             raise ICrawler.CrawlError(name=f'EmptyDocumentError', message='Content is empty.')
@@ -78,13 +154,16 @@ class BsCrawler(ICrawler):
         # the resp.encoding is an educated guess about the encoding of the response based on the HTTP headers
         return resp.content, resp.encoding
 
-    @classmethod
-    def get_soup(cls, url) -> Tuple[BeautifulSoup, bytes]:
+    def get_soup(self, url) -> Tuple[BeautifulSoup, bytes]:
         """Get a :py:class:`~bs4.BeautifulSoup` object from a URL (HTML)."""
-        content, _ = cls.get_content(url)
+        content, _ = self.get_content(url)
         # here, the encoding should be ok, since bs4 uses the decode/replace strategy by default
         return BeautifulSoup(content, 'html.parser'), content
 
+    def log_stats(self):
+        if self.fetcher is not None:
+            self.fetcher.log_stats()
+
     @classmethod
     def extract_text_blocks(cls, soup) -> Generator[str, None, None]:
         """
@@ -106,6 +185,45 @@ class BsCrawler(ICrawler):
 
         return soup.stripped_strings
 
+    def get_links(self, url, soup: BeautifulSoup, content: bytes) -> List[str]:
+        """
+        Get all the links of a page, using the :py:attr:`link_extractor`:
+
+        * ``bs4``: see :py:meth:`extract_links`;
+        * ``lxml``: see :py:meth:`extract_links_lxml`. The links are the same, but it is much faster on pages
+          with many links, such as forums.
+        """
+        if self.link_extractor == 'lxml':
+            return self.extract_links_lxml(url, content, encoding=soup.original_encoding)
+        return self.extract_links(url, soup)
+
+    @classmethod
+    def extract_links_lxml(cls, url, content: bytes, encoding: str = None) -> List[str]:
+        """
+        Get all links from the raw content of a page (a href only) using lxml, which is way faster than walking a soup.
+        Links are resolved and filtered using the memoized :py:meth:`~swisstext.cmd.link_utils.filter_links_fast`.
+
+        :param url: the URL of the page
+        :param content: the raw content of the page
+        :param encoding: the encoding of the content (e.g. :py:attr:`~bs4.BeautifulSoup.original_encoding`),
+            utf-8 is assumed if not specified
+        """
+        try:
+            try:
+                dom = lxml.html.fromstring(content.decode(encoding or 'utf-8', errors='replace'))
+            except ValueError:
+                # Unicode strings with encoding declaration are not supported (XHTML): let lxml decode
+                dom = lxml.html.fromstring(content)
+        except lxml.etree.ParserError:
+            return []  # no tags, hence no links
+        return cls.extract_links_from_tree(url, dom)
+
+    @staticmethod
+    def extract_links_from_tree(url, dom: lxml.html.HtmlElement) -> List[str]:
+        """Get all links from an lxml tree (a href only), see :py:meth:`extract_links_lxml`."""
+        hrefs = (href for href in (a.get('href') for a in dom.iter('a')) if href is not None)
+        return list(filter_links_fast(url, hrefs))
+
     @classmethod
     def extract_links(cls, url, soup):
         """
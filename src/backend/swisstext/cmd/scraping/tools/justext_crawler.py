@@ -12,12 +12,20 @@ To get a feel, try the `online demo of the original JustText <http://nlp.fi.muni
     * justext will throw an error on an empty document content, which is wrapped inside a
       :py:class:`~swisstext.cmd.scraping.interface.ICrawler.CrawlError`.
 
+The :py:class:`LxmlJustextCrawler` variant yields (almost) the same results, but parses each document only once.
+
 """
 import argparse
 import logging
 import re
 
 import justext
+import lxml.etree
+import lxml.html
+from bs4 import BeautifulSoup
+from bs4.dammit import UnicodeDammit
+from justext.core import ParagraphMaker, classify_paragraphs, revise_paragraph_classification
+from lxml.html.clean import Cleaner
 from swisstext.cmd.scraping.interfaces import ICrawler
 from swisstext.cmd.scraping.tools import BsCrawler
 
@@ -35,6 +43,8 @@ class JustextCrawler(BsCrawler):
                  stoplist=None,
                  stopwords_low=justext.core.STOPWORDS_LOW_DEFAULT,
                  stopwords_high=justext.core.STOPWORDS_HIGH_DEFAULT,
+                 pool_hosts=100, pool_per_host=10, pool_block=False,
+                 max_page_size=None, download_timeout=None, link_extractor='bs4',
                  **kwargs):
         """
         Create a crawler instance.
@@ -44,9 +54,17 @@ class JustextCrawler(BsCrawler):
         :param stoplist: see the `justText doc <https://github.com/miso-belica/jusText/blob/dev/doc/algorithm.rst>`_
         :param stopwords_low: idem
         :param stopwords_high: idem
-        :param kwargs: unused
+        :param pool_hosts: see :py:class:`~.bs_crawler.BsCrawler`
+        :param pool_per_host: idem
+        :param pool_block: idem
+        :param max_page_size: idem
+        :param download_timeout: idem
+        :param link_extractor: idem (ignored by the :py:class:`LxmlJustextCrawler`, which always uses lxml)
+        :param kwargs: passed to justext
         """
-        super().__init__(joiner=joiner)
+        super().__init__(joiner=joiner, pool_hosts=pool_hosts, pool_per_host=pool_per_host, pool_block=pool_block,
+                         max_page_size=max_page_size, download_timeout=download_timeout,
+                         link_extractor=link_extractor)
 
         if stoplist is not None:
             with open(stoplist) as f:
@@ -61,10 +79,10 @@ class JustextCrawler(BsCrawler):
         self.keep_bad = keep_bad
         logger.debug(self)
 
-    def crawl(self, url: str):
-        soup, content = self.get_soup(url)
+    def parse(self, url: str, content: bytes):
+        soup = BeautifulSoup(content, 'html.parser')
         # For links, use bs4 (easier)
-        links = self.extract_links(url, soup)
+        links = self.get_links(url, soup, content)
 
         try:
             # justext uses the decode/replace strategy by default, so encoding errors shouldn't happen
@@ -101,6 +119,60 @@ class JustextCrawler(BsCrawler):
         return f'Justext({vars(self)})'.replace("'", '')
 
 
+class LxmlJustextCrawler(JustextCrawler):
+    """
+    A :py:class:`JustextCrawler` that parses each document exactly once.
+
+    The :py:class:`JustextCrawler` builds a :py:class:`~bs4.BeautifulSoup` to detect the encoding and extract the
+    links, then justext parses the same document again using lxml. Here, the document is decoded (using the same
+    encoding detection as BeautifulSoup), parsed into an lxml tree, and both the links and the justext paragraphs
+    are derived from this single tree.
+
+    Results may differ slightly from the :py:class:`JustextCrawler` on malformed HTML, since links are now
+    extracted from the lxml tree instead of the ``html.parser`` soup.
+    """
+
+    # see justext.core.preprocessor
+    _cleaner = Cleaner(
+        processing_instructions=False, remove_unknown_tags=False, safe_attrs_only=False, page_structure=False,
+        annoying_tags=False, frames=False, meta=False, links=False, javascript=False,
+        scripts=True, comments=True, style=True, embedded=True, forms=True, kill_tags=('head',))
+
+    # options of justext.justext not used by classify_paragraphs
+    _not_classify_kwargs = ['max_heading_distance', 'encoding', 'default_encoding', 'enc_errors', 'preprocessor']
+
+    def parse(self, url: str, content: bytes):
+        dom = self.get_dom(content)
+        # get links first, as cleaning is destructive
+        links = self.extract_links_from_tree(url, dom)
+
+        self._cleaner(dom)  # in place, contrary to justext.core.preprocessor
+        paragraphs = ParagraphMaker.make_paragraphs(dom)
+        classify_kwargs = {k: v for k, v in self.kwargs.items() if k not in self._not_classify_kwargs}
+        classify_paragraphs(paragraphs, **classify_kwargs)
+        revise_paragraph_classification(
+            paragraphs, self.kwargs.get('max_heading_distance', justext.core.MAX_HEADING_DISTANCE_DEFAULT))
+
+        text_blocks = (self._get_text(p) for p in paragraphs if self._paragraph_ok(p))
+        return ICrawler.CrawlResults(
+            text=self.joiner.join(text_blocks),
+            links=links)
+
+    @staticmethod
+    def get_dom(content: bytes) -> lxml.html.HtmlElement:
+        """Decode the raw content of a page and parse it into an lxml tree."""
+        encoding = UnicodeDammit(content, is_html=True).original_encoding
+        decoded = content.decode(encoding or 'utf-8', errors='replace')
+        try:
+            return lxml.html.fromstring(decoded, parser=lxml.html.HTMLParser())
+        except ValueError:
+            # Unicode strings with encoding declaration are not supported (XHTML): let lxml decode
+            return lxml.html.fromstring(content, parser=lxml.html.HTMLParser())
+        except lxml.etree.ParserError as e:
+            # might happen if the content is not HTML/has no tags
+            raise ICrawler.CrawlError(name='JustextError', message=str(e))
+
+
 if __name__ == '__main__':
     parser = argparse.ArgumentParser()
     parser.add_argument('url', nargs='+')
@@ -38,6 +38,31 @@ _NUMERIC_ONLY = 2  #: the prefix applies only when followed by number(s)
 # * \p{IsPi} => \p{Pi} or \p{Initial_Punctuation}: any kind of opening quote.
 # * \p{IsPf} => \p{Pf} or \p{Final_Punctuation}: any kind of closing quote.
 
+# Patterns used by split_paragraph, compiled once (regex' cache lookup isn't free on every call).
+_spaces_pattern = re.compile(' +')
+# split on :; (unless followed by a number, a parenthesis, etc.)
+_more_pattern = regex.compile(r'([\:;])([^\d\)\(/-])')
+# sentence breaks, applied in order
+_break_patterns = [regex.compile(p) for p in [
+    # split if ?! is followed by a lowercase (often on the web)
+    r'([\?!]+)([^\?!\p{Pe}\p{Pf}\"])',
+    # r'([?!]) +([\'\"\(\[\¿\¡\p{Pi}]*[\p{L}])',
+    # Multi-dots followed by sentence starters.
+    r'(\.[\.]+) +([\'\"\(\[\¿\¡\p{Pi}]*[\p{L}])',
+    # Add breaks for sentences that end with some sort of punctuation
+    # inside a quote or parenthetical and are followed by a possible
+    # sentence starter punctuation and ~upper case~ letter
+    r'([?!\.][\ ]*[\'\"\)\]\p{Pf}]+) +([\'\"\(\[\¿\¡\p{Pi}]*[\ ]*[\p{Lu}])',
+    # Add breaks for sentences that end with some sort of punctuation,
+    # and are followed by a sentence starter punctuation and upper case letter.
+    r'([?!\.]) +([\'\"\(\[\¿\¡\p{Pi}]+[\ ]*[\p{L}])',
+]]
+# the remaining periods: a word ending with one or more periods
+_period_pattern = regex.compile(r'([\p{IsAlnum}\.\-]*)([\'\"\)\]\%\p{Pf}]*)(\.+)$')
+_acronym_pattern = regex.compile(r'(\.)[\p{IsUpper}\-]+(\.+)$')
+_sentence_start_pattern = regex.compile(r'^([ ]*[\'\"\(\[\¿\¡\p{Pi}]*[ ]*[\p{L}0-9])')
+_number_pattern = regex.compile('^[0-9]+')
+
 
 class MocySplitter(ISplitter):
     """
@@ -78,6 +103,15 @@ class MocySplitter(ISplitter):
         """
         return self.split_sentences(input_text) if self.keep_newlines else self.split_text(input_text)
 
+    def iter_split(self, input_text):  # -> Iterator[str]
+        """
+        Same as :py:meth:`split`, but yield the sentences one paragraph at a time, without building the list of
+        all the sentences of the text.
+        """
+        paragraphs = self._iter_lines(input_text) if self.keep_newlines else self._iter_blocks(input_text)
+        for p in paragraphs:
+            yield from self.split_paragraph(p, self.nb_prefixes, self.more)
+
     def split_sentences(self, input_text):  # -> List[str]
         """
         Split a text into sentences. Newlines already present in text will be preserved and act as paragraph delimiters.
@@ -85,11 +119,7 @@ class MocySplitter(ISplitter):
         :param input_text: the input text
         :return: a list of sentences (no blank lines)
         """
-        return sum((
-            self.split_paragraph(p, self.nb_prefixes, self.more)
-            for p in input_text.split('\n')
-            if p and not p.isspace()
-        ), [])
+        return [s for p in self._iter_lines(input_text) for s in self.split_paragraph(p, self.nb_prefixes, self.more)]
 
     def split_text(self, input_text):  # -> List[str]
         """
@@ -99,31 +129,39 @@ class MocySplitter(ISplitter):
         :param input_text: the input text
         :return: a list of sentences (no blank lines)
         """
-        # equivalent of process_text in moses, but returns a list
-        current_paragraph = ''
-        splits = []
+        return [s for p in self._iter_blocks(input_text) for s in self.split_paragraph(p, self.nb_prefixes, self.more)]
+
+    @staticmethod
+    def _iter_lines(input_text):
+        # paragraphs of split_sentences: the non-blank lines
+        for p in input_text.split('\n'):
+            if p and not p.isspace():
+                yield p
+
+    @staticmethod
+    def _iter_blocks(input_text):
+        # paragraphs of split_text, equivalent of process_text in moses: lines are joined until a blank line
+        current_paragraph = []  # lines, joined with a trailing space
         for line in input_text.split('\n'):
             if not line or line.isspace():
                 # Time to process this block; we've hit a blank or <p>
                 if current_paragraph:
-                    splits.extend(self.split_paragraph(current_paragraph, self.nb_prefixes, self.more))
-                    current_paragraph = ""
+                    yield ' '.join(current_paragraph) + ' '
+                    current_paragraph = []
             else:
-                current_paragraph += line + ' '
+                current_paragraph.append(line)
 
         if current_paragraph:
             # Do the leftover text.
-            splits.extend(self.split_paragraph(current_paragraph, self.nb_prefixes, self.more))
-
-        return splits
+            yield ' '.join(current_paragraph) + ' '
 
     @classmethod
     def cleanup_spaces(cls, text):  # -> str
         """Normalize spaces in a text."""
         # clean up spaces
-        text = re.sub(' +', ' ', text)
-        text = re.sub('\n ', '\n', text)
-        text = re.sub(' \n ', '\n', text)
+        text = _spaces_pattern.sub(' ', text)
+        text = text.replace('\n ', '\n')
+        text = text.replace(' \n ', '\n')
         return text.strip()
 
     @classmethod
@@ -148,52 +186,40 @@ class MocySplitter(ISplitter):
             # https://bitbucket.org/luismsgomes/mosestokenizer/src/default/src/mosestokenizer/split-sentences.perl
             # text = regex.sub(r'([\:;])', r'\1\n', text)
             # TODO: improvement: try to keep emojis, numers like 1:1 and urls intact
-            text = regex.sub(r'([\:;])([^\d\)\(/-])', r'\1\n\2', text)
-
-        # split if ?! is followed by a lowercase (often on the web)
-        text = regex.sub(r'([\?!]+)([^\?!\p{Pe}\p{Pf}\"])', r'\1\n\2', text)
-        # text = regex.sub(r'([?!]) +([\'\"\(\[\¿\¡\p{Pi}]*[\p{L}])', r'\1\n\2', text)
+            text = _more_pattern.sub(r'\1\n\2', text)
 
-        # Multi-dots followed by sentence starters.
-        text = regex.sub(r'(\.[\.]+) +([\'\"\(\[\¿\¡\p{Pi}]*[\p{L}])', r'\1\n\2', text)
-
-        # Add breaks for sentences that end with some sort of punctuation
-        # inside a quote or parenthetical and are followed by a possible
-        # sentence starter punctuation and ~upper case~ letter
-        text = regex.sub(r'([?!\.][\ ]*[\'\"\)\]\p{Pf}]+) +([\'\"\(\[\¿\¡\p{Pi}]*[\ ]*[\p{Lu}])', r'\1\n\2', text)
-
-        # Add breaks for sentences that end with some sort of punctuation,
-        # and are followed by a sentence starter punctuation and upper case letter.
-        text = regex.sub(r'([?!\.]) +([\'\"\(\[\¿\¡\p{Pi}]+[\ ]*[\p{L}])', r'\1\n\2', text)
+        # ?! followed by a lowercase, multi-dots, punctuation followed by a sentence starter (see _break_patterns)
+        for pattern in _break_patterns:
+            text = pattern.sub(r'\1\n\2', text)
 
         # Special punctuation cases are covered. Check all remaining periods.
         words = text.split(' ')
-        text = ''
         for i in range(len(words) - 1):
+            # fast path: the word doesn't end with a period (note that $ also matches before a trailing newline)
+            if not words[i].endswith(('.', '.\n')):
+                continue
             # TODO: add the # as a possible sentence start ? (twitter and hashtags)
-            m = regex.search(r'([\p{IsAlnum}\.\-]*)([\'\"\)\]\%\p{Pf}]*)(\.+)$', words[i])
+            m = _period_pattern.search(words[i])
             if m is not None:
                 # Check if $1 is a known honorific and $2 is empty, never break.
                 prefix, starting_punct, _ = m.groups()
                 if prefix and nb_prefixes.get(prefix, _UNDEF) == _ANY and not starting_punct:
                     pass  # Not breaking prefix
-                elif regex.search(r'(\.)[\p{IsUpper}\-]+(\.+)$', words[i]) is not None:
+                elif _acronym_pattern.search(words[i]) is not None:
                     pass  # Not breaking - upper case acronym
-                elif regex.search(r'^([ ]*[\'\"\(\[\¿\¡\p{Pi}]*[ ]*[\p{L}0-9])', words[i + 1]):
+                elif _sentence_start_pattern.search(words[i + 1]):
                     # The next word has maybe a bunch of initial quotes, maybe a
                     # space, then either ~upper case~ letter or a number
                     if prefix and nb_prefixes.get(prefix, _UNDEF) == _NUMERIC_ONLY and not starting_punct \
-                            and regex.search('^[0-9]+', words[i + 1]):
+                            and _number_pattern.search(words[i + 1]):
                         # exception: we have a numeric-only prefix followed by a number
                         pass
                     else:
                         # In any other case, split
                         words[i] = words[i] + '\n'
-            text += words[i] + ' '
 
-        # We stopped one token from the end to allow for easy look-ahead.
-        # Append it now.
-        text = text + words[-1]
+        # We stopped one token from the end to allow for easy look-ahead, the last one is joined as is.
+        text = ' '.join(words)
 
         # clean up spaces
         text = cls.cleanup_spaces(text)
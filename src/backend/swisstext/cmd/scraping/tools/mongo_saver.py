@@ -1,36 +1,87 @@
-from threading import Lock
+import os
+import time
+from collections import Counter, deque
+from datetime import datetime, timedelta
+from functools import partial
+from itertools import islice
+from queue import Queue
+from threading import Condition, Lock, Thread
+from typing import List, Optional
 
+import numpy as np
 from mongoengine import NotUniqueError
+from pymongo import UpdateOne
+from pymongo.errors import BulkWriteError
 
+from ..bloom_filter import ScalableBloomFilter
 from ..interfaces import ISaver
 from ..data import Page, PageScore
 from swisstext.mongo.models import *
+from swisstext.mongo.abstract.lookups import find_ids, find_values, iter_ids
+from swisstext.mongo.abstract.urls import UrlCrawlMeta
 
 import logging
 
 logger = logging.getLogger(__name__)
 
+_DUPLICATE_KEY_ERROR = 11000  # MongoDB error code
+_BLOOM_CHUNK_SIZE = 100000  # number of ids added at once to the bloom filters when scanning the collections
+_BLOOM_CLOCK_MARGIN = timedelta(hours=1)  # rescan a bit before the last scan, in case the clocks differ
+_MAX_LATENCIES = 100000  # number of write latencies kept for the statistics of the AsyncMongoSaver
+
+
 class MongoSaver(ISaver):
     """
     This :py:class:`~swisstext.cmd.scraping.interfaces.ISaver` implementation persists everything to
     a MongoDB database.
 
+    If ``bloom_dir`` is set, the ids of the ``sentences`` and ``blacklist`` collections are kept in
+    in-process bloom filters (see :py:mod:`~swisstext.cmd.scraping.bloom_filter`): sentences and URLs definitely
+    absent from the collections are answered without a query. The filters are loaded from ``bloom_dir`` at startup
+    (only the documents added since the last run are scanned) and saved back on :py:meth:`close`. The collections
+    are scanned fully if the saved filters come from another server or if a collection shrank since.
+
+    .. note::
+        Sentences and blacklisted URLs added by *other* processes while the scraper runs are not in the filters,
+        so they may be reported as new (the duplicate sentences are still ignored when saved).
+
     .. seealso::
         :py:mod:`swisstext.mongo`
             Package defining the Mongo collections.
     """
 
-    def __init__(self, db='st1', **kwargs):
+    def __init__(self, db='st1', bloom_dir: str = None, **kwargs):
         """
         :param db: the database to use
+        :param bloom_dir: if set, use bloom filters for the existence checks, persisted in this directory
         :param kwargs: may include ``host`` and ``port``
         """
         super().__init__()
         get_connection(db, **kwargs)
         self.lock = Lock()
 
+        self.db = db
+        self.server = '%s:%s' % (kwargs.get('host', 'localhost'), kwargs.get('port', 27017))  #: the MongoDB server
+        #: where the bloom filters are persisted (None if not used)
+        self.bloom_dir = os.path.expanduser(bloom_dir) if bloom_dir is not None else None
+        self.bloom_skipped = 0  #: number of existence queries avoided thanks to the bloom filters
+        self._sentences_bloom: Optional[ScalableBloomFilter] = None
+        self._blacklist_bloom: Optional[ScalableBloomFilter] = None
+        self._bloom_since = None  # date of the last scan of the collections
+        if bloom_dir is not None:
+            self._load_bloom_filters()
+
     def get_page(self, url: str, **kwargs) -> Page:
-        mu: MongoURL = MongoURL.get(url)
+        return self._to_page(url, MongoURL.get(url), **kwargs)
+
+    def get_pages(self, urls: List[str], **kwargs) -> List[Page]:
+        """Same as :py:meth:`get_page`, but load all the URLs with a single query."""
+        found = {mu.url: mu for mu in MongoURL.objects(url__in=urls)} if urls else {}
+        return [self._to_page(url, found.get(url), **kwargs) for url in urls]
+
+    @staticmethod
+    def _to_page(url: str, mu: MongoURL, **kwargs) -> Page:
+        # create a page, with the information of the MongoURL if it exists
         score: PageScore = None
 
         if mu:
@@ -39,10 +90,37 @@ class MongoSaver(ISaver):
                 delta_count=mu.delta,
                 delta_date=mu.delta_date)
 
-        return Page(url, score=score, **kwargs)
+        page = Page(url, score=score, **kwargs)
+        if mu:
+            page.etag, page.last_modified = mu.etag, mu.last_modified
+            if mu.crawl_history:
+                page.text_hash = mu.crawl_history[-1].hash
+        return page
+
+    def is_page_unchanged(self, page: Page) -> bool:
+        """Compare the hash of the raw text with the hash of the last crawl (see :py:class:`MongoText`)."""
+        return page.text_hash is not None and MongoText.get_hash(page.crawl_results.text) == page.text_hash
+
+    def save_unchanged_page(self, page: Page):
+        """Add a crawl history entry, copying the counts and hash of the last one."""
+        with self.lock:
+            mu: MongoURL = MongoURL.get(page.url)
+            if mu is None or not mu.crawl_history:
+                return  # should not happen, since the page was not new
+            last = mu.crawl_history[-1]
+            mu.add_crawl_history(0, hash=last.hash, sents_count=last.sents_count, sg_sents_count=last.sg_sents_count)
+            self._set_validators(mu, page)
+            mu.save()
+            logger.info("saved %s (crawled=%d times, unchanged)" % (page, len(mu.crawl_history)))
 
     def sentence_exists(self, sentence: str):
-        return MongoSentence.exists(sentence)
+        return self.sentences_exist([sentence])[0]
+
+    def sentences_exist(self, sentences: List[str]) -> List[bool]:
+        """Same as :py:meth:`sentence_exists`, but check all the sentences with a single query."""
+        hashes = self._maybe_present(self._sentences_bloom, [MongoSentence.get_hash(s) for s in sentences])
+        found = find_ids(MongoSentence, [h for h in hashes if h])
+        return [h in found for h in hashes]
 
     def save_page(self, page: Page):
         with self.lock:
@@ -53,6 +131,8 @@ class MongoSaver(ISaver):
                 except NotUniqueError:
                     # TODO decrease new_sg ?
                     logger.warning(f'Exception ignored -- Duplicate sentence found (url: {page.url}.')
+            if self._sentences_bloom is not None:
+                self._sentences_bloom.add_all(MongoSentence.get_hash(s.text) for s in page.new_sg)
 
             # save or update url
             new_count = len(page.new_sg)
@@ -68,6 +148,7 @@ class MongoSaver(ISaver):
 
             # add crawl history
             mu.add_crawl_history(new_count, hash=text.id, sents_count=page.sentence_count, sg_sents_count=page.sg_count)
+            self._set_validators(mu, page)
             # persist
             text.save()
             mu.save()
@@ -75,8 +156,29 @@ class MongoSaver(ISaver):
             logger.info("saved %s (crawled=%d times, new_count=%d)" %
                         (page, len(mu.crawl_history), new_count))
 
+    @staticmethod
+    def _validators(page: Page) -> dict:
+        # the HTTP validators to update: keep the previous ones if the server didn't send new ones
+        results = page.crawl_results
+        validators = dict(etag=results.etag, last_modified=results.last_modified)
+        return {name: value for name, value in validators.items() if value is not None}
+
+    @classmethod
+    def _set_validators(cls, mu: MongoURL, page: Page):
+        for name, value in cls._validators(page).items():
+            setattr(mu, name, value)
+
     def is_url_blacklisted(self, url: str):
-        return MongoBlacklist.exists(url)
+        return self.urls_blacklisted([url])[0]
+
+    def urls_blacklisted(self, urls: List[str]) -> List[bool]:
+        """Same as :py:meth:`is_url_blacklisted`, but check all the URLs with a single query."""
+        if self._blacklist_bloom is not None:
+            maybe = self._maybe_present(self._blacklist_bloom, [MongoBlacklist.get_hash(url) for url in urls])
+            urls = [url if h else None for url, h in zip(urls, maybe)]
+        queried = [url for url in urls if url is not None]
+        found = find_values(MongoBlacklist, 'url', queried)
+        return [url is not None and url in found for url in urls]
 
     def blacklist_url(self, url: str, error_message=None, **kwargs):
         MongoURL.try_delete(url)  # remove URL if exists
@@ -85,6 +187,8 @@ class MongoSaver(ISaver):
         else:
             source = Source(SourceType.AUTO)
         MongoBlacklist.add_url(url, source=source)
+        if self._blacklist_bloom is not None:
+            self._blacklist_bloom.add(MongoBlacklist.get_hash(url))
 
     def save_url(self, url: str, parent: str = None):
         MongoURL.create(url, Source(SourceType.AUTO, parent)).save()
@@ -93,7 +197,421 @@ class MongoSaver(ISaver):
         if not MongoSeed.exists(seed):
             MongoSeed.create(seed, Source(SourceType.AUTO)).save()
 
+    def close(self):
+        """Save the bloom filters, if any."""
+        if self.bloom_dir is not None:
+            self._save_bloom_filters()
+            logger.info(f'MongoSaver: {self.bloom_skipped} existence queries avoided thanks to the bloom filters')
+
+    def _maybe_present(self, bloom: Optional[ScalableBloomFilter], hashes: List[str]) -> List[Optional[str]]:
+        # replace the hashes definitely absent from the bloom filter by None
+        if bloom is None or not hashes:
+            return hashes
+        maybe = bloom.contains_all(hashes)
+        self.bloom_skipped += len(hashes) - sum(maybe)
+        return [h if m else None for h, m in zip(hashes, maybe)]
+
+    def _bloom_path(self, collection: str) -> str:
+        return os.path.join(self.bloom_dir, f'{self.db}.{collection}.bloom')
+
+    def _load_bloom_filters(self):
+        self._bloom_since = datetime.utcnow()
+        self._sentences_bloom = self._load_bloom_filter('sentences', MongoSentence)
+        self._blacklist_bloom = self._load_bloom_filter('blacklist', MongoBlacklist)
+
+    def _load_bloom_filter(self, collection: str, cls) -> ScalableBloomFilter:
+        # load the filter saved by the last run (if any), then add the ids of the documents added since
+        path = self._bloom_path(collection)
+        bloom = ScalableBloomFilter.load(path) if os.path.isfile(path) else None
+        if bloom is not None and not self._is_same_collection(collection, cls, bloom.metadata):
+            bloom = None
+        if bloom is not None:
+            since = datetime.fromisoformat(bloom.metadata['since']) - _BLOOM_CLOCK_MARGIN
+            ids = iter_ids(cls, {'date_added': {'$gte': since}})
+        else:
+            bloom = ScalableBloomFilter()
+            ids = iter_ids(cls)
+
+        num_ids = 0
+        chunk = list(islice(ids, _BLOOM_CHUNK_SIZE))
+        while chunk:
+            bloom.add_all(chunk)
+            num_ids += len(chunk)
+            chunk = list(islice(ids, _BLOOM_CHUNK_SIZE))
+        logger.info(f'Bloom filter {collection}: {num_ids} ids scanned, {len(bloom)} in total.')
+        return bloom
+
+    def _is_same_collection(self, collection: str, cls, metadata: dict) -> bool:
+        # a filter saved for another server (with the same db name) or before the collection shrank (e.g. it was
+        # dropped and restored) would miss some ids, i.e. have false negatives: it must be rebuilt
+        if metadata.get('server') != self.server:
+            logger.info(f'Bloom filter {collection}: saved for server {metadata.get("server")}, rescanning.')
+            return False
+        if cls._get_collection().estimated_document_count() < metadata.get('count', 0):
+            logger.info(f'Bloom filter {collection}: the collection shrank since it was saved, rescanning.')
+            return False
+        return True
+
+    def _save_bloom_filters(self):
+        os.makedirs(self.bloom_dir, exist_ok=True)
+        for collection, bloom, cls in (('sentences', self._sentences_bloom, MongoSentence),
+                                       ('blacklist', self._blacklist_bloom, MongoBlacklist)):
+            # write to a temporary file first, so a crash doesn't leave a truncated filter
+            path = self._bloom_path(collection)
+            bloom.save(path + '.tmp', since=self._bloom_since.isoformat(), server=self.server,
+                       count=cls._get_collection().estimated_document_count())
+            os.replace(path + '.tmp', path)
+
     @staticmethod
     def url_to_filename(url):
         from urllib.parse import quote
-        return quote(url).replace('/', '@')
\ No newline at end of file
+        return quote(url).replace('/', '@')
+
+
+class BulkMongoSaver(MongoSaver):
+    """
+    A :py:class:`MongoSaver` buffering the pages and writing them in bulk: new sentences are inserted with one
+    ``insert_many(ordered=False)`` (duplicates are ignored) and URLs/texts are upserted with one ``bulk_write`` per
+    collection. Contrary to :py:meth:`MongoSaver.save_page`, saving a page doesn't hold a global lock during
+    the database round-trips, so it doesn't limit the throughput when running many workers.
+
+    The buffer is flushed when it holds :py:attr:`flush_size` pages, every :py:attr:`flush_interval` seconds
+    and on :py:meth:`close`. Pages still in the buffer are taken into account by :py:meth:`sentence_exists`,
+    and the methods reading or overwriting a URL (e.g. :py:meth:`get_page`) flush the buffer first if the URL is
+    in it.
+
+    To use it, set the saver to ``.BulkMongoSaver`` in the configuration:
+
+    .. code-block:: yaml
+
+        pipeline:
+          saver: .BulkMongoSaver
+        saver_options:
+          flush_size: 100     # number of pages triggering a flush
+          flush_interval: 5   # maximum time between two flushes, in seconds (0 to flush only when full)
+    """
+
+    def __init__(self, db='st1', flush_size=100, flush_interval=5., **kwargs):
+        """
+        :param db: the database to use
+        :param flush_size: number of buffered pages triggering a flush
+        :param flush_interval: maximum time between two flushes in seconds, 0 to flush only when the buffer is full
+        :param kwargs: may include ``host`` and ``port``
+        """
+        if flush_size < 1:
+            raise ValueError('flush_size should be > 0')
+        if flush_interval < 0:
+            raise ValueError('flush_interval should be >= 0')
+        super().__init__(db=db, **kwargs)
+        self.flush_size = flush_size  #: number of buffered pages triggering a flush
+        self.flush_interval = flush_interval  #: maximum time between two flushes, in seconds
+
+        self.num_flushes = 0  #: number of flushes so far
+        self.num_pages = 0  #: number of pages written
+        self.num_sentences = 0  #: number of sentences inserted (duplicates excluded)
+
+        self._pages: List[Page] = []  # the buffer
+        self._pending_urls = Counter()  # URL -> number of pages in the buffer or being written
+        self._pending_sentences = Counter()  # sentence hash -> number of occurrences in the buffer or being written
+        self._cond = Condition()  # protects the above
+        self._flush_lock = Lock()  # one flush at a time, so the updates of a URL are applied in order
+        self._closed = False
+        self._thread = None
+
+    def save_page(self, page: Page):
+        """Add the page to the buffer, and flush it if full."""
+        with self._cond:
+            if self._thread is None and self.flush_interval > 0 and not self._closed:
+                self._thread = Thread(target=self._run, name='bulk-mongo-saver', daemon=True)
+                self._thread.start()
+            self._pages.append(page)
+            self._pending_urls[page.url] += 1
+            self._pending_sentences.update(MongoSentence.get_hash(s.text) for s in page.new_sg)
+            full = len(self._pages) >= self.flush_size or self._closed
+        if full:
+            self.flush()
+
+    def sentence_exists(self, sentence: str):
+        return MongoSentence.get_hash(sentence) in self._pending_sentences or super().sentence_exists(sentence)
+
+    def sentences_exist(self, sentences: List[str]) -> List[bool]:
+        pending = [MongoSentence.get_hash(s) in self._pending_sentences for s in sentences]
+        exist = iter(super().sentences_exist([s for s, p in zip(sentences, pending) if not p]))
+        return [p or next(exist) for p in pending]
+
+    def get_page(self, url: str, **kwargs) -> Page:
+        self._flush_if_pending(url)
+        return super().get_page(url, **kwargs)
+
+    def get_pages(self, urls: List[str], **kwargs) -> List[Page]:
+        if any(url in self._pending_urls for url in urls):
+            self.flush()
+        return super().get_pages(urls, **kwargs)
+
+    def save_unchanged_page(self, page: Page):
+        self._flush_if_pending(page.url)
+        super().save_unchanged_page(page)
+
+    def blacklist_url(self, url: str, error_message=None, **kwargs):
+        self._flush_if_pending(url)
+        super().blacklist_url(url, error_message=error_message, **kwargs)
+
+    def save_url(self, url: str, parent: str = None):
+        self._flush_if_pending(url)
+        super().save_url(url, parent)
+
+    def flush(self):
+        """Write the buffered pages to the database."""
+        with self._flush_lock:
+            with self._cond:
+                pages, self._pages = self._pages, []
+            if not pages:
+                return
+            try:
+                self._write(pages)
+            finally:
+                with self._cond:
+                    self._pending_urls.subtract(p.url for p in pages)
+                    self._pending_sentences.subtract(MongoSentence.get_hash(s.text) for p in pages for s in p.new_sg)
+                    self._pending_urls += Counter()  # remove zero counts
+                    self._pending_sentences += Counter()
+
+    def close(self):
+        """Stop the background thread and flush the buffer."""
+        with self._cond:
+            self._closed = True
+            self._cond.notify()
+        if self._thread is not None:
+            self._thread.join()
+        self.flush()
+        logger.info('BulkMongoSaver: %d pages and %d new sentences saved in %d flushes' % (
+            self.num_pages, self.num_sentences, self.num_flushes))
+        super().close()
+
+    def _flush_if_pending(self, url: str):
+        if url in self._pending_urls:
+            self.flush()
+
+    def _run(self):
+        # flush the buffer every flush_interval seconds, until closed
+        while True:
+            with self._cond:
+                if not self._closed:
+                    self._cond.wait(self.flush_interval)
+                if self._closed:
+                    return
+            try:
+                self.flush()
+            except Exception:
+                logger.exception('BulkMongoSaver: failed to flush the buffered pages')
+
+    def _write(self, pages: List[Page]):
+        # sentences first, ignoring duplicates (the other documents are inserted nonetheless)
+        sentences = [MongoSentence.create(s.text, p.url, s.proba).to_mongo() for p in pages for s in p.new_sg]
+        num_inserted = len(sentences)
+        if sentences:
+            try:
+                MongoSentence._get_collection().insert_many(sentences, ordered=False)
+            except BulkWriteError as e:
+                errors = e.details.get('writeErrors', [])
+                if e.details.get('writeConcernErrors') or \
+                        any(err['code'] != _DUPLICATE_KEY_ERROR for err in errors):
+                    raise
+                num_inserted -= len(errors)
+                logger.warning(f'Exception ignored -- {len(errors)} duplicate sentences found.')
+            if self._sentences_bloom is not None:
+                self._sentences_bloom.add_all(s['_id'] for s in sentences)
+
+        # then the raw, unnormalized texts and the URLs, in order since a URL may be saved more than once
+        texts, urls = [], []
+        for page in pages:
+            url_id = MongoURL.get_hash(page.url)
+            text_hash = MongoText.get_hash(page.crawl_results.text)
+            texts.append(self._text_update(url_id, text_hash, page.crawl_results.text))
+            urls.append(self._url_update(page, text_hash))
+        MongoText._get_collection().bulk_write(texts)
+        MongoURL._get_collection().bulk_write(urls)
+
+        self.num_flushes += 1
+        self.num_pages += len(pages)
+        self.num_sentences += num_inserted
+        logger.info("saved %d pages (new_count=%d)" % (len(pages), num_inserted))
+
+    @staticmethod
+    def _text_update(url_id: str, text_hash: str, text: str) -> UpdateOne:
+        # same as MongoText.create_or_update
+        doc = MongoText.create(url_id, text, hash=text_hash).to_mongo()
+        return UpdateOne(
+            {'_id': text_hash},
+            {'$setOnInsert': {'text': doc['text'], 'date_added': doc['date_added']},
+             '$addToSet': {'urls': url_id}},
+            upsert=True)
+
+    @staticmethod
+    def _url_update(page: Page, text_hash: str) -> UpdateOne:
+        # same as getting or creating the MongoURL, calling add_crawl_history and saving it
+        source = Source(type_=SourceType.AUTO, extra=page.parent_url) if page.parent_url else Source()
+        doc = MongoURL.create(page.url, source=source).to_mongo()
+        meta = UrlCrawlMeta(count=len(page.new_sg), hash=text_hash, sents_count=page.sentence_count,
+                            sg_sents_count=page.sg_count)
+        update = {
+            '$setOnInsert': {k: doc[k] for k in ('url', 'source', 'date_added')},
+            '$push': {'crawl_history': meta.to_mongo()},
+            '$inc': {'count': meta.count},
+            '$set': {'delta': meta.count, 'delta_date': meta.date},
+        }
+        update['$set'].update(MongoSaver._validators(page))
+        return UpdateOne({'_id': doc['_id']}, update, upsert=True)
+
+
+class AsyncMongoSaver(MongoSaver):
+    """
+    A :py:class:`MongoSaver` performing the writes (:py:meth:`save_page`, :py:meth:`save_unchanged_page`,
+    :py:meth:`blacklist_url` and :py:meth:`save_url`) in a background writer thread, so the workers can go on
+    crawling while the previous pages are saved. The writes are applied one at a time, in order.
+
+    The writes wait in a queue of at most :py:attr:`max_queue_size` operations: when the database can't keep up,
+    the workers block until there is room again (backpressure). The writes still in the queue are taken
+    into account by :py:meth:`sentence_exists` and :py:meth:`is_url_blacklisted`, and :py:meth:`get_page`
+    waits for the pending writes of its URL. Since the writes happen in the background, their errors can't reach
+    the workers: they are logged instead.
+
+    :py:meth:`close` waits for the queue to be empty and logs the queue depth high-water mark as well as
+    the write latency percentiles (time from the call to the end of the write, and time of the write itself).
+
+    To use it, set the saver to ``.AsyncMongoSaver`` in the configuration (and optionally ``max_queue_size``
+    in the ``saver_options``).
+    """
+
+    def __init__(self, db='st1', max_queue_size=1000, **kwargs):
+        """
+        :param db: the database to use
+        :param max_queue_size: maximum number of writes waiting for the writer thread
+        :param kwargs: see :py:class:`MongoSaver`
+        """
+        if max_queue_size < 1:
+            raise ValueError('max_queue_size should be > 0')
+        super().__init__(db=db, **kwargs)
+        self.max_queue_size = max_queue_size  #: maximum number of writes waiting for the writer thread
+
+        self.num_writes = 0  #: number of writes done
+        self.num_errors = 0  #: number of writes that raised an exception
+        self.max_queue_depth = 0  #: queue depth high-water mark
+
+        self._queue = Queue(maxsize=max_queue_size)
+        self._latencies = deque(maxlen=_MAX_LATENCIES)  # (total latency, write time) of the last writes
+        self._pending_urls = Counter()  # URL -> number of writes in the queue or being written
+        self._pending_sentences = Counter()  # sentence hash -> number of occurrences in the queue or being written
+        self._pending_blacklist = Counter()  # URL -> number of blacklist_url in the queue or being written
+        self._cond = Condition()  # protects the above
+        self._thread = None
+        self._closed = False
+
+    # ---- writes
+
+    def save_page(self, page: Page):
+        hashes = [MongoSentence.get_hash(s.text) for s in page.new_sg]
+        self._enqueue(partial(super().save_page, page), page.url, sentences=hashes)
+
+    def save_unchanged_page(self, page: Page):
+        self._enqueue(partial(super().save_unchanged_page, page), page.url)
+
+    def blacklist_url(self, url: str, error_message=None, **kwargs):
+        self._enqueue(partial(super().blacklist_url, url, error_message=error_message, **kwargs), url,
+                      blacklisted=True)
+
+    def save_url(self, url: str, parent: str = None):
+        self._enqueue(partial(super().save_url, url, parent), url)
+
+    # ---- reads
+
+    def sentences_exist(self, sentences: List[str]) -> List[bool]:
+        pending = [MongoSentence.get_hash(s) in self._pending_sentences for s in sentences]
+        exist = iter(super().sentences_exist([s for s, p in zip(sentences, pending) if not p]))
+        return [p or next(exist) for p in pending]
+
+    def urls_blacklisted(self, urls: List[str]) -> List[bool]:
+        pending = [url in self._pending_blacklist for url in urls]
+        blacklisted = iter(super().urls_blacklisted([url for url, p in zip(urls, pending) if not p]))
+        return [p or next(blacklisted) for p in pending]
+
+    def get_page(self, url: str, **kwargs) -> Page:
+        self._wait_for([url])
+        return super().get_page(url, **kwargs)
+
+    def get_pages(self, urls: List[str], **kwargs) -> List[Page]:
+        self._wait_for(urls)
+        return super().get_pages(urls, **kwargs)
+
+    # ---- writer thread
+
+    def close(self):
+        """
+        Wait for the pending writes, stop the writer thread and log the statistics.
+        Once closed, the saver doesn't accept writes anymore.
+        """
+        with self._cond:
+            if self._closed: return
+            self._closed = True
+        if self._thread is not None:
+            self._queue.put(None)
+            self._thread.join()
+            self._thread = None
+        self.log_stats()
+        super().close()
+
+    def log_stats(self):
+        """Log the number of writes, the queue depth high-water mark and the latency percentiles."""
+        msg = 'AsyncMongoSaver: %d writes (%d errors), max queue depth=%d/%d' % (
+            self.num_writes, self.num_errors, self.max_queue_depth, self.max_queue_size)
+        if self._latencies:
+            percentiles = np.percentile(np.array(self._latencies) * 1000, [50, 90, 99], axis=0)
+            msg += ', latency p50/p90/p99=%.0f/%.0f/%.0f ms (write only: %.0f/%.0f/%.0f ms)' % (
+                *percentiles[:, 0], *percentiles[:, 1])
+        logger.info(msg)
+
+    def _enqueue(self, write, url: str, sentences=(), blacklisted=False):
+        with self._cond:
+            if self._closed:
+                raise RuntimeError(f'AsyncMongoSaver is closed, cannot save {url}')
+            if self._thread is None:
+                self._thread = Thread(target=self._run, name='async-mongo-saver', daemon=True)
+                self._thread.start()
+            self._pending_urls[url] += 1
+            self._pending_sentences.update(sentences)
+            if blacklisted: self._pending_blacklist[url] += 1
+        # blocks while the queue is full
+        self._queue.put((write, url, sentences, blacklisted, time.time()))
+        self.max_queue_depth = max(self.max_queue_depth, self._queue.qsize())
+
+    def _wait_for(self, urls: List[str]):
+        # wait until the writes of the URLs are done
+        with self._cond:
+            while any(url in self._pending_urls for url in urls):
+                self._cond.wait()
+
+    def _run(self):
+        while True:
+            item = self._queue.get()
+            if item is None:
+                break
+            write, url, sentences, blacklisted, submit_time = item
+            start = time.time()
+            try:
+                write()
+            except Exception:
+                self.num_errors += 1
+                logger.exception(f'AsyncMongoSaver: write failed ({url})')
+            end = time.time()
+            self.num_writes += 1
+            self._latencies.append((end - submit_time, end - start))
+
+            with self._cond:
+                self._pending_urls[url] -= 1
+                if not self._pending_urls[url]: del self._pending_urls[url]
+                self._pending_sentences.subtract(sentences)
+                self._pending_sentences += Counter()  # remove zero counts
+                if blacklisted:
+                    self._pending_blacklist[url] -= 1
+                    if not self._pending_blacklist[url]: del self._pending_blacklist[url]
+                self._cond.notify_all()
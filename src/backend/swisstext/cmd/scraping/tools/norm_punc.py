@@ -15,9 +15,15 @@ __all__ = ['Normalizer', 'normalize_text']
 
 import argparse
 import re
+from functools import partial
 import sys
 import unicodedata
 
+try:
+    from re import _constants as sre_constants, _parser as sre_parse
+except ImportError:  # python < 3.11
+    import sre_constants, sre_parse
+
 REG, STR = 0, 1  # flags for using re.sub vs string.replace
 
 # from Leipzig rules
@@ -113,6 +119,118 @@ normalization_patterns = [
     ]]
 
 
+# ---- fused normalization patterns
+# Applying the ~50 normalization patterns one by one means as many passes over the whole text. Most of them
+# don't match anything on a given page though, and str.replace/str.__contains__ on an absent character cost almost
+# nothing (no copy, and no search at all for non-ASCII characters in an ASCII text), while each re.sub is a full
+# (slow) scan. So:
+# - regexes made of a single (small) character class are expanded into one str.replace per character,
+# - other regexes are only applied if the text contains one of the characters any match requires (e.g. ")" or ":").
+# The result is always the same as applying the patterns in order.
+
+_simple_class_pattern = re.compile(r'\[((?:[^\]\\^-]-[^\]\\^-]|[^\]\\^-])+)\]')  # e.g. [a-z\u2010]
+_MAX_GUARD_CHARS = 4  # more required characters would make the guard almost always true
+_MAX_EXPANDED_CHARS = 16  # above, a single re.sub is faster than one str.replace per character
+
+
+def _expand_simple_class(regex):
+    """Return the characters of a regex made of one character class without escapes, or None."""
+    m = _simple_class_pattern.fullmatch(regex.pattern) if regex.flags & ~re.UNICODE == 0 else None
+    if m is None:
+        return None
+    chars, body, i = [], m.group(1), 0
+    while i < len(body):
+        if i + 2 < len(body) and body[i + 1] == '-':
+            chars.extend(chr(c) for c in range(ord(body[i]), ord(body[i + 2]) + 1))
+            i += 3
+        else:
+            chars.append(body[i])
+            i += 1
+    assert all(regex.fullmatch(c) for c in chars)
+    return chars
+
+
+def _literals(item):
+    """Return the set of characters one item of a parsed regex can match, or None if not a (small) literal set."""
+    op, av = item
+    if op == sre_constants.LITERAL:
+        return {chr(av)}
+    if op == sre_constants.IN:
+        chars = set()
+        for (op, av) in av:
+            if op == sre_constants.LITERAL:
+                chars.add(chr(av))
+            elif op == sre_constants.RANGE and av[1] - av[0] < _MAX_GUARD_CHARS:
+                chars.update(chr(c) for c in range(av[0], av[1] + 1))
+            else:
+                return None
+        return chars
+    if op in (sre_constants.MAX_REPEAT, sre_constants.MIN_REPEAT) and av[0] > 0 and len(av[2]) == 1:
+        return _literals(av[2][0])
+    if op == sre_constants.SUBPATTERN and len(av[-1]) == 1:
+        return _literals(av[-1][0])
+    if op == sre_constants.BRANCH:
+        chars = set()
+        for branch in av[1]:
+            branch_chars = _literals(branch[0]) if len(branch) == 1 else None
+            if branch_chars is None:
+                return None
+            chars |= branch_chars
+        return chars
+    return None
+
+
+def _required_chars(regex):
+    """
+    Return a small set of characters such that any match of the regex contains at least one of them, or None.
+    Only the top-level items of the regex are considered, and whitespaces are ignored (any text has some).
+    """
+    candidates = [_literals(item) for item in sre_parse.parse(regex.pattern, regex.flags)]
+    candidates = [c for c in candidates if c is not None and len(c) <= _MAX_GUARD_CHARS
+                  and not any(ch.isspace() for ch in c)]
+    return min(candidates, key=len) if candidates else None
+
+
+def _replace_str(old, new, text):
+    return text.replace(old, new)
+
+
+def _replace_chars(chars, replace, text):
+    for c in chars:
+        text = text.replace(c, replace)
+    return text
+
+
+def _guarded_sub(regex, replace, required_chars, text):
+    if any(c in text for c in required_chars):
+        return regex.sub(replace, text)
+    return text
+
+
+def _fuse_patterns(patterns):
+    """Convert the normalization patterns into a list of functions taking and returning a text."""
+    steps = []
+    for (typ, pattern, replace) in patterns:
+        if typ == STR:
+            steps.append(partial(_replace_str, pattern, replace))
+            continue
+        chars = _expand_simple_class(pattern) if '\\' not in replace else None
+        if chars is not None and len(chars) <= _MAX_EXPANDED_CHARS and not set(replace) & set(chars):
+            steps.append(partial(_replace_chars, chars, replace))
+            continue
+        required_chars = _required_chars(pattern)
+        if required_chars is not None:
+            steps.append(partial(_guarded_sub, pattern, replace, required_chars))
+        else:
+            steps.append(partial(pattern.sub, replace))
+    return steps
+
+
+_normalization_steps = _fuse_patterns(normalization_patterns)
+_leading_spaces_pattern = re.compile(r'(^|\n)\s+')
+_trailing_spaces_pattern = re.compile(r'\s+(\n|$)')
+
+
 def normalize_text(text, fix_encoding=False, strip_emojis=False):
     """
     Normalize text:
@@ -158,19 +276,16 @@ def normalize_text(text, fix_encoding=False, strip_emojis=False):
         # (203ms to process 164343 short sentences, against 31s with emoji)
         text = emoji_pattern.sub(' ', text)
 
-    # apply patterns in order
-    for i, (typ, pattern, replace) in enumerate(normalization_patterns):
-        if typ == REG:
-            text = pattern.sub(replace, text)
-        else:
-            text = text.replace(pattern, replace)
+    # apply patterns in order (see _fuse_patterns)
+    for step in _normalization_steps:
+        text = step(text)
 
     # normalize spaces
     text = spaces_pattern.sub(' ', text)
 
     # don't forget to normalise spaces in the beginning and end
-    text = re.sub(r'(^|\n)\s+', r'\1', text)
-    text = re.sub(r'\s+(\n|$)', r'\1', text)
+    text = _leading_spaces_pattern.sub(r'\1', text)
+    text = _trailing_spaces_pattern.sub(r'\1', text)
 
     return text
 
@@ -14,7 +14,11 @@ Rules are defined using a simple YAML syntax and can be of two types: *length-ba
 
     * Regular expressions can be quite expensive, so try to limit their complexity to the minimum required.
     * Rules are checked in the same order as they are defined, so it is advised to put the most generic / efficient
-      ones first.
+      ones first. To find out which rules reject the most sentences, and at what cost, run this module with
+      ``--stats`` on a file of sentences. You can also let the filter reorder the rules at runtime (``adaptive=True``).
+    * Patterns are compiled once and the number of matches of a pattern is computed at most once per sentence,
+      even if it is used by several rules. Patterns matching exactly one character (e.g. ``' '``, ``'\\p{L}'``,
+      ``'[/&:]'``) are cheap: they are all counted at once, in a single pass (see :py:class:`PatternCounter`).
 
 .. note::
 
@@ -114,14 +118,23 @@ Rules can additionnally specify ``examples`` and ``counterexamples`` that could
 """
 
 import regex
+import time
 import yaml
 import logging
+from itertools import islice
 from os import path
+from threading import Lock
+from typing import Iterable, Iterator, List, Optional
 
 from swisstext.cmd.scraping.interfaces import ISentenceFilter
 
 logger = logging.getLogger(__name__)
 
+# a pattern matching exactly one character whatever the context: a literal, an escape, a property or a class
+_SINGLE_CHAR_PATTERN = regex.compile(
+    r'[^\\^$.|?*+()\[\]{}]|\\[^A-Za-z0-9]|\\[dDsSwW]|\\[pP]\{\^?[\w=&. -]+\}|\\u[0-9a-fA-F]{4}'
+    r'|\[\^?\]?(?:[^\]\\\[]|\\.)*\]')
+
 
 # TODO: a good way to detect encoding errors is to compare the result of
 # len(re.findall('[^\W\d]')) and len(regex.findall('\p{L}'))
@@ -130,20 +143,179 @@ class PatternSentenceFilter(ISentenceFilter):
     """
     By default, rules are loaded from the default file ``pattern_sentence_filter.yaml`` in the current directory.
     You can override this by passing a path to the constructor (``rulespath`` argument).
+
+    Set ``stats`` to record how many sentences each rule evaluated and rejected, and the time it took
+    (see :py:meth:`Rules.print_stats`). With ``adaptive``, the rules are also reordered every ``reorder_every``
+    sentences, so that the ones rejecting the most sentences per unit of time come first (see :py:class:`Rules`).
     """
 
-    def __init__(self, rulespath=None):
+    def __init__(self, rulespath=None, stats=False, adaptive=False, reorder_every=1000):
         """Load rules from the default YAML file or the path provided."""
         if rulespath is None:
             rulespath = path.join(path.dirname(path.realpath(__file__)), 'pattern_sentence_filter.yaml')
 
         self.rulespath = rulespath
-        self.rules = Rules(yaml.safe_load(open(rulespath)))
+        self.rules = Rules(yaml.safe_load(open(rulespath)), stats=stats, adaptive=adaptive,
+                           reorder_every=reorder_every)
 
     def is_valid(self, sentence):
         """Returns true only if all the rules were respected."""
         return not self.rules.is_invalid(sentence)
 
+    def filter(self, sentences: List[str]) -> List[str]:
+        """Same as :py:meth:`filter_batch`."""
+        return self.filter_batch(sentences)
+
+    def filter_batch(self, sentences: List[str]) -> List[str]:
+        """
+        Return the valid sentences, like calling :py:meth:`is_valid` on each sentence. The rules depending only on
+        the length and on single char patterns are first checked on the whole batch at once using NumPy
+        (see :py:meth:`Rules.are_invalid`), and the other rules only run on the remaining sentences.
+
+        When statistics are recorded (``stats`` or ``adaptive``), the sentences are checked one by one instead.
+        """
+        if not sentences or self.rules.stats:
+            return [s for s in sentences if self.is_valid(s)]
+
+        invalid = self.rules.are_invalid(sentences)
+        return [s for s, is_invalid in zip(sentences, invalid) if not is_invalid]
+
+    def iter_filter(self, sentences: Iterable[str], batch_size=1024) -> Iterator[str]:
+        """
+        Same as :py:meth:`filter`, but consume the sentences in batches of ``batch_size`` (so the NumPy pre-screen of
+        :py:meth:`filter_batch` still applies) and yield the valid ones.
+        """
+        sentences = iter(sentences)
+        batch = list(islice(sentences, batch_size))
+        while batch:
+            yield from self.filter_batch(batch)
+            batch = list(islice(sentences, batch_size))
+
+
+class PatternCounter:
+    """
+    Compiles the patterns of the rules and counts their matches (the number of items returned by ``findall``).
+
+    Identical patterns are compiled once and, using :py:class:`Counts`, counted at most once per sentence.
+    Patterns matching exactly one character whatever the context (e.g. ``' '``, ``'\\p{L}'`` or ``'[/&:]'``)
+    are all counted in a single pass over the sentence: each character is translated into the id of the set of
+    single char patterns it matches (this is cached), then the occurrences of each id are counted.
+    """
+
+    def __init__(self):
+        self._patterns = {}  # pattern string -> compiled pattern
+        self._single_char = set()  # compiled patterns matching exactly one character
+        self._signatures = []  # signature id -> single char patterns matched
+        self._table = _SignatureTable(self)  # translation table: character -> signature id
+        self._lock = Lock()  # guards the new signatures, the filter is shared by the pipeline workers
+
+    def compile(self, pattern: str):
+        """Compile a pattern, or return the compiled pattern if it was already seen."""
+        compiled = self._patterns.get(pattern)
+        if compiled is None:
+            compiled = self._patterns[pattern] = regex.compile(pattern)
+            if _SINGLE_CHAR_PATTERN.fullmatch(pattern):
+                self._single_char.add(compiled)
+                self._signatures = []
+                self._table = _SignatureTable(self)
+        return compiled
+
+    def counts(self, s: str) -> 'Counts':
+        """Return the (lazy) pattern counts of a sentence."""
+        return Counts(s, self)
+
+    def is_single_char(self, pattern) -> bool:
+        return pattern in self._single_char
+
+    def count_chars(self, s: str, counts: dict):
+        """Count the matches of all the single char patterns in one pass and store them into counts."""
+        for p in self._single_char:
+            counts[p] = 0
+        translated = s.translate(self._table)
+        for sid, patterns in enumerate(self._signatures):
+            if patterns:
+                n = translated.count(chr(sid))
+                if n:
+                    for p in patterns:
+                        counts[p] += n
+
+    def count_chars_batch(self, sentences: List[str]):
+        """
+        Count the matches of all the single char patterns in a batch of sentences, using NumPy.
+
+        :return: a tuple (patterns, counts), where counts is an array of shape (len(sentences), len(patterns))
+        """
+        import numpy as np
+
+        patterns = list(self._single_char)
+        # translate the whole batch at once, then count the (sentence, signature) pairs
+        codes = ''.join(sentences).translate(self._table)
+        codes = np.frombuffer(codes.encode('utf-32-le'), dtype=np.uint32)
+        rows = np.repeat(np.arange(len(sentences)), [len(s) for s in sentences])
+        signatures = list(self._signatures)
+        n = len(signatures)
+        sig_counts = np.bincount(rows * n + codes, minlength=len(sentences) * n).reshape(len(sentences), n)
+        membership = np.array([[p in sig for p in patterns] for sig in signatures], dtype=np.int64)
+        return patterns, sig_counts @ membership.reshape(n, len(patterns))
+
+    def _signature_id(self, c: str) -> int:
+        patterns = [p for p in self._single_char if p.match(c)]
+        with self._lock:
+            for sid, signature in enumerate(self._signatures):
+                if signature == patterns:
+                    return sid
+            sid = len(self._signatures)
+            self._signatures.append(patterns)
+            return sid
+
+
+class _SignatureTable(dict):
+    """Translation table for :py:meth:`str.translate`, filled on first lookup (see :py:class:`PatternCounter`)."""
+
+    def __init__(self, counter: PatternCounter):
+        super().__init__()
+        self.counter = counter
+
+    def __missing__(self, c: int):
+        value = self[c] = self.counter._signature_id(chr(c))
+        return value
+
+
+class Counts(dict):
+    """
+    The number of matches of compiled patterns in one sentence, computed on first access: ``counts[pattern]``.
+    """
+
+    def __init__(self, s: str, counter: PatternCounter = None):
+        super().__init__()
+        self.s = s
+        self.counter = counter
+
+    def count(self, pattern, limit: int = None) -> int:
+        """
+        Return the number of matches of a pattern, but stop counting at ``limit`` if it is not already known.
+        This is enough to check bounds, e.g. a limit of 1 just checks if there is at least one match.
+        """
+        n = self.get(pattern)
+        if n is not None:
+            return n
+        if limit is None or (self.counter is not None and self.counter.is_single_char(pattern)):
+            return self[pattern]
+        if limit == 1:
+            n = 0 if pattern.search(self.s) is None else 1
+        else:
+            n = sum(1 for _ in islice(pattern.finditer(self.s), limit))
+        if n < limit:
+            self[pattern] = n  # this is the exact count
+        return n
+
+    def __missing__(self, pattern):
+        if self.counter is not None and self.counter.is_single_char(pattern):
+            self.counter.count_chars(self.s, self)
+            return self[pattern]
+        n = self[pattern] = len(pattern.findall(self.s))
+        return n
+
 
 class MinMax:
     """Encapsulates and handles min/max bounds. A bound set to -1 will be ignored."""
@@ -152,24 +324,38 @@ class MinMax:
         self.min = min
         self.max = max
 
-    def is_invalid(self, s) -> bool:
+    def is_invalid(self, s, counts: Counts = None) -> bool:
         return self.is_out_of_range(len(s))
 
     def is_out_of_range(self, n) -> bool:
         return (self.min >= 0 and self.min > n) or (self.max >= 0 and self.max < n)
 
+    def out_of_range_mask(self, values):
+        """Vectorized :py:meth:`is_out_of_range`: return a boolean mask for a NumPy array of values."""
+        return ((values < self.min) if self.min >= 0 else False) | ((values > self.max) if self.max >= 0 else False)
+
+    @property
+    def limit(self) -> Optional[int]:
+        """The smallest n such that the bounds give the same result for all numbers >= n (None if unbounded)."""
+        if self.max >= 0:
+            return self.max + 1
+        return self.min if self.min >= 0 else None
+
     def __repr__(self):
         return "(min={}, max={})".format(self.min, self.max)
 
 
 class Compare:
-    def __init__(self, num, denom, ratio):
-        self.num = regex.compile(num)
-        self.denom = regex.compile(denom)
+    def __init__(self, num, denom, ratio, counter: PatternCounter = None):
+        counter = counter or PatternCounter()
+        self.num = counter.compile(num)
+        self.denom = counter.compile(denom)
         self.ratio = MinMax(**ratio)
 
-    def is_invalid(self, s):
-        ratio = len(self.num.findall(s)) / (len(self.denom.findall(s)) + 1)
+    def is_invalid(self, s, counts: Counts = None):
+        if counts is None:
+            counts = Counts(s)
+        ratio = counts[self.num] / (counts[self.denom] + 1)
         return self.ratio.is_out_of_range(ratio)
 
     def __repr__(self):
@@ -179,19 +365,25 @@ class Compare:
 class Find:
     """Handles pattern-based rule logic (find entry in yaml)"""
 
-    def __init__(self, pattern, count=None, ratio=None):
+    def __init__(self, pattern, count=None, ratio=None, counter: PatternCounter = None):
         if count is None and ratio is None:
             logger.warning(f"{pattern}: missing find condition: count or ratio...")
-        self.pattern = regex.compile(pattern)
+        self.pattern = (counter or PatternCounter()).compile(pattern)
         self.count = MinMax(**count) if count else None
         self.ratio = MinMax(**ratio) if ratio else None
 
-    def is_invalid(self, s):
-        matches = self.pattern.findall(s)
-        nb_matches = len(matches)
+    def is_invalid(self, s, counts: Counts = None):
+        if counts is None:
+            counts = Counts(s)
+        if self.ratio is None and self.count is not None:
+            # only the bounds matter, no need to count all the matches
+            nb_matches = counts.count(self.pattern, self.count.limit)
+        else:
+            nb_matches = counts[self.pattern]
         if self.count and self.count.is_out_of_range(nb_matches):
             return True
         if self.ratio:
+            if not s: return False  # no ratio for empty sentences (rejected by the length rules)
             ratio = nb_matches / len(s)
             return self.ratio.is_out_of_range(ratio)
         return False
@@ -203,35 +395,46 @@ class Find:
 class Rule:
     """Encapsulates one rule"""
 
-    def __init__(self, id, descr, find=None, compare=None, length=None, examples=None, counterexamples=None, **kwargs):
+    def __init__(self, id, descr, find=None, compare=None, length=None, examples=None, counterexamples=None,
+                 counter: PatternCounter = None, **kwargs):
         self.id = id
         self.descr = descr
         self.examples = examples
         self.counterexamples = counterexamples
+        self.counter = counter or PatternCounter()
+        self.num_evaluated = 0  #: number of sentences checked (only recorded if enabled in :py:class:`Rules`)
+        self.num_rejected = 0  #: number of sentences rejected (idem)
+        self.time_spent = 0.  #: cumulative time spent checking sentences, in seconds (idem)
         self.iff = []
         # TODO: better way ?
         if 'if' in kwargs:  # if is a reserved keyword in python
             if 'length' in kwargs['if']:
                 self.iff.append(MinMax(**kwargs['if']['length']))
             if 'pattern' in kwargs['if']:
-                self.iff.append(Find(**kwargs['if']['pattern']))
+                self.iff.append(Find(**kwargs['if']['pattern'], counter=self.counter))
 
         if length is not None:
             self.logic = MinMax(**length) if length else None
         elif find is not None:
-            self.logic = Find(**find)
+            self.logic = Find(**find, counter=self.counter)
         elif compare is not None:
-            self.logic = Compare(**compare)
+            self.logic = Compare(**compare, counter=self.counter)
         else:
             raise Exception('Found a rule with no length, find or ratio defined.')
 
-    def is_applicable(self, s) -> bool:
+    def is_applicable(self, s, counts: Counts = None) -> bool:
         """Check for the if condition"""
-        return not any([iff.is_invalid(s) for iff in self.iff])
+        return not any(iff.is_invalid(s, counts) for iff in self.iff)
 
-    def is_invalid(self, s) -> bool:
-        if self.is_applicable(s):
-            if self.logic.is_invalid(s):
+    def is_invalid(self, s, counts: Counts = None) -> bool:
+        """
+        Check the rule. ``counts`` holds the pattern counts already computed for ``s`` by other rules, if any
+        (see :py:meth:`PatternCounter.counts`).
+        """
+        if counts is None:
+            counts = self.counter.counts(s)
+        if self.is_applicable(s, counts):
+            if self.logic.is_invalid(s, counts):
                 logger.debug("%s FAILED on |%s|" % (self, s))
                 return True
             return False
@@ -239,6 +442,32 @@ class Rule:
             # logger.debug("SKIPPED   RULE %s: |%s|" % (self.descr, s))
             return False
 
+    def prescreen(self, lengths, counts: dict):
+        """
+        Vectorized :py:meth:`is_invalid`, for rules without condition depending only on the length of the sentences
+        and on single char patterns (see :py:meth:`PatternCounter.count_chars_batch`).
+
+        :param lengths: a NumPy array with the length of each sentence (all > 0)
+        :param counts: the number of matches of each single char pattern, as NumPy arrays
+        :return: a boolean mask of the sentences rejected by this rule, or None if the rule can't be vectorized
+        """
+        import numpy as np
+
+        logic = self.logic
+        if self.iff or logic is None:
+            return None
+        if isinstance(logic, MinMax):
+            return logic.out_of_range_mask(lengths)
+        if isinstance(logic, Find) and logic.pattern in counts:
+            n = counts[logic.pattern]
+            mask = logic.count.out_of_range_mask(n) if logic.count else np.zeros(len(lengths), dtype=bool)
+            if logic.ratio:
+                mask = mask | logic.ratio.out_of_range_mask(n / lengths)
+            return mask
+        if isinstance(logic, Compare) and logic.num in counts and logic.denom in counts:
+            return logic.ratio.out_of_range_mask(counts[logic.num] / (counts[logic.denom] + 1))
+        return None
+
     def self_check(self, verbose=True) -> bool:
         passed = True
         for examples, expected in [(self.examples, True), (self.counterexamples, False)]:
@@ -262,27 +491,110 @@ class Rule:
 class Rules:
     """
     This class represents a list of rules.
+
+    As a sentence is invalid as soon as one rule fails, the order in which rules are checked doesn't change the
+    results, only the cost. In adaptive mode, the rules are periodically sorted by decreasing
+    ``num_rejected / time_spent``: checking the cheap rules rejecting many sentences first minimizes the average
+    time per sentence (assuming rules are independent).
     """
 
-    def __init__(self, rules_dict):
+    def __init__(self, rules_dict, stats=False, adaptive=False, reorder_every=1000):
         """
         :param rules_dict: a dictionary of rules (as loaded by yaml)
+        :param stats: if set, record the number of evaluations, rejections and the time spent by each rule
+        :param adaptive: if set, reorder the rules every ``reorder_every`` sentences (implies ``stats``)
+        :param reorder_every: number of sentences between two reorderings (adaptive mode only)
         """
-        self.rules = [Rule(idx + 1, **r) for (idx, r) in enumerate(rules_dict)]  # [:1]
-
-    def is_invalid(self, sentence: str) -> bool:
+        if reorder_every < 1:
+            raise ValueError('reorder_every should be > 0')
+        #: compiles the patterns shared by the rules, and counts them
+        self.counter = PatternCounter()
+        self.rules = [Rule(idx + 1, **r, counter=self.counter) for (idx, r) in enumerate(rules_dict)]  # [:1]
+        self.stats = stats or adaptive  #: whether statistics are recorded
+        self.adaptive = adaptive  #: whether the rules are reordered at runtime
+        self.reorder_every = reorder_every  #: number of sentences between two reorderings
+        self.num_sentences = 0  #: number of sentences checked (only recorded if stats is set)
+        self.order = list(self.rules)  #: the rules, in the order they are checked
+
+    def is_invalid(self, sentence: str, counts: Counts = None) -> bool:
         """Returns true if any rule that apply failed."""
-        for idx, r in enumerate(self.rules):
-            if r.is_invalid(sentence):
-                # print("RULE %d %s FAILED on |%s|" % (idx, r.descr, sentence))
+        if counts is None:
+            counts = self.counter.counts(sentence)  # each pattern is counted at most once
+        if not self.stats:
+            for r in self.order:
+                if r.is_invalid(sentence, counts):
+                    return True
+            return False
+
+        self.num_sentences += 1
+        if self.adaptive and self.num_sentences % self.reorder_every == 0:
+            self.reorder()
+        for r in self.order:
+            start = time.perf_counter()
+            invalid = r.is_invalid(sentence, counts)
+            r.time_spent += time.perf_counter() - start
+            r.num_evaluated += 1
+            if invalid:
+                r.num_rejected += 1
                 return True
         return False
 
+    def are_invalid(self, sentences: List[str]) -> List[bool]:
+        """
+        Batch version of :py:meth:`is_invalid`. The rules that can be vectorized (see :py:meth:`Rule.prescreen`) are
+        checked on the whole batch using NumPy, the other rules only on the sentences passing this pre-screen.
+        Empty sentences always go through :py:meth:`is_invalid`.
+        """
+        import numpy as np
+
+        lengths = np.array([len(s) for s in sentences])
+        patterns, counts = self.counter.count_chars_batch(sentences)
+        by_pattern = {p: counts[:, i] for i, p in enumerate(patterns)}
+        safe_lengths = np.where(lengths > 0, lengths, 1)  # avoid divisions by zero in ratios
+        rejected = np.zeros(len(sentences), dtype=bool)
+        other_rules = []
+        for r in self.rules:
+            mask = r.prescreen(safe_lengths, by_pattern)
+            if mask is None:
+                other_rules.append(r)
+            else:
+                rejected |= mask
+
+        results = []
+        for s, is_rejected, row in zip(sentences, rejected.tolist(), counts.tolist()):
+            if is_rejected and s:
+                results.append(True)
+                continue
+            s_counts = self.counter.counts(s)
+            s_counts.update(zip(patterns, row))  # the single char patterns are already counted
+            if s:
+                results.append(any(r.is_invalid(s, s_counts) for r in other_rules))
+            else:
+                results.append(self.is_invalid(s, s_counts))
+        return results
+
+    def reorder(self):
+        """Sort the rules by decreasing number of rejections per second. Rules never evaluated come first."""
+        key = lambda r: r.num_rejected / r.time_spent if r.time_spent > 0 else float('inf')
+        self.order = sorted(self.rules, key=key, reverse=True)
+
     def print_rules(self):
         """Prints all the rules, useful for debug."""
         for idx, r in enumerate(self.rules):
             print(idx, "=>", r.__repr__())
 
+    def print_stats(self, file=None):
+        """Prints the statistics of each rule (see the ``stats`` argument), in the order they are checked."""
+        total = sum(r.time_spent for r in self.rules)
+        print(f'{self.num_sentences} sentences, {total * 1e6 / max(self.num_sentences, 1):.1f} us/sentence', file=file)
+        print(f'{"id":>3} {"evaluated":>9} {"rejected":>8} {"rate":>6} {"us/eval":>8} {"time":>6}  descr', file=file)
+        for r in self.order:
+            rate = r.num_rejected / r.num_evaluated if r.num_evaluated else 0
+            cost = r.time_spent * 1e6 / r.num_evaluated if r.num_evaluated else 0
+            share = r.time_spent / total if total else 0
+            print(f'{r.id:3d} {r.num_evaluated:9d} {r.num_rejected:8d} {rate:6.1%} {cost:8.2f} {share:6.1%}  {r.descr}',
+                  file=file)
+
     def __getitem__(self, idx):
         return self.rules[idx]
 
@@ -298,13 +610,18 @@ if __name__ == "__main__":
     parser.add_argument('-i', '--input', type=argparse.FileType('r'), default='-')
     parser.add_argument('-o', '--out', type=argparse.FileType('w'), default='-')
     parser.add_argument('-r', '--rules-file', default=None)
+    parser.add_argument('--stats', action='store_true', help='print the statistics of each rule on stderr')
+    parser.add_argument('--adaptive', action='store_true', help='reorder the rules at runtime')
 
     args = parser.parse_args()
 
     logging.basicConfig(level=logging.INFO, stream=sys.stderr, format='%(levelname)s: %(msg)s')
 
-    psf = PatternSentenceFilter(rulespath=args.rules_file)
+    psf = PatternSentenceFilter(rulespath=args.rules_file, stats=args.stats, adaptive=args.adaptive)
 
     args.out.write('\n'.join(
         t for t in args.input if psf.is_valid(t)
     ))
+
+    if args.stats:
+        psf.rules.print_stats(file=sys.stderr)
@@ -0,0 +1,171 @@
+"""
+This module contains the :py:class:`SessionFetcher`, used by the crawlers (see :py:class:`~.bs_crawler.BsCrawler`)
+to download pages through a shared :py:class:`requests.Session`.
+
+Contrary to a plain ``requests.get``, the session keeps the connections alive between requests: consecutive pages
+of the same host (the common case when crawling child URLs) reuse the same TCP/TLS connection instead of paying
+for the DNS lookup, TCP handshake and TLS negotiation again. The number of hosts and of connections per host
+kept in the pool are configurable.
+
+The fetcher also counts the requests sent and the connections opened, so the connection reuse ratio can be reported
+at the end of a crawl (see :py:meth:`SessionFetcher.log_stats`).
+
+Finally, the body of the responses is streamed: the headers can be checked before anything is downloaded, and
+the download is aborted as soon as the body exceeds :py:attr:`SessionFetcher.max_bytes` or takes more than
+:py:attr:`SessionFetcher.download_timeout` seconds. This bounds the memory used per worker and the time a slow
+host can hold a worker, which the ``timeout`` of requests (the maximum time *between two bytes*) doesn't.
+Note that the limits are checked after each chunk of :py:attr:`SessionFetcher.chunk_size` bytes.
+"""
+
+import logging
+import time
+from threading import Lock
+from typing import Callable
+
+import requests
+from get_html.env_defined_get import DEFAULT_USER_AGENT, GET_TIMEOUT
+from requests.adapters import HTTPAdapter
+
+from ..interfaces import ICrawler
+
+logger = logging.getLogger(__name__)
+
+
+class _Counter:
+    """A thread-safe counter."""
+
+    def __init__(self):
+        self.value = 0
+        self._lock = Lock()
+
+    def increment(self):
+        with self._lock:
+            self.value += 1
+
+
+class _CountingPoolMixin:
+    # the counter is set on the dynamic subclasses created in _CountingAdapter
+    new_connections: _Counter = None
+
+    def _new_conn(self):
+        self.new_connections.increment()
+        return super()._new_conn()
+
+
+class _CountingAdapter(HTTPAdapter):
+    """An :py:class:`~requests.adapters.HTTPAdapter` counting the requests sent and the connections opened."""
+
+    def __init__(self, **kwargs):
+        self.requests = _Counter()
+        self.new_connections = _Counter()
+        super().__init__(**kwargs)
+
+    def init_poolmanager(self, *args, **kwargs):
+        super().init_poolmanager(*args, **kwargs)
+        # pools are created lazily (one per host) by the pool manager, using those classes
+        self.poolmanager.pool_classes_by_scheme = {
+            scheme: type(cls.__name__, (_CountingPoolMixin, cls), dict(new_connections=self.new_connections))
+            for scheme, cls in self.poolmanager.pool_classes_by_scheme.items()}
+
+    def send(self, *args, **kwargs):
+        self.requests.increment()
+        return super().send(*args, **kwargs)
+
+
+class SessionFetcher:
+    """
+    Download pages using a pooled :py:class:`requests.Session`, safe to share between threads.
+    It behaves like the default ``do_get`` of ``get_html``: SSL certificates are not verified and the content is
+    read (and decoded) before returning the response.
+    """
+
+    #: size of the chunks read from the body of the responses
+    chunk_size = 8 * 1024
+
+    def __init__(self, pool_hosts=100, pool_per_host=10, pool_block=False, timeout=GET_TIMEOUT,
+                 user_agent=DEFAULT_USER_AGENT, max_bytes=None, download_timeout=None):
+        """
+        :param pool_hosts: number of hosts for which connections are kept alive
+        :param pool_per_host: maximum number of connections kept alive per host
+        :param pool_block: if set, never open more than *pool_per_host* connections to the same host,
+            i.e. wait for a connection to be available instead
+        :param timeout: timeout of the GET requests, in seconds
+        :param user_agent: the User-Agent header
+        :param max_bytes: if set, maximum size of a (decoded) response body, in bytes
+        :param download_timeout: if set, maximum time to download a response (headers and body), in seconds
+        """
+        self.timeout = timeout  #: timeout of the GET requests, in seconds
+        self.max_bytes = max_bytes  #: maximum size of a response body, in bytes (None means no limit)
+        #: maximum time to download a response, in seconds (None means no limit)
+        self.download_timeout = download_timeout
+        self._adapter = _CountingAdapter(pool_connections=pool_hosts, pool_maxsize=pool_per_host, pool_block=pool_block)
+        self.session = requests.Session()  #: the underlying session
+        self.session.mount('http://', self._adapter)
+        self.session.mount('https://', self._adapter)
+        self.session.headers['User-Agent'] = user_agent
+
+    def get(self, url: str, headers: dict = None,
+            check_headers: Callable[[requests.Response], None] = None) -> requests.Response:
+        """
+        Do a GET request and read the whole content.
+        Besides :py:class:`requests.RequestException`, a
+        :py:class:`~swisstext.cmd.scraping.interfaces.ICrawler.CrawlError` named ``TooLargeError``
+        or ``DownloadTimeoutError`` is raised if the limits are exceeded.
+
+        :param url: the URL
+        :param headers: additional headers, for example ``If-None-Match``
+        :param check_headers: called before reading the body. It may raise an exception to abort the download.
+        """
+        start = time.time()
+        resp = self.session.get(url, headers=headers, verify=False, stream=True, timeout=self.timeout)
+        try:
+            if check_headers is not None:
+                check_headers(resp)
+            length = resp.headers.get('content-length', '')
+            if self.max_bytes is not None and length.isdigit() and int(length) > self.max_bytes:
+                raise ICrawler.CrawlError(name='TooLargeError', message=f'Content-Length={length}')
+            self._read_body(resp, start)
+        except:
+            resp.close()  # the connection is not reusable
+            raise
+        # the content is read, so the connection is back in the pool
+        return resp
+
+    def _read_body(self, resp: requests.Response, start: float):
+        # same as resp.content, but checking the limits while reading.
+        # This triggers content decoding, thus can generate ContentDecodingError.
+        chunks, size = [], 0
+        for chunk in resp.iter_content(self.chunk_size):
+            chunks.append(chunk)
+            size += len(chunk)
+            if self.max_bytes is not None and size > self.max_bytes:
+                raise ICrawler.CrawlError(name='TooLargeError', message=f'more than {self.max_bytes} bytes')
+            if self.download_timeout is not None and time.time() - start > self.download_timeout:
+                raise ICrawler.CrawlError(name='DownloadTimeoutError', message=f'more than {self.download_timeout}s')
+        resp._content = b''.join(chunks)
+        resp._content_consumed = True
+
+    @property
+    def num_requests(self) -> int:
+        """Number of requests sent (redirects included)."""
+        return self._adapter.requests.value
+
+    @property
+    def num_connections(self) -> int:
+        """Number of connections opened."""
+        return self._adapter.new_connections.value
+
+    @property
+    def reuse_ratio(self) -> float:
+        """Ratio of requests sent on an existing connection."""
+        n = self.num_requests
+        return (n - self.num_connections) / n if n > 0 else 0.
+
+    def log_stats(self):
+        """Log the number of requests and connections."""
+        logger.info('SessionFetcher: %d requests, %d connections opened (reuse ratio=%.0f%%)' % (
+            self.num_requests, self.num_connections, self.reuse_ratio * 100))
+
+    def close(self):
+        """Close all the connections."""
+        self.session.close()
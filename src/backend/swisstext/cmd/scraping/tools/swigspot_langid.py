@@ -1,7 +1,12 @@
 from ..interfaces import ISgDetector
 
+import json
+import logging
+import os
 import pickle
 import re
+import shutil
+import tempfile
 from os import path
 from typing import List
 
@@ -11,8 +16,30 @@ _model_file = "swigspot_langid.pickle"
 _model_version = 1
 _model_version_description = "TfidfVectorizer_ngrams3-5_f6000_logreg"
 _model_labels = ['de', 'fr', 'en', 'it', 'sg']
+_compiled_model_dir = "swigspot_langid.model"  # name of the compiled model directory, see export_model
 
-_RR = re.compile("[^\w \.,]|\d|_")  # sanitization regex: remove all but letters, dots and commas
+_WHITE_SPACES = re.compile(r"\s\s+")  # same as sklearn's char analyzer
+
+_RR = re.compile(r"[^\w \.,]|\d|_")  # sanitization regex: remove all but letters, dots and commas
+_RR_SPACES = re.compile(" +(?=[ .])")  # squeeze spaces and remove spaces before dots
+
+
+class _SanitizeTable(dict):
+    """
+    Translation table for :py:meth:`str.translate` removing the characters matched by ``_RR``.
+    As all the unicode characters can't be listed upfront, they are added on first lookup.
+    """
+
+    def __missing__(self, c: int):
+        value = None if _RR.match(chr(c)) else c
+        self[c] = value
+        return value
+
+
+_SANITIZE_TABLE = _SanitizeTable()
+
+
+logger = logging.getLogger(__name__)
 
 
 class SwigspotLangid(ISgDetector):
@@ -35,23 +62,190 @@ class SwigspotLangid(ISgDetector):
 
     def predict(self, sentences: List[str]) -> List[float]:
         if sentences is not None and len(sentences) > 0:
-            san = (self.sanitize(s) for s in sentences)
-            return [proba[4] for proba in self.pipe.predict_proba(san)]
+            san = [self.sanitize(s) for s in sentences]
+            return [proba[4] for proba in self.predict_proba(san)]
         else:
             return []
 
     def predict_lang(self, sentences: List[str]) -> List[float]:
         if sentences is not None and len(sentences) > 0:
-            import numpy as np
-            san = (self.sanitize(s) for s in sentences)
+            san = [self.sanitize(s) for s in sentences]
             return [[_model_labels[proba.argmax()], s] + proba.tolist()
-                    for s, proba in zip(sentences, self.pipe.predict_proba(san))]
+                    for s, proba in zip(sentences, self.predict_proba(san))]
         else:
             return []
 
-    def sanitize(self, s: str) -> str:
-        san = s.lower()
-        san = re.sub(_RR, "", san)
-        san = re.sub(" +", " ", san)
-        san = re.sub(" \.", ".", san)
-        return san.strip()
+    def predict_proba(self, sanitized: List[str]):
+        """
+        Return the probabilities of each label (in the order of ``_model_labels``) for already sanitized sentences,
+        as a NumPy array of shape (n_sentences, n_labels).
+        """
+        return self.pipe.predict_proba(sanitized)
+
+    @staticmethod
+    def sanitize(s: str) -> str:
+        """
+        Lowercase the sentence, remove everything except letters, spaces, commas and dots, squeeze spaces and
+        remove the spaces before dots.
+        """
+        return _RR_SPACES.sub("", s.lower().translate(_SANITIZE_TABLE)).strip()
+
+
+class CompiledSwigspotLangid(SwigspotLangid):
+    """
+    Same model as :py:class:`SwigspotLangid`, but loaded from a compiled, unpickled format (see :py:func:`export_model`).
+
+    The n-gram vocabulary, the IDF vector and the logistic regression coefficients are plain NumPy arrays, memory
+    mapped in read-only mode: instantiation takes a few milliseconds and all the processes using the same model share
+    its pages. The predictions (TF-IDF vectorization and sparse dot product) are computed for the whole batch at once
+    with NumPy, and are the same as the ones of :py:class:`SwigspotLangid` up to floating point rounding.
+
+    If ``model_dir`` is not set, the compiled model is looked up in the package directory (export it there at
+    install time by running this module, see :py:func:`export_model`), then in the user cache directory
+    (``$XDG_CACHE_HOME/swisstext``, by default ``~/.cache/swisstext``). If it is in neither, it is exported to the
+    cache directory from the pickle, which requires a scikit-learn version able to load it.
+    """
+
+    def __init__(self, model_dir: str = None):
+        """
+        :param model_dir: the directory of the compiled model, as written by :py:func:`export_model`
+        """
+        import numpy as np
+
+        if model_dir is None:
+            model_dir = _find_compiled_model()
+
+        with open(path.join(model_dir, 'model.json')) as f:
+            meta = json.load(f)
+        self.min_n, self.max_n = meta['ngram_range']
+        self.lowercase = meta['lowercase']
+        self.sublinear_tf = meta['sublinear_tf']
+
+        load = lambda name: np.load(path.join(model_dir, f'{name}.npy'), mmap_mode='r')
+        self.ngrams = load('ngrams')  #: the vocabulary, sorted
+        self.features = load('features')  #: the feature index of each n-gram in :py:attr:`ngrams`
+        self.idf = load('idf')  #: the IDF of each feature
+        self.coef = load('coef')  #: the logistic regression coefficients, of shape (n_features, n_labels)
+        self.intercept = load('intercept')  #: the logistic regression intercepts
+
+    def predict_proba(self, sanitized: List[str]):
+        import numpy as np
+
+        # extract the character n-grams, like sklearn's "char" analyzer
+        ngrams, lengths = [], []
+        for s in sanitized:
+            if self.lowercase:
+                s = s.lower()
+            s = _WHITE_SPACES.sub(" ", s)
+            grams = [s[i:i + n] for n in range(self.min_n, min(self.max_n, len(s)) + 1)
+                     for i in range(len(s) - n + 1)]
+            ngrams.extend(grams)
+            lengths.append(len(grams))
+
+        # lookup the n-grams in the vocabulary (the dtype of ngrams is large enough to avoid truncation)
+        rows = np.repeat(np.arange(len(sanitized)), lengths)
+        ngrams = np.array(ngrams, dtype=self.ngrams.dtype)
+        pos = np.minimum(np.searchsorted(self.ngrams, ngrams), len(self.ngrams) - 1)
+        found = self.ngrams[pos] == ngrams
+        rows, cols = rows[found], self.features[pos[found]]
+
+        # term frequencies => l2-normalized tf-idf
+        keys, tf = np.unique(rows * len(self.idf) + cols, return_counts=True)
+        rows, cols = keys // len(self.idf), keys % len(self.idf)
+        weights = (np.log(tf) + 1 if self.sublinear_tf else tf) * self.idf[cols]
+        norms = np.sqrt(np.bincount(rows, weights * weights, minlength=len(sanitized)))
+        weights /= norms[rows]
+
+        # one-vs-rest logistic regression: the sigmoids are normalized to sum to one
+        scores = np.tile(np.asarray(self.intercept), (len(sanitized), 1))
+        np.add.at(scores, rows, weights[:, None] * self.coef[cols])
+        proba = 1. / (1. + np.exp(-scores))
+        proba /= proba.sum(axis=1, keepdims=True)
+        return proba
+
+
+def _find_compiled_model() -> str:
+    # the model exported at install time, else the one in the user cache (exported on first use)
+    packaged = path.join(path.dirname(path.realpath(__file__)), _compiled_model_dir)
+    if path.exists(packaged):
+        return packaged
+    cache_dir = os.environ.get('XDG_CACHE_HOME') or path.expanduser(path.join('~', '.cache'))
+    cached = path.join(cache_dir, 'swisstext', _compiled_model_dir)
+    if not path.exists(cached):
+        logger.info(f'compiled SwigspotLangid model not found, exporting it to {cached}')
+        os.makedirs(path.dirname(cached), exist_ok=True)
+        # export to a private directory first: several processes (e.g. an AnalysisPool) may export at once,
+        # and there is no half-written model if interrupted
+        tmp_dir = tempfile.mkdtemp(prefix=_compiled_model_dir + '.', dir=path.dirname(cached))
+        try:
+            export_model(tmp_dir)
+            os.replace(tmp_dir, cached)
+        except Exception as e:
+            shutil.rmtree(tmp_dir, ignore_errors=True)
+            if not path.exists(cached):  # else, another process exported it first
+                raise RuntimeError(
+                    f'The compiled SwigspotLangid model is neither in {packaged} nor in {cached}, and exporting it '
+                    f'failed ({e!r}). Export it with a scikit-learn version able to load the pickle: '
+                    f'python -m swisstext.cmd.scraping.tools.swigspot_langid [model_dir]') from e
+    return cached
+
+
+def export_model(model_dir: str, pipe=None):
+    """
+    Convert a SwigSpot model (a scikit-learn pipeline made of a ``TfidfVectorizer`` and a one-vs-rest
+    ``LogisticRegression``, either with ``multi_class='ovr'`` or wrapped in a ``OneVsRestClassifier``) into the
+    compiled format of :py:class:`CompiledSwigspotLangid`: a directory holding
+    ``model.json`` (the vectorizer options) and one ``.npy`` file per array.
+
+    :param model_dir: the output directory, created if needed
+    :param pipe: the scikit-learn pipeline, by default the one of :py:class:`SwigspotLangid`
+    :raises ValueError: if the pipeline uses options not supported by :py:class:`CompiledSwigspotLangid`
+    """
+    import numpy as np
+
+    if pipe is None:
+        pipe = SwigspotLangid().pipe
+    vec, clf = pipe.steps[0][1], pipe.steps[-1][1]
+
+    if vec.analyzer != 'char' or vec.strip_accents is not None or vec.preprocessor is not None or vec.binary:
+        raise ValueError('Unsupported vectorizer: only plain char analyzers are supported')
+    if not vec.use_idf or vec.norm != 'l2':
+        raise ValueError('Unsupported vectorizer: only l2-normalized tf-idf is supported')
+    if hasattr(clf, 'estimators_'):  # OneVsRestClassifier: one binary classifier per label
+        coef = np.vstack([e.coef_ for e in clf.estimators_])
+        intercept = np.concatenate([e.intercept_ for e in clf.estimators_])
+    elif getattr(clf, 'multi_class', None) == 'ovr':  # recent scikit-learn versions are always multinomial
+        coef, intercept = clf.coef_, clf.intercept_
+    else:
+        raise ValueError('Unsupported classifier: only one-vs-rest logistic regressions are supported')
+    if coef.shape[0] < 2:
+        raise ValueError('Unsupported classifier: at least three labels are required')
+
+    min_n, max_n = vec.ngram_range
+    ngrams = sorted(vec.vocabulary_)
+    os.makedirs(model_dir, exist_ok=True)
+    arrays = dict(
+        ngrams=np.array(ngrams, dtype=f'U{max_n}'),
+        features=np.array([vec.vocabulary_[g] for g in ngrams], dtype=np.int64),
+        idf=np.asarray(vec.idf_, dtype=np.float64),
+        coef=np.ascontiguousarray(coef.T, dtype=np.float64),
+        intercept=np.asarray(intercept, dtype=np.float64))
+    for name, array in arrays.items():
+        np.save(path.join(model_dir, f'{name}.npy'), array)
+
+    with open(path.join(model_dir, 'model.json'), 'w') as f:
+        json.dump(dict(
+            version=_model_version, description=_model_version_description,
+            ngram_range=[min_n, max_n], lowercase=vec.lowercase, sublinear_tf=vec.sublinear_tf), f, indent=2)
+
+
+if __name__ == '__main__':
+    import argparse
+
+    # run at install time to ship the compiled model with the package
+    parser = argparse.ArgumentParser(description='Export the SwigspotLangid model for CompiledSwigspotLangid.')
+    parser.add_argument('model_dir', nargs='?', default=path.join(path.dirname(path.realpath(__file__)),
+                                                                  _compiled_model_dir))
+    args = parser.parse_args()
+    export_model(args.model_dir)
+    print(f'Model exported to {args.model_dir}')
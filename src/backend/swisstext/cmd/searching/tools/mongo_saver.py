@@ -22,7 +22,7 @@ class MongoSaver(ISaver):
         connect(db, host=host, port=port)
 
     def seed_exists(self, seed: str, **kwargs) -> bool:
-        return MongoSeed.get(seed) is not None
+        return MongoSeed.exists(seed)
 
     def save_seed(self, seed: Seed, was_used: bool):
         s = MongoSeed.get(seed.query) or MongoSeed.create(seed.query)
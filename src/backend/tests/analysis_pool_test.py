@@ -0,0 +1,35 @@
+import os
+
+import pytest
+
+from swisstext.cmd.scraping.analysis_pool import AnalysisPool, _analysis_entries
+from swisstext.cmd.scraping.config import Config
+from swisstext.cmd.scraping.pipeline import Pipeline, PipelineWorker
+
+TEXTS = [
+    '',
+    'Ich bi de chli Hans und wohne z Bärn. Das isch es schöns Huus, gäll? Mir gfallts jedefalls sehr guet.',
+    'Hallo zäme!!! Wie gaht\'s euch hüt … ?\n\nEs paar Sätz uf\nmehrere Zile, mit "Aaführigszeiche".',
+]
+with open(os.path.join(os.path.dirname(__file__), 'normalizer_golden', 'forum_page.txt')) as f:
+    TEXTS.append(f.read())  # a real page
+
+
+@pytest.fixture(scope='module')
+def config():
+    # the default detector (always 1) avoids loading the pickled model in every process
+    config = Config()
+    config.set('pipeline.sg_detector', '_I_')
+    return config
+
+
+def test_pool(config):
+    with AnalysisPool(config, max_workers=3) as pool:
+        # all the processes are started and initialized before the crawl
+        assert len(pool._processes) == 3
+        results = [pool.analyse(text).result() for text in TEXTS]
+
+    # same tools, in-process (the other ones are not needed)
+    pipeline = Pipeline(None, *(config.instantiate_tool(e) for e in _analysis_entries), None, None, None, None)
+    assert results == [PipelineWorker._analyse(pipeline, text) for text in TEXTS]
+    assert any(sentences for _, sentences in results)
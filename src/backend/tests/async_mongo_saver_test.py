@@ -0,0 +1,84 @@
+import logging
+import time
+
+import pytest
+
+from swisstext.cmd.scraping.data import Page
+from swisstext.cmd.scraping.tools import AsyncMongoSaver, MongoSaver
+
+
+@pytest.fixture
+def written(monkeypatch):
+    """Replace the MongoDB writes by slow fakes."""
+    written = []
+
+    def slow_write(name):
+        def write(self, arg, *args, **kwargs):
+            time.sleep(.02)
+            written.append((name, arg.url if isinstance(arg, Page) else arg))
+        return write
+
+    monkeypatch.setattr(MongoSaver, 'save_page', slow_write('page'))
+    monkeypatch.setattr(MongoSaver, 'blacklist_url', slow_write('blacklist'))
+    monkeypatch.setattr(MongoSaver, 'save_url', slow_write('url'))
+    monkeypatch.setattr(MongoSaver, 'get_page', lambda self, url, **kwargs: ('page', url) in written)
+    monkeypatch.setattr(MongoSaver, 'sentences_exist', lambda self, sentences: [False] * len(sentences))
+    monkeypatch.setattr(MongoSaver, 'urls_blacklisted', lambda self, urls: [False] * len(urls))
+    return written
+
+
+def test_writes_in_background(written, make_page):
+    saver = AsyncMongoSaver(db='st_test', max_queue_size=2)
+    start = time.time()
+    saver.save_page(make_page('http://a.ch', 'Hoi zäme'))
+    saver.blacklist_url('http://b.ch')
+    assert time.time() - start < .02
+    # the pending writes are taken into account
+    assert saver.sentences_exist(['Hoi zäme', 'Merci']) == [True, False]
+    assert saver.sentence_exists('Hoi zäme')
+    assert saver.is_url_blacklisted('http://b.ch')
+    # get_page waits for the page to be written
+    assert saver.get_page('http://a.ch')
+
+    for i in range(5):
+        saver.save_url(f'http://c.ch/{i}')
+    saver.close()
+    assert written == [('page', 'http://a.ch'), ('blacklist', 'http://b.ch')] + \
+           [('url', f'http://c.ch/{i}') for i in range(5)]
+    assert not saver._pending_urls and not saver._pending_sentences and not saver._pending_blacklist
+    assert not saver.sentence_exists('Hoi zäme')
+    assert saver.num_writes == 7 and saver.num_errors == 0
+    assert 0 < saver.max_queue_depth <= 2
+    assert len(saver._latencies) == 7
+
+
+def test_errors_are_logged(written, make_page, monkeypatch, caplog):
+    def fail(self, url, parent=None):
+        raise ValueError('boom')
+
+    monkeypatch.setattr(MongoSaver, 'save_url', fail)
+    caplog.set_level(logging.INFO)
+    saver = AsyncMongoSaver(db='st_test')
+    saver.save_url('http://a.ch')
+    saver.save_page(make_page('http://b.ch'))
+    saver.close()
+    assert saver.num_errors == 1 and saver.num_writes == 2
+    assert written == [('page', 'http://b.ch')]
+    assert 'write failed (http://a.ch)' in caplog.text
+    assert 'max queue depth' in caplog.text
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        AsyncMongoSaver(db='st_test', max_queue_size=0)
+
+
+def test_no_writes_after_close(written):
+    saver = AsyncMongoSaver(db='st_test')
+    saver.save_url('http://a.ch')
+    saver.close()
+    with pytest.raises(RuntimeError):
+        saver.save_url('http://b.ch')
+    assert saver._thread is None
+    assert written == [('url', 'http://a.ch')]
+    saver.close()  # closing twice is harmless
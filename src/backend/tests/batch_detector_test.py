@@ -0,0 +1,142 @@
+import threading
+import time
+
+import pytest
+
+from swisstext.cmd.scraping.batch_detector import BatchDetector
+from swisstext.cmd.scraping.interfaces import ISgDetector, INormalizer, ISplitter, ISentenceFilter, IUrlFilter, \
+    IDecider, ICrawler
+from swisstext.cmd.scraping.page_queue import PageQueue
+from swisstext.cmd.scraping.pipeline import Pipeline, AsyncPipelineWorker
+from swisstext.cmd.scraping.data import Page
+from swisstext.cmd.scraping.tools import ConsoleSaver
+
+
+class LengthDetector(ISgDetector):
+    """Return the length of the sentences, and record the size of each call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, sentences):
+        self.calls.append(len(sentences))
+        return [len(s) for s in sentences]
+
+
+class FailingDetector(ISgDetector):
+    def predict(self, sentences):
+        raise ValueError('boom')
+
+
+def test_concurrent_requests_are_batched():
+    detector = LengthDetector()
+    batcher = BatchDetector(detector, max_batch_size=1000, max_wait=.2)
+    requests = [['x' * (i + j) for j in range(5)] for i in range(20)]
+    results = [None] * len(requests)
+
+    def call(i):
+        results[i] = batcher.predict(requests[i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(requests))]
+    for t in threads: t.start()
+    for t in threads: t.join()
+    batcher.close()
+
+    assert results == [detector.predict(r) for r in requests]
+    assert batcher.num_sentences == 100
+    assert batcher.num_batches < 5
+
+
+def test_max_batch_size():
+    detector = LengthDetector()
+    batcher = BatchDetector(detector, max_batch_size=10, max_wait=60)
+    futures = [batcher.submit(['a', 'bb', 'ccc', 'dddd']) for _ in range(5)]
+    # the first batches are full: no need to wait for max_wait
+    assert futures[0].result(timeout=5) == [1, 2, 3, 4]
+    assert futures[3].result(timeout=5) == [1, 2, 3, 4]
+    batcher.close()  # flushes the last one
+    assert futures[4].result() == [1, 2, 3, 4]
+    # requests are never split
+    assert detector.calls == [8, 8, 4]
+
+
+def test_max_wait():
+    batcher = BatchDetector(LengthDetector(), max_batch_size=1000, max_wait=.05)
+    start = time.time()
+    assert batcher.predict(['abc']) == [3]
+    assert time.time() - start < 1
+    assert batcher.predict([]) == []
+    batcher.close()
+
+
+def test_errors_are_propagated():
+    batcher = BatchDetector(FailingDetector(), max_wait=0)
+    with pytest.raises(ValueError):
+        batcher.predict(['abc'])
+    batcher.close()
+    with pytest.raises(RuntimeError):
+        batcher.submit(['abc'])
+
+
+
+class ShortDetector(ISgDetector):
+    """Return one probability too few on the first call."""
+
+    def __init__(self):
+        self.calls = 0
+
+    def predict(self, sentences):
+        self.calls += 1
+        return [1.] * (len(sentences) - (self.calls == 1))
+
+
+def test_cancelled_requests_are_skipped():
+    detector = LengthDetector()
+    batcher = BatchDetector(detector, max_batch_size=1000, max_wait=.1)
+    cancelled = batcher.submit(['a', 'bb'])
+    future = batcher.submit(['ccc'])
+    assert cancelled.cancel()  # e.g. an asyncio task wrapping the future was cancelled
+    assert future.result(timeout=5) == [3]
+    assert batcher.predict(['dddd']) == [4]  # the thread is still alive
+    assert detector.calls == [1, 1]
+    batcher.close()
+
+
+def test_bad_batches_dont_stop_the_thread():
+    batcher = BatchDetector(ShortDetector(), max_wait=0)
+    with pytest.raises(ValueError):
+        batcher.predict(['a', 'b'])
+    assert batcher.submit(['a', 'b']).result(timeout=5) == [1., 1.]
+    batcher.close()
+
+class TextCrawler(ICrawler):
+    def crawl(self, url: str):
+        return ICrawler.CrawlResults(text=url.replace('http://', '').replace('.ch', '').replace('-', '\n'), links=[])
+
+
+class RecordingSaver(ConsoleSaver):
+    def __init__(self):
+        super().__init__()
+        self.pages = {}
+
+    def save_page(self, page):
+        self.pages[page.url] = [s.text for s in page.new_sg]
+
+
+def test_async_pipeline():
+    detector = LengthDetector()
+    batcher = BatchDetector(detector, max_batch_size=1000, max_wait=.1)
+    saver = RecordingSaver()
+    pipeline = Pipeline(TextCrawler(), INormalizer(), ISplitter(), ISentenceFilter(), batcher,
+                        None, IUrlFilter(), IDecider(), saver, min_proba=3)
+    queue = PageQueue()
+    urls = ['http://a%d-bb-cccc.ch' % i for i in range(50)]
+    for url in urls:
+        queue.put((Page(url), 1))
+
+    AsyncPipelineWorker(max_concurrency=100).run(queue, pipeline, [], max_depth=1)
+    batcher.close()
+
+    assert saver.pages == {url: ['a%d' % i, 'cccc'] if i >= 10 else ['cccc'] for i, url in enumerate(urls)}
+    assert sum(detector.calls) == 150
+    assert len(detector.calls) < 10
@@ -0,0 +1,104 @@
+from datetime import datetime
+
+import numpy as np
+import pytest
+
+from swisstext.cmd.scraping.bloom_filter import ScalableBloomFilter
+from swisstext.cmd.scraping.tools import MongoSaver, mongo_saver
+from swisstext.mongo.models import MongoBlacklist, MongoSentence
+
+
+@pytest.fixture
+def hashes():
+    rng = np.random.RandomState(0)
+    ids = rng.randint(0, 2 ** 63, size=30000, dtype=np.uint64)
+    return ids[:20000], ids[20000:]  # added, absent (most certainly)
+
+
+def test_no_false_negatives(hashes):
+    added, absent = hashes
+    bloom = ScalableBloomFilter(initial_capacity=5000, error_rate=.01)
+    bloom.add_all(added)
+    assert len(bloom.filters) == 3 and len(bloom) == 20000  # 5000 + 10000 + 10000 (of 20000)
+    assert all(bloom.contains_all(added))
+    assert np.mean(bloom.contains_all(absent)) < .01
+    # ids can also be strings, like the Mongo ids
+    assert str(added[42]) in bloom
+
+
+def test_save_load(hashes, tmp_path):
+    added, absent = hashes
+    bloom = ScalableBloomFilter(initial_capacity=5000, error_rate=.01)
+    bloom.add_all(added)
+    path = str(tmp_path / 'test.bloom')
+    bloom.save(path, since='2019-06-01T00:00:00')
+
+    loaded = ScalableBloomFilter.load(path)
+    assert loaded.metadata == {'since': '2019-06-01T00:00:00'}
+    assert len(loaded) == len(bloom)
+    assert loaded.contains_all(absent) == bloom.contains_all(absent)
+    loaded.add_all(absent)
+    assert all(loaded.contains_all(absent))
+
+
+def test_saver_skips_queries():
+    # the connection is lazy: no query is sent if the bloom filters say the items are absent
+    saver = MongoSaver(db='st_test')
+    saver._sentences_bloom, saver._blacklist_bloom = ScalableBloomFilter(10), ScalableBloomFilter(10)
+    assert saver.sentences_exist(['Hoi zäme', 'Merci']) == [False, False]
+    assert not saver.sentence_exists('Hoi zäme')
+    assert saver.urls_blacklisted(['http://a.ch']) == [False]
+    assert saver.bloom_skipped == 4
+
+
+class FakeCollection:
+    """A minimal pymongo collection for the bloom filter scans, recording the number of ids scanned."""
+
+    def __init__(self):
+        self.docs = []
+        self.scanned = []
+
+    def add(self, id, date_added):
+        self.docs.append({'_id': id, 'date_added': date_added})
+
+    def find(self, query, projection):
+        since = query.get('date_added', {}).get('$gte', datetime.min)
+        found = [{'_id': d['_id']} for d in self.docs if d['date_added'] >= since]
+        self.scanned.append(len(found))
+        return found
+
+    def estimated_document_count(self):
+        return len(self.docs)
+
+
+def test_saver_rescans(tmp_path, monkeypatch):
+    sentences, blacklist = FakeCollection(), FakeCollection()
+    monkeypatch.setattr(MongoSentence, '_get_collection', classmethod(lambda cls: sentences))
+    monkeypatch.setattr(MongoBlacklist, '_get_collection', classmethod(lambda cls: blacklist))
+    monkeypatch.setattr(mongo_saver, 'get_connection', lambda db, **kwargs: None)  # allow several servers
+    old = datetime(2019, 1, 1)
+    for i in range(10):
+        sentences.add(str(i), old)
+    blacklist.add('100', old)
+
+    new_saver = lambda **kwargs: MongoSaver(db='st_test', bloom_dir=str(tmp_path), **kwargs)
+    saver = new_saver()  # no filter yet: full scan
+    assert sentences.scanned == [10] and '3' in saver._sentences_bloom
+    saver.close()
+
+    # only the documents added since the last run are scanned
+    sentences.add('42', datetime.utcnow())
+    saver = new_saver()
+    assert sentences.scanned[-1] == 1
+    assert all(saver._sentences_bloom.contains_all(['3', '42'])) and '100' in saver._blacklist_bloom
+    saver.close()
+
+    # another server with the same db name: full scan
+    saver = new_saver(host='other', port=27018)
+    assert sentences.scanned[-1] == 11
+    saver.close()
+
+    # the collection shrank (e.g. dropped and restored): full scan
+    del sentences.docs[:5]
+    new_saver(host='other', port=27018)
+    assert sentences.scanned[-1] == 6
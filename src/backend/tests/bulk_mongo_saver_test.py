@@ -0,0 +1,79 @@
+import time
+
+import pytest
+
+from swisstext.cmd.scraping.tools import BulkMongoSaver
+
+
+class RecordingSaver(BulkMongoSaver):
+    """Record the flushes instead of writing to MongoDB."""
+
+    def __init__(self, **kwargs):
+        super().__init__(db='st_test', **kwargs)
+        self.flushed = []
+
+    def _write(self, pages):
+        self.flushed.append([p.url for p in pages])
+
+
+def test_flush_size_and_close(make_page):
+    saver = RecordingSaver(flush_size=2, flush_interval=0)
+    saver.save_page(make_page('http://a.ch', 'Hoi zäme'))
+    assert saver.flushed == []
+    # sentences in the buffer already exist
+    assert saver.sentence_exists('Hoi zäme')
+    assert saver.sentences_exist(['Hoi zäme', 'Hoi zäme']) == [True, True]
+
+    saver.save_page(make_page('http://b.ch'))
+    assert saver.flushed == [['http://a.ch', 'http://b.ch']]
+    assert not saver._pending_urls and not saver._pending_sentences
+
+    saver.save_page(make_page('http://c.ch'))
+    saver.close()
+    assert saver.flushed[-1] == ['http://c.ch']
+    # once closed, pages are written right away
+    saver.save_page(make_page('http://d.ch'))
+    assert saver.flushed[-1] == ['http://d.ch']
+
+
+def test_flush_interval(make_page):
+    saver = RecordingSaver(flush_size=100, flush_interval=.05)
+    saver.save_page(make_page('http://a.ch'))
+    deadline = time.time() + 2
+    while not saver.flushed and time.time() < deadline:
+        time.sleep(.01)
+    assert saver.flushed == [['http://a.ch']]
+    saver.close()
+    assert not saver._thread.is_alive()
+
+
+def test_url_update(make_page):
+    page = make_page('http://a.ch/x', 'Hoi zäme', 'Merci viilmal', etag='"v1"')
+    page.parent_url = 'http://a.ch'
+    update = BulkMongoSaver._url_update(page, 'hash')._doc
+    assert update['$setOnInsert']['url'] == 'http://a.ch/x'
+    assert update['$setOnInsert']['source'] == {'type': 'auto', 'extra': 'http://a.ch'}
+    assert update['$push']['crawl_history']['count'] == 2
+    assert update['$push']['crawl_history']['hash'] == 'hash'
+    assert update['$inc'] == {'count': 2}
+    assert update['$set']['delta'] == 2 and update['$set']['etag'] == '"v1"'
+    assert 'last_modified' not in update['$set']
+
+
+def test_invalid_options():
+    with pytest.raises(ValueError):
+        RecordingSaver(flush_size=0)
+    with pytest.raises(ValueError):
+        RecordingSaver(flush_interval=-1)
+
+
+def test_validators_match_mongo_saver(make_page):
+    from swisstext.mongo.models import MongoURL
+
+    page = make_page('http://a.ch', etag='"v2"')
+    mu = MongoURL.create('http://a.ch')
+    mu.etag, mu.last_modified = '"v1"', 'Mon, 01 Jul 2019 00:00:00 GMT'
+    BulkMongoSaver._set_validators(mu, page)  # the MongoSaver path
+    update = BulkMongoSaver._url_update(page, 'hash')._doc['$set']
+    assert (mu.etag, mu.last_modified) == ('"v2"', 'Mon, 01 Jul 2019 00:00:00 GMT')
+    assert update['etag'] == '"v2"' and 'last_modified' not in update
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+
+from swisstext.cmd.scraping.cached_detector import CachedDetector
+from swisstext.cmd.scraping.config import Config
+from swisstext.cmd.scraping.interfaces import ISgDetector
+
+
+class LengthDetector(ISgDetector):
+    """Return the length of the sentences, and record the sentences of each call."""
+
+    def __init__(self):
+        self.calls = []
+
+    def predict(self, sentences):
+        self.calls.append(list(sentences))
+        return [len(s) for s in sentences]
+
+
+def test_cache():
+    detector = LengthDetector()
+    cache = CachedDetector(detector, max_size=10)
+    assert cache.predict(['a', 'bb', 'a']) == [1, 2, 1]
+    assert cache.predict(['bb', 'ccc']) == [2, 3]
+    assert cache.predict([]) == []
+    # duplicates and known sentences are never predicted twice
+    assert detector.calls == [['a', 'bb'], ['ccc']]
+    assert (cache.hits, cache.misses) == (2, 3)
+    assert cache.hit_rate == .4
+
+
+def test_lru_eviction():
+    detector = LengthDetector()
+    cache = CachedDetector(detector, max_size=2)
+    cache.predict(['a', 'bb'])
+    cache.predict(['a'])  # a is now the most recently used
+    cache.predict(['ccc'])  # evicts bb
+    assert len(cache) == 2
+    detector.calls.clear()
+    assert cache.predict(['a', 'bb', 'ccc']) == [1, 2, 3]
+    assert detector.calls == [['bb']]
+
+
+def test_concurrent_calls():
+    cache = CachedDetector(LengthDetector(), max_size=50)
+    requests = [['x' * ((i + j) % 80) for j in range(10)] for i in range(40)]
+    results = [None] * len(requests)
+
+    def call(i):
+        results[i] = cache.predict(requests[i])
+
+    threads = [threading.Thread(target=call, args=(i,)) for i in range(len(requests))]
+    for t in threads: t.start()
+    for t in threads: t.join()
+
+    assert results == [[len(s) for s in r] for r in requests]
+    assert len(cache) <= 50
+    assert cache.hits + cache.misses == 400
+
+
+def test_config():
+    config = Config()
+    config.set('pipeline.sg_detector', '_I_')
+    config.set('sg_detector_options.cache_size', 10)
+    detector = config.instantiate_tool('sg_detector')
+    assert isinstance(detector, CachedDetector)
+    assert detector.max_size == 10
+    assert config.get('sg_detector_options.cache_size') == 10
+
+    config.set('sg_detector_options.cache_size', 0)
+    assert not isinstance(config.instantiate_tool('sg_detector'), CachedDetector)
+
+    with pytest.raises(ValueError):
+        CachedDetector(ISgDetector(), max_size=0)
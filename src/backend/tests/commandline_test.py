@@ -0,0 +1,52 @@
+from types import SimpleNamespace
+
+from swisstext.cmd.scraping.commandline import _scrape
+from swisstext.cmd.scraping.config import Config
+from swisstext.cmd.scraping.data import Page
+from swisstext.cmd.scraping.page_queue import PageQueue
+from swisstext.cmd.scraping.tools import ConsoleSaver
+
+
+class ClosingSaver(ConsoleSaver):
+    """A saver releasing its resources on close: writes after close are recorded as errors."""
+
+    def __init__(self):
+        super().__init__()
+        self.closed = False
+        self.saved_urls = []
+        self.late_writes = []
+
+    def save_url(self, url: str, parent: str = None):
+        (self.late_writes if self.closed else self.saved_urls).append(url)
+
+    def close(self):
+        self.closed = True
+
+
+class IdleWorker:
+    """A worker crawling nothing: all the pages are left in the queue at the end of the crawl."""
+
+    def __init__(self, id=-1, analysis_pool=None, scheduler=None):
+        self.kill_received = False
+
+    def run(self, *args):
+        pass
+
+
+class ClosingQueue(PageQueue):
+
+    def close(self):
+        self.closed = True
+
+
+def test_close_after_saving_for_later():
+    queue = ClosingQueue()
+    for i in range(20):
+        queue.put((Page(f'http://a.ch/{i}', parent_url='http://a.ch'), 2))
+    saver = ClosingSaver()
+    pipeline = SimpleNamespace(saver=saver, crawler=SimpleNamespace(log_stats=lambda: None), detector=None)
+
+    _scrape(Config(), queue, pipeline, worker_cls=IdleWorker)
+    assert len(saver.saved_urls) == 20
+    assert saver.late_writes == []
+    assert saver.closed and queue.closed
@@ -0,0 +1,21 @@
+import pytest
+
+from swisstext.cmd.scraping.data import Page, Sentence
+from swisstext.cmd.scraping.interfaces import ICrawler
+
+
+@pytest.fixture
+def make_page():
+    """
+    Factory of crawled pages with new Swiss German sentences, to feed the savers.
+    The mongoengine connection is lazy, so the Mongo savers can be created without a server.
+    """
+
+    def make(url, *sentences, text='some text', etag=None) -> Page:
+        page = Page(url)
+        page.crawl_results = ICrawler.CrawlResults(text=text, links=[], etag=etag)
+        page.new_sg = [Sentence(s, .9) for s in sentences]
+        page.sentence_count = page.sg_count = len(sentences)
+        return page
+
+    return make
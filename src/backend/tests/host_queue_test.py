@@ -0,0 +1,62 @@
+import time
+from queue import Empty
+
+import pytest
+from swisstext.cmd.scraping.data import Page
+from swisstext.cmd.scraping.host_queue import HostQueue
+
+
+def _put(queue, *urls):
+    for url in urls:
+        queue.put((Page(url), 1))
+
+
+def test_round_robin():
+    queue = HostQueue(max_per_host=10, min_delay=0)
+    _put(queue, 'http://a.ch/1', 'http://a.ch/2', 'http://a.ch/3', 'http://b.ch/1', 'http://c.ch/1')
+    urls = [queue.get(block=False)[0].url for _ in range(5)]
+    assert urls == ['http://a.ch/1', 'http://b.ch/1', 'http://c.ch/1', 'http://a.ch/2', 'http://a.ch/3']
+    assert queue.empty()
+
+
+def test_max_per_host():
+    queue = HostQueue(max_per_host=1, min_delay=0)
+    _put(queue, 'http://a.ch/1', 'http://a.ch/2')
+    page, _ = queue.get(block=False)
+    with pytest.raises(Empty):
+        queue.get(block=False)  # a.ch is busy
+    assert queue.qsize() == 1
+    queue.release(page)
+    assert queue.get(block=False)[0].url == 'http://a.ch/2'
+
+
+def test_min_delay():
+    queue = HostQueue(max_per_host=10, min_delay=.2)
+    _put(queue, 'http://a.ch/1', 'http://a.ch/2', 'http://b.ch/1')
+    start = time.time()
+    assert queue.get(timeout=1)[0].url == 'http://a.ch/1'
+    assert queue.get(timeout=1)[0].url == 'http://b.ch/1'
+    with pytest.raises(Empty):
+        queue.get(timeout=.05)
+    assert queue.get(timeout=1)[0].url == 'http://a.ch/2'
+    assert time.time() - start >= .2
+
+
+def test_drain():
+    queue = HostQueue(max_per_host=1, min_delay=10)
+    _put(queue, 'http://a.ch/1', 'http://a.ch/2', 'http://b.ch/1', 'http://a.ch/1')  # last is a duplicate
+    queue.get(block=False)
+    assert sorted(p.url for p, _ in queue.drain()) == ['http://a.ch/2', 'http://b.ch/1']
+    assert queue.empty()
+
+
+def test_forget_drained_hosts():
+    # a crawl visits many hosts: their state should not be kept once they are done
+    queue = HostQueue(max_per_host=2, min_delay=.05)
+    _put(queue, *[f'http://host{i}.ch/{j}' for i in range(20) for j in range(2)])
+    pages = [queue.get(timeout=1)[0] for _ in range(40)]
+    assert queue.empty()
+    time.sleep(.1)
+    for page in pages:
+        queue.release(page)
+    assert queue._active == {} and queue._last_get == {}
@@ -0,0 +1,42 @@
+import pytest
+from swisstext.cmd.scraping.interfaces import ICrawler
+from swisstext.cmd.scraping.tools import JustextCrawler, LxmlJustextCrawler
+
+URL = 'http://example.ch/forum/thread/1'
+
+HTML = '''<!DOCTYPE html>
+<html>
+<head><meta charset="windows-1252"><title>Forum</title><style>p { color: red; }</style></head>
+<body>
+<div id="nav"><a href="/">Home</a> | <a href="/forum/">Forum</a> | <a href="#top">Top</a></div>
+<h1>Wanderig uf de Üetliberg</h1>
+<p>Mir sind geschter uf de Üetliberg gloffe und s'Wätter isch eifach wunderbar gsi. Mir händ no lang
+   uf de Terrasse gsässe und öppis feins gässe, bevor mir wieder abe gloffe sind.</p>
+<script>var x = "<p>not text</p>";</script>
+<p>Weisch no, wo mir s'letscht Mal det obe gsi sind? Es het so fescht grägnet, dass mir im Restaurant händ
+   müesse warte, bis es ufghört het. <a href="../thread/2?sid=abc">Nächschti Siite</a></p>
+<form><input type="text" value="Suche"></form>
+<ul><li><a href="mailto:info@example.ch">Kontakt</a></li><li><a href="/impressum.pdf">Impressum</a></li></ul>
+</body>
+</html>'''.encode('cp1252')
+
+
+@pytest.mark.parametrize('keep_bad', [True, False])
+def test_same_results(keep_bad):
+    expected = JustextCrawler(keep_bad=keep_bad).parse(URL, HTML)
+    actual = LxmlJustextCrawler(keep_bad=keep_bad).parse(URL, HTML)
+    assert 'Üetliberg' in actual.text
+    assert actual.text == expected.text
+    assert actual.links == expected.links
+
+
+def test_lxml_link_extractor():
+    expected = JustextCrawler().parse(URL, HTML)
+    actual = JustextCrawler(link_extractor='lxml').parse(URL, HTML)
+    assert actual.links == expected.links
+    assert actual.text == expected.text
+
+
+def test_empty_document():
+    with pytest.raises(ICrawler.CrawlError):
+        LxmlJustextCrawler().parse(URL, b'   ')
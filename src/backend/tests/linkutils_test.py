@@ -0,0 +1,25 @@
+import random
+
+import pytest
+from swisstext.cmd.link_utils import filter_links, filter_links_fast
+
+hrefs = [
+    '#', 'whatsapp://send?text=Dumoulin verlangt naar', 'javascript:return false', 'mailto:info@example.ch',
+    '../other/', '../other#anchor', '?page=2&q=isch', '?page=2', '?p=66383&sid=aaece0dfd1e47e08505dcb5fae2d3f03',
+    '/absolute/path', '//protocol.relative.ch/x', 'relative/path', 'relative/path/', '',
+    'https://imgur.org/some-image.png', 'https://ru.wikipedia.org/wiki', 'https://als.wikipedia.org',
+    'http://other.resource.test', 'http://www.twitter.com/some-hashtag?lang=en-gb',
+    'https://twitter.com/share?text=blabla', 'http://zh-cn.facebook.com/XXXX', 'https://facebook.com/',
+    'https://www.facebook.com/l.php?u=http%3A%2F%2Fexample.ch%2Fx', 'https://graph.facebook.com',
+    'http://example.ch/page/1', 'http://example.ch/page/1/', 'http://example.ch/a/./b/../c',
+    'https://example.ch/x?', 'https://example.ch/x#p12', 'http://Example.CH/Path?a=1&sid=2#frag',
+    'HTTP://upper.case.ch/x', 'http://a.ch:8080/../x;params?q',
+]
+
+
+@pytest.mark.parametrize('base_url', ['http://example.ch/page/1', 'https://example.ch/page/1/', 'http://example.ch'])
+def test_filter_links_fast(base_url):
+    random.seed(0)
+    for _ in range(100):
+        links = random.choices(hrefs, k=50)
+        assert list(filter_links_fast(base_url, links)) == list(filter_links(base_url, links))
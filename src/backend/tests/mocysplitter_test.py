@@ -1,3 +1,5 @@
+import os
+
 import pytest
 from swisstext.cmd.scraping.tools import MocySplitter
 
@@ -49,3 +51,19 @@ def test_newline_setting(splitter):
     assert len(splitter.split(sentence)) == 2
     splitter.keep_newlines = True
     assert len(splitter.split(sentence)) == 3
+
+
+@pytest.mark.parametrize(
+    "name,more,keep_newlines",
+    [('sentences', True, True), ('sentences_text', False, False)]
+)
+def test_golden(name, more, keep_newlines):
+    # a real (normalized) page, expected splits generated by the original (unoptimized) implementation
+    folder = os.path.dirname(__file__)
+    with open(os.path.join(folder, 'normalizer_golden', 'forum_page.expected.txt')) as f:
+        text = f.read()
+    with open(os.path.join(folder, 'mocysplitter_golden', f'forum_page.{name}.txt')) as f:
+        expected = f.read().splitlines()
+    splitter = MocySplitter(langs=['en', 'de'], more=more, keep_newlines=keep_newlines)
+    assert splitter.split(text) == expected
+    assert list(splitter.iter_split(text)) == expected
@@ -0,0 +1,64 @@
+import pytest
+
+from swisstext.mongo.abstract.lookups import find_ids, find_values, iter_ids
+from swisstext.mongo.models import MongoBlacklist, MongoSeed, MongoSentence
+
+
+class FakeCollection:
+    """A minimal pymongo collection, recording the queries (no server needed)."""
+
+    def __init__(self, docs):
+        self.docs = docs
+        self.queries = []
+
+    def _matches(self, doc, query):
+        for field, cond in query.items():
+            if isinstance(cond, dict) and '$in' in cond:
+                if doc.get(field) not in cond['$in']: return False
+            elif doc.get(field) != cond:
+                return False
+        return True
+
+    def find(self, query, projection):
+        self.queries.append((query, projection))
+        return [{k: d[k] for k, keep in projection.items() if keep and k in d}
+                for d in self.docs if self._matches(d, query)]
+
+    def find_one(self, query, projection):
+        found = self.find(query, projection)
+        return found[0] if found else None
+
+
+@pytest.fixture
+def collection(monkeypatch):
+    collection = FakeCollection([
+        {'_id': MongoSentence.get_hash('Hoi zäme'), 'text': 'Hoi zäme'},
+        {'_id': MongoBlacklist.get_hash('http://a.ch'), 'url': 'http://a.ch'},
+        {'_id': 'grüezi mitenand'},
+    ])
+    for cls in [MongoSentence, MongoBlacklist, MongoSeed]:
+        monkeypatch.setattr(cls, '_get_collection', classmethod(lambda cls: collection))
+    return collection
+
+
+def test_exists(collection):
+    assert MongoSentence.exists('Hoi zäme')
+    assert not MongoSentence.exists('Merci')
+    assert MongoBlacklist.exists('http://a.ch')
+    assert MongoBlacklist.exists(hash=MongoBlacklist.get_hash('http://a.ch'))
+    assert not MongoBlacklist.exists('http://b.ch')
+    assert MongoSeed.exists('grüezi mitenand')
+    # only the ids are fetched
+    assert all(projection == {'_id': 1} for _, projection in collection.queries)
+
+
+def test_batch_lookups(collection):
+    hashes = [MongoSentence.get_hash(s) for s in ['Hoi zäme', 'Merci']]
+    assert find_ids(MongoSentence, hashes) == {hashes[0]}
+    assert find_values(MongoBlacklist, 'url', ['http://a.ch', 'http://b.ch']) == {'http://a.ch'}
+    assert collection.queries[-1] == ({'url': {'$in': ['http://a.ch', 'http://b.ch']}}, {'url': 1, '_id': 0})
+    assert len(list(iter_ids(MongoSentence))) == 3
+    # no query for empty lookups
+    num_queries = len(collection.queries)
+    assert find_ids(MongoSentence, []) == set() and find_values(MongoBlacklist, 'url', []) == set()
+    assert len(collection.queries) == num_queries
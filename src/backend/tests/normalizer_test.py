@@ -1,3 +1,5 @@
+import os
+
 import pytest
 import random
 from swisstext.cmd.scraping.tools import norm_punc
@@ -61,3 +63,36 @@ def test_normalizer_shuffled(raw, expected):
     res = norm_punc.normalize_text(str(raw), fix_encoding=False, strip_emojis=False)
     assert res == str(expected)
 
+
+def test_normalizer_golden():
+    # a real page, expected output generated by the original (unfused) implementation
+    folder = os.path.join(os.path.dirname(__file__), 'normalizer_golden')
+    with open(os.path.join(folder, 'forum_page.txt')) as f:
+        raw = f.read()
+    with open(os.path.join(folder, 'forum_page.expected.txt')) as f:
+        expected = f.read()
+    assert norm_punc.normalize_text(raw, strip_emojis=True) == expected
+
+
+def reference_patterns(text):
+    # apply the normalization patterns one by one, in order
+    for typ, pattern, replace in norm_punc.normalization_patterns:
+        text = pattern.sub(replace, text) if typ == norm_punc.REG else text.replace(pattern, replace)
+    return text
+
+
+def test_fused_patterns_parity():
+    # use all the characters appearing in the patterns, so that they interact as much as possible
+    chars = set('abcXY09 \n\t.,;:!?()"\'�\u0084')
+    for typ, pattern, replace in norm_punc.normalization_patterns:
+        chars.update(pattern if typ == norm_punc.STR else pattern.pattern)
+        chars.update(replace)
+    chars = sorted(chars)
+
+    rand = random.Random(0)
+    for _ in range(20000):
+        text = ''.join(rand.choice(chars) for _ in range(rand.randint(0, 12)))
+        fused = text
+        for step in norm_punc._normalization_steps:
+            fused = step(fused)
+        assert fused == reference_patterns(text), repr(text)
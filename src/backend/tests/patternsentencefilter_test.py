@@ -1,6 +1,11 @@
+import time
+from concurrent.futures import ThreadPoolExecutor
+
 import pytest
 import pytest_check as check
+import regex
 from swisstext.cmd.scraping.tools import PatternSentenceFilter
+from swisstext.cmd.scraping.tools.pattern_sentence_filter import PatternCounter
 
 
 @pytest.fixture
@@ -27,3 +32,94 @@ def test_rules():
 )
 def test_custom_rules(custom_rules_filterer, sentence, valid):
     assert custom_rules_filterer.is_valid(sentence) == valid
+
+
+def test_pattern_counter():
+    counter = PatternCounter()
+    single_chars = [counter.compile(p) for p in [' ', '\\p{L}', '[,.]', '\\.', '[^\\W\\d]']]
+    others = [counter.compile(p) for p in ['\\p{L}+', '(\\.\\s?){3}$', ' [/=] ', '\\p{L}|\\.', '(a)(b)']]
+    assert counter.compile('\\p{L}') is single_chars[1]  # patterns are shared
+    assert all(counter.is_single_char(p) for p in single_chars)
+    assert not any(counter.is_single_char(p) for p in others)
+
+    for s in ['', 'Hallo zäme, wie gaht\'s...', 'abab / 1.2.3 = ÄÖÜ', '\x00\t\n ... ←']:
+        counts = counter.counts(s)
+        for p in single_chars + others:
+            assert counts[p] == len(p.findall(s)), (p, s)
+            assert min(counter.counts(s).count(p, limit=1), 1) == min(len(p.findall(s)), 1), (p, s)
+
+
+def test_pattern_counter_threads():
+    # the filter is shared by the pipeline workers: new characters may be seen by several threads at once
+    class SlowList(list):
+        def append(self, item):
+            super().append(item)
+            time.sleep(.01)  # let the other threads add their signatures meanwhile
+
+    counter = PatternCounter()
+    patterns = [counter.compile(p) for p in [' ', '\\p{L}', '\\d', '[,.]']]
+    counter._signatures = SlowList()
+    sentences = ['a', '1', ' ', ',', 'a1', '. ']
+    with ThreadPoolExecutor(len(sentences)) as executor:
+        list(executor.map(lambda s: counter.counts(s)[patterns[0]], sentences))
+    for s in sentences:
+        counts = counter.counts(s)
+        assert [counts[p] for p in patterns] == [len(p.findall(s)) for p in patterns], s
+
+def test_bounded_count():
+    counts = PatternCounter().counts('a b c d e')
+    pattern = regex.compile('\\p{L}')
+    assert counts.count(pattern, limit=2) == 2
+    assert pattern not in counts  # a partial count is not cached
+    assert counts.count(pattern, limit=10) == 5
+    assert counts[pattern] == 5
+
+
+def test_stats_and_adaptive_order():
+    sentences = ['a a b b', 'a ', 'a', 'A a b b', 'aabb', 'Aabb', 'AAAA', '', 'b b'] * 10
+    rulespath = __file__.replace('.py', '.yaml')
+    expected = [PatternSentenceFilter(rulespath).is_valid(s) for s in sentences]
+
+    filterer = PatternSentenceFilter(rulespath, adaptive=True, reorder_every=5)
+    assert [filterer.is_valid(s) for s in sentences] == expected
+
+    rules = filterer.rules
+    assert rules.num_sentences == len(sentences)
+    assert sum(r.num_rejected for r in rules) == expected.count(False)
+    assert sorted(r.id for r in rules.order) == [1, 2, 3]
+
+    # the rules rejecting the most sentences per second come first
+    for r, (rejected, time_spent) in zip(rules, [(1, 1.), (10, 1.), (10, 2.)]):
+        r.num_rejected, r.time_spent = rejected, time_spent
+    rules.reorder()
+    assert [r.id for r in rules.order] == [2, 3, 1]
+
+
+def test_adaptive_order_empty_sentence():
+    # ratio rules may be reordered before the rules rejecting empty sentences
+    filterer = PatternSentenceFilter(adaptive=True, reorder_every=50)
+    rules = filterer.rules
+    rules.order = sorted(rules.rules, key=lambda r: r.id != 6)
+    assert rules.order[0].id == 6
+    assert not filterer.is_valid('')
+    sentences = ['', 'Das isch de Hans, er wohnt z Bärn und schaffet bi de Post.', '!!!']
+    assert filterer.filter(sentences) == PatternSentenceFilter().filter(sentences)
+
+def test_filter_batch(custom_rules_filterer):
+    sentences = ['a a b b', 'a ', 'a', 'A a b b', 'aabb', '', 'b b', ' ']
+    assert custom_rules_filterer.filter_batch(sentences) == [s for s in sentences if custom_rules_filterer.is_valid(s)]
+
+    filterer = PatternSentenceFilter()
+    sentences = [
+        'Ich bi de chli Hans und wohne z Bärn, das isch es schöns Huus und mir gfallts da sehr guet.',
+        'Home | Impressum | Kontakt',
+        'Das isch es schöns Huus, gäll, und mir wohned scho sit vielne Jahr da im Quartier.',
+        'Antworten Zitieren @ http://example.ch',
+        '12.03.2019 14:32',
+        'x' * 2000,
+        '',
+    ]
+    assert filterer.filter_batch(sentences) == [s for s in sentences if filterer.is_valid(s)]
+    assert filterer.filter_batch([]) == []
+    # streaming, in batches
+    assert list(filterer.iter_filter(iter(sentences), batch_size=3)) == filterer.filter_batch(sentences)
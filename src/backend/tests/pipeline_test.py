@@ -0,0 +1,115 @@
+from swisstext.cmd.scraping.interfaces import *
+from swisstext.cmd.scraping.page_queue import PageQueue
+from swisstext.cmd.scraping.pipeline import Pipeline, PipelineWorker
+from swisstext.cmd.scraping.tools import ConsoleSaver
+
+
+class FakeCrawler(ICrawler):
+    def __init__(self, **results):
+        self.results = results
+
+    def crawl(self, url: str):
+        return self.results[url]
+
+
+class RecordingSplitter(ISplitter):
+    def __init__(self):
+        self.texts = []
+
+    def split(self, text: str):
+        self.texts.append(text)
+        return super().split(text)
+
+
+class RecordingSaver(ConsoleSaver):
+    def __init__(self, unchanged_texts=()):
+        super().__init__()
+        self.unchanged_texts = unchanged_texts
+        self.saved, self.unchanged = [], []
+
+    def is_page_unchanged(self, page):
+        return page.crawl_results.text in self.unchanged_texts
+
+    def save_page(self, page):
+        self.saved.append(page.url)
+
+    def save_unchanged_page(self, page):
+        self.unchanged.append(page.url)
+
+
+def _run(crawler, saver):
+    splitter = RecordingSplitter()
+    pipeline = Pipeline(crawler, INormalizer(), splitter, ISentenceFilter(), ISgDetector(),
+                        None, IUrlFilter(), IDecider(), saver)
+    queue = PageQueue()
+    for url in crawler.results:
+        queue.put((Page(url), 1))
+    PipelineWorker().run(queue, pipeline, [], max_depth=1)
+    return splitter.texts
+
+
+def test_unchanged_pages_are_not_analysed():
+    crawler = FakeCrawler(**{
+        'http://a.ch': ICrawler.CrawlResults.unchanged(etag='"v1"'),
+        'http://b.ch': ICrawler.CrawlResults(text='same text', links=[]),
+        'http://c.ch': ICrawler.CrawlResults(text='new text', links=[])})
+    saver = RecordingSaver(unchanged_texts=['same text'])
+
+    texts = _run(crawler, saver)
+    assert texts == ['new text']
+    assert saver.unchanged == ['http://a.ch', 'http://b.ch']
+    assert saver.saved == ['http://c.ch']
+
+
+def test_prepare_streams_unique_valid_sentences():
+    class ShortFilter(ISentenceFilter):
+        def is_valid(self, sentence):
+            return len(sentence) < 5
+
+    pipeline = Pipeline(None, INormalizer(), ISplitter(), ShortFilter(), ISgDetector(), None, None, None, None)
+    text, sentences = PipelineWorker._prepare(pipeline, 'a\nb\na\ntoo long\nc\nb')
+    assert sentences == ['a', 'b', 'c']
+
+
+class BatchRecordingSaver(RecordingSaver):
+    def __init__(self, blacklist=(), sentences=()):
+        super().__init__()
+        self._blacklist.update(blacklist)
+        self._sentences.update(sentences)
+        self.calls = []
+
+    def sentences_exist(self, sentences):
+        self.calls.append(('sentences_exist', sentences))
+        return super().sentences_exist(sentences)
+
+    def urls_blacklisted(self, urls):
+        self.calls.append(('urls_blacklisted', sorted(urls)))
+        return super().urls_blacklisted(urls)
+
+    def get_pages(self, urls, **kwargs):
+        self.calls.append(('get_pages', sorted(urls)))
+        return super().get_pages(urls, **kwargs)
+
+    def save_page(self, page):
+        super().save_page(page)
+        self._pages[page.url] = page
+
+
+def test_batched_lookups():
+    crawler = FakeCrawler(**{
+        'http://a.ch': ICrawler.CrawlResults(text='old\nnew\nnew too', links=['http://b.ch', 'http://c.ch'])})
+    saver = BatchRecordingSaver(blacklist=['http://b.ch'], sentences=['old'])
+    pipeline = Pipeline(crawler, INormalizer(), ISplitter(), ISentenceFilter(), ISgDetector(),
+                        None, IUrlFilter(), IDecider(), saver)
+    queue = PageQueue()
+    queue.put((Page('http://a.ch'), 1))
+    new_sentences = []
+    PipelineWorker().run(queue, pipeline, new_sentences, max_depth=1)
+
+    assert saver.calls == [
+        ('sentences_exist', ['old', 'new', 'new too']),
+        ('urls_blacklisted', ['http://b.ch', 'http://c.ch']),
+        ('get_pages', ['http://c.ch'])]
+    assert new_sentences == ['new', 'new too']
+    page = saver._pages['http://a.ch']
+    assert (page.sentence_count, page.sg_count, len(page.new_sg)) == (3, 3, 2)
@@ -0,0 +1,75 @@
+import threading
+
+import pytest
+from swisstext.cmd.scraping.data import Page
+from swisstext.cmd.scraping.page_queue import PageQueue
+from swisstext.cmd.scraping.scheduler import Scheduler
+
+
+class FakeWorker:
+    def __init__(self, id):
+        self.id = id
+        self.kill_received = False
+
+
+@pytest.fixture
+def queue():
+    q = PageQueue()
+    q.put((Page('http://example.com'), 1))
+    return q
+
+
+def test_wait_for_active_workers(queue):
+    scheduler = Scheduler(queue, max_depth=2)
+    w1, w2 = FakeWorker(1), FakeWorker(2)
+
+    # w1 gets the only task: w2 should wait instead of exiting
+    page, _ = scheduler.next_task(w1)
+    results = []
+    t = threading.Thread(target=lambda: results.append(scheduler.next_task(w2)))
+    t.start()
+    t.join(timeout=1)
+    assert t.is_alive()
+
+    # w1 adds a child: w2 should pick it up
+    queue.put((Page('http://example.com/child'), 2))
+    scheduler.task_done(w1, page, 0)
+    t.join()
+    assert results[0][0].url == 'http://example.com/child'
+
+    # nothing left: both should stop
+    scheduler.task_done(w2, results[0][0], 0)
+    assert scheduler.next_task(w1) is None
+    assert scheduler.next_task(w2) is None
+    assert scheduler.stats[1].pages == scheduler.stats[2].pages == 1
+
+
+def test_leftovers(queue):
+    scheduler = Scheduler(queue, max_depth=1)
+    w = FakeWorker(1)
+
+    page, depth = scheduler.next_task(w)
+    queue.put((Page('http://example.com/child'), depth + 1))
+    scheduler.task_done(w, page, 0)
+
+    assert scheduler.next_task(w) is None
+    assert [p.url for p, _ in scheduler.leftovers] == ['http://example.com/child']
+
+
+def test_kill_received(queue):
+    scheduler = Scheduler(queue, max_depth=1)
+    w = FakeWorker(1)
+    w.kill_received = True
+    assert scheduler.next_task(w) is None
+
+
+def test_duplicates_are_not_unfinished_tasks(queue):
+    scheduler = Scheduler(queue, max_depth=2)
+    w = FakeWorker(1)
+
+    page, _ = scheduler.next_task(w)
+    queue.put((Page('http://example.com'), 2))  # already enqueued once
+    scheduler.task_done(w, page, 0)
+
+    assert scheduler.is_done()
+    assert scheduler.next_task(w) is None
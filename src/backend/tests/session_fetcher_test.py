@@ -0,0 +1,116 @@
+import threading
+import time
+from http.server import ThreadingHTTPServer, BaseHTTPRequestHandler
+
+import pytest
+from swisstext.cmd.scraping.data import Page
+from swisstext.cmd.scraping.interfaces import ICrawler
+from swisstext.cmd.scraping.tools import BsCrawler
+from swisstext.cmd.scraping.tools.session_fetcher import SessionFetcher
+
+HTML = '<html><body><p>Hallo zusammen</p><a href="/child">child</a></body></html>'.encode('utf-8')
+ETAG = '"v1"'
+
+
+class Handler(BaseHTTPRequestHandler):
+    protocol_version = 'HTTP/1.1'  # keep-alive
+
+    def do_GET(self):
+        if self.path == '/big':
+            return self._send_chunks(b'<p>blabla</p>' * 1000, 'text/html', chunks=10)
+        if self.path == '/slow':
+            return self._send_chunks(b'<p>blabla</p>' * 20000, 'text/html', chunks=10, delay=.1)
+        if self.path == '/binary':
+            return self._send_chunks(b'\x00' * 10 ** 6, 'application/octet-stream', chunks=1)
+        if self.headers.get('If-None-Match') == ETAG:
+            self.send_response(304)
+            self.send_header('Content-Length', '0')
+            self.end_headers()
+            return
+        self.send_response(200)
+        self.send_header('ETag', ETAG)
+        self.send_header('Content-Type', 'text/html; charset=utf-8')
+        self.send_header('Content-Length', str(len(HTML)))
+        self.end_headers()
+        self.wfile.write(HTML)
+
+    def _send_chunks(self, body, ctype, chunks, delay=0.):
+        # no Content-Length: the client has to read the body to know its size
+        self.send_response(200)
+        self.send_header('Content-Type', ctype)
+        self.send_header('Connection', 'close')
+        self.end_headers()
+        size = len(body) // chunks + 1
+        try:
+            for i in range(0, len(body), size):
+                self.wfile.write(body[i:i + size])
+                self.wfile.flush()
+                time.sleep(delay)
+        except OSError:
+            pass  # the client aborted
+
+    def log_message(self, *args):
+        pass
+
+
+@pytest.fixture(scope='module')
+def base_url():
+    server = ThreadingHTTPServer(('127.0.0.1', 0), Handler)
+    server.daemon_threads = True
+    threading.Thread(target=server.serve_forever, daemon=True).start()
+    yield 'http://127.0.0.1:%d' % server.server_address[1]
+    server.shutdown()
+
+
+def test_connections_are_reused(base_url):
+    fetcher = SessionFetcher()
+    for i in range(5):
+        assert fetcher.get(f'{base_url}/{i}').content == HTML
+    assert fetcher.num_requests == 5
+    assert fetcher.num_connections == 1
+    assert fetcher.reuse_ratio == pytest.approx(.8)
+
+
+def test_crawler_uses_fetcher(base_url):
+    crawler = BsCrawler()
+    results = crawler.crawl(f'{base_url}/page')
+    crawler.crawl(f'{base_url}/other')
+    assert results.text == 'Hallo zusammen child'
+    assert results.links == [f'{base_url}/child']
+    assert crawler.fetcher.num_connections == 1
+
+
+def test_conditional_crawl(base_url):
+    crawler = BsCrawler()
+    page = Page(f'{base_url}/page')
+    results = crawler.crawl_page(page)
+    assert not results.not_modified and results.etag == ETAG
+
+    page.etag = results.etag
+    results = crawler.crawl_page(page)
+    assert results.not_modified
+    assert results.text == '' and results.links == []
+
+
+def test_max_bytes(base_url):
+    fetcher = SessionFetcher(max_bytes=5000)
+    with pytest.raises(ICrawler.CrawlError) as e:
+        fetcher.get(f'{base_url}/big')
+    assert e.value.name == 'TooLargeError'
+    assert len(fetcher.get(f'{base_url}/page').content) == len(HTML)
+
+
+def test_download_timeout(base_url):
+    fetcher = SessionFetcher(download_timeout=.3)
+    start = time.time()
+    with pytest.raises(ICrawler.CrawlError) as e:
+        fetcher.get(f'{base_url}/slow')
+    assert e.value.name == 'DownloadTimeoutError'
+    assert time.time() - start < .8
+
+
+def test_ctype_checked_before_download(base_url):
+    crawler = BsCrawler(max_page_size=1000)
+    with pytest.raises(ICrawler.CrawlError) as e:
+        crawler.crawl(f'{base_url}/binary')
+    assert e.value.name == 'CtypeError'
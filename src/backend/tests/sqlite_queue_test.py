@@ -0,0 +1,76 @@
+from datetime import datetime
+
+import pytest
+from swisstext.cmd.scraping.data import Page, PageScore
+from swisstext.cmd.scraping.scheduler import Scheduler
+from swisstext.cmd.scraping.sqlite_queue import SqlitePageQueue
+
+
+class FakeWorker:
+    def __init__(self, id):
+        self.id = id
+        self.kill_received = False
+
+
+@pytest.fixture
+def path(tmp_path):
+    return str(tmp_path / 'frontier.db')
+
+
+def test_fifo_and_duplicates(path):
+    queue = SqlitePageQueue(path)
+    for url in ['http://a.ch/1', 'http://a.ch/2', 'http://a.ch/1']:
+        queue.put((Page(url), 1))
+    assert queue.qsize() == queue.unfinished_tasks == 2
+    assert [queue.get()[0].url for _ in range(2)] == ['http://a.ch/1', 'http://a.ch/2']
+    assert queue.empty()
+
+
+def test_resume(path):
+    date = datetime(2019, 3, 1, 12, 30)
+    queue = SqlitePageQueue(path)
+    queue.put((Page('http://a.ch'), 1))
+    queue.put((Page('http://a.ch/child', score=PageScore(3, 1, date), parent_url='http://a.ch'), 2))
+    queue.put((Page('http://b.ch'), 1))
+
+    scheduler, w = Scheduler(queue, max_depth=2), FakeWorker(1)
+    page, _ = scheduler.next_task(w)
+    scheduler.task_done(w, page, 0)  # a.ch is done
+    scheduler.next_task(w)  # a.ch/child is in progress: crash !
+    queue.close()
+
+    queue = SqlitePageQueue(path, resume=True)
+    assert queue.unfinished_tasks == 2
+    page, depth = queue.get()
+    assert (page.url, page.parent_url, depth) == ('http://a.ch/child', 'http://a.ch', 2)
+    assert (page.score.count, page.score.delta_count, page.score.delta_date) == (3, 1, date)
+    assert queue.get()[0].url == 'http://b.ch'
+
+    queue.put((Page('http://a.ch'), 1))  # already crawled
+    assert queue.empty()
+
+
+def test_drain(path):
+    queue = SqlitePageQueue(path)
+    queue.put((Page('http://a.ch'), 1))
+    assert [p.url for p, _ in queue.drain()] == ['http://a.ch']
+    assert queue.unfinished_tasks == 0
+    queue.close()
+    assert SqlitePageQueue(path).empty()
+
+
+def test_new_crawl_forgets_done_pages(path):
+    queue = SqlitePageQueue(path)
+    queue.put((Page('http://a.ch'), 1))
+    queue.put((Page('http://b.ch'), 1))
+    page, _ = queue.get()
+    queue.release(page)
+    queue.put((Page('http://a.ch'), 1))  # already crawled during this run
+    assert queue.qsize() == 1
+    queue.close()
+
+    # not resuming: a.ch can be crawled again, b.ch is still pending
+    queue = SqlitePageQueue(path)
+    queue.put((Page('http://a.ch'), 1))
+    assert [queue.get()[0].url for _ in range(2)] == ['http://b.ch', 'http://a.ch']
+    queue.close()
@@ -0,0 +1,176 @@
+import json
+import multiprocessing
+import os
+import random
+import re
+import time
+
+import pytest
+from swisstext.cmd.scraping.tools import SwigspotLangid
+from swisstext.cmd.scraping.tools import swigspot_langid
+
+_RR = re.compile(r"[^\w \.,]|\d|_")
+
+
+def reference_sanitize(s: str) -> str:
+    # the original, multi-pass implementation
+    san = s.lower()
+    san = re.sub(_RR, "", san)
+    san = re.sub(" +", " ", san)
+    san = re.sub(r" \.", ".", san)
+    return san.strip()
+
+
+def test_sanitize():
+    assert SwigspotLangid.sanitize('  Ich bi de Hans , 1990 gebore  . Gäll_?  ') == 'ich bi de hans , gebore. gäll'
+
+
+def test_sanitize_parity():
+    sentences = [
+        '',
+        ' . ',
+        'ΟΔΟΣ ΣΑΣ.',  # final sigma is context-dependent
+        'İstanbul ², ½ and ٣ digits',
+        'tabs\tand\nnewlines and spaces',
+        'emojis 😀 and symbols €$ ... !!',
+        'Das isch es Huus (gäll?) - 2019 !',
+    ]
+    random.seed(0)
+    alphabet = 'abcXYZ äöüÄÖÜéèçß  ..,,;:!?-_0123456789²()"\'@#€\t\nİΣσ😀 ̀'
+    sentences += [''.join(random.choice(alphabet) for _ in range(random.randint(1, 80))) for _ in range(5000)]
+
+    for s in sentences:
+        assert SwigspotLangid.sanitize(s) == reference_sanitize(s), repr(s)
+
+
+def test_compiled_model(tmp_path):
+    import numpy as np
+    from swisstext.cmd.scraping.tools import CompiledSwigspotLangid
+    from swisstext.cmd.scraping.tools.swigspot_langid import export_model
+
+    try:
+        reference = SwigspotLangid()
+    except ImportError:
+        pytest.skip('the pickled model requires an older scikit-learn')
+    export_model(str(tmp_path), reference.pipe)
+    compiled = CompiledSwigspotLangid(str(tmp_path))
+    assert isinstance(compiled.coef, np.memmap)
+
+    sentences = [
+        '',
+        'ab',
+        'Ich bi de chli Hans und wohne z Bärn.',
+        'Je suis le petit Hans et j\'habite à Berne.',
+        'The house is nice, isn\'t it?',
+        'Das ist ein schönes Haus und ich wohne hier seit Jahren.',
+        'hallo hallo hallo   zäme !!',
+    ]
+    assert compiled.predict(sentences) == pytest.approx(reference.predict(sentences), abs=1e-9)
+    assert [r[0] for r in compiled.predict_lang(sentences)] == [r[0] for r in reference.predict_lang(sentences)]
+
+
+@pytest.fixture(scope='module')
+def tiny_pipe():
+    # a tiny model with the same structure as the SwigSpot one, fitted on a few sentences
+    from sklearn.feature_extraction.text import TfidfVectorizer
+    from sklearn.linear_model import LogisticRegression
+    from sklearn.multiclass import OneVsRestClassifier
+    from sklearn.pipeline import Pipeline
+
+    corpus = [
+        ('ich bi de chli hans und wohne z bärn.', 'sg'), ('das isch es schöns huus, gäll.', 'sg'),
+        ('ich bin der kleine hans und wohne in bern.', 'de'), ('das ist ein schönes haus.', 'de'),
+        ('je suis le petit hans et j habite à berne.', 'fr'), ('c est une belle maison.', 'fr'),
+        ('i am little hans and i live in bern.', 'en'), ('the house is nice, is it not.', 'en'),
+    ]
+    pipe = Pipeline([
+        ('vec', TfidfVectorizer(analyzer='char', ngram_range=(3, 5), sublinear_tf=True)),
+        ('clf', OneVsRestClassifier(LogisticRegression(C=10)))])
+    pipe.fit([s for s, _ in corpus], [l for _, l in corpus])
+    return pipe
+
+
+def test_compiled_tiny_model(tiny_pipe, tmp_path):
+    from swisstext.cmd.scraping.tools import CompiledSwigspotLangid
+
+    swigspot_langid.export_model(str(tmp_path), tiny_pipe)
+    compiled = CompiledSwigspotLangid(str(tmp_path))
+    sentences = [
+        '',
+        'ab',
+        'ich bi de hans.',
+        'je suis hans, et toi.',
+        'the house is in bern.',
+        'das ist   ein haus haus haus.',
+        'xyz qqq',
+    ]
+    assert compiled.predict_proba(sentences) == pytest.approx(tiny_pipe.predict_proba(sentences), abs=1e-9)
+
+
+def test_export_rejects_multinomial(tiny_pipe, tmp_path):
+    from sklearn.base import clone
+    from sklearn.linear_model import LogisticRegression
+
+    pipe = clone(tiny_pipe).set_params(clf=LogisticRegression())
+    pipe.fit(['ich bi de hans.', 'ich bin hans.', 'je suis hans.'], ['sg', 'de', 'fr'])
+    with pytest.raises(ValueError):
+        swigspot_langid.export_model(str(tmp_path), pipe)
+
+
+def test_compiled_model_location(tiny_pipe, tmp_path, monkeypatch):
+    from swisstext.cmd.scraping.tools import CompiledSwigspotLangid
+
+    # no model in the package directory: use the user cache
+    monkeypatch.setattr(swigspot_langid, '_compiled_model_dir', 'missing_langid.model')
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+
+    def failing_init(self):
+        raise ImportError('cannot unpickle')
+
+    monkeypatch.setattr(SwigspotLangid, '__init__', failing_init)
+    with pytest.raises(RuntimeError, match='python -m swisstext.cmd.scraping.tools.swigspot_langid'):
+        CompiledSwigspotLangid()
+
+    def tiny_init(self):
+        self.pipe = tiny_pipe
+
+    monkeypatch.setattr(SwigspotLangid, '__init__', tiny_init)
+    compiled = CompiledSwigspotLangid()  # exported to the cache
+    assert (tmp_path / 'swisstext' / 'missing_langid.model' / 'model.json').exists()
+    assert [p.name for p in (tmp_path / 'swisstext').iterdir()] == ['missing_langid.model']  # no temp dir left
+    assert compiled.predict_proba(['ich bi de hans.']) == pytest.approx(tiny_pipe.predict_proba(['ich bi de hans.']))
+
+
+def _slow_export(model_dir, pipe=None):
+    # a fake export slow enough for the processes to export at the same time
+    for name in ['ngrams', 'idf', 'coef']:
+        with open(os.path.join(model_dir, f'{name}.npy'), 'w') as f:
+            f.write(str(os.getpid()))
+        time.sleep(.05)
+    with open(os.path.join(model_dir, 'model.json'), 'w') as f:
+        json.dump(dict(pid=os.getpid()), f)
+
+
+def _lookup(_):
+    try:
+        return swigspot_langid._find_compiled_model()
+    except Exception as e:
+        return repr(e)
+
+
+def test_compiled_model_concurrent_export(tmp_path, monkeypatch):
+    # the processes of an AnalysisPool all look for the model at once on first use
+    monkeypatch.setattr(swigspot_langid, '_compiled_model_dir', 'missing_langid.model')
+    monkeypatch.setattr(swigspot_langid, 'export_model', _slow_export)
+    monkeypatch.setenv('XDG_CACHE_HOME', str(tmp_path))
+
+    with multiprocessing.get_context('fork').Pool(4) as pool:
+        results = pool.map(_lookup, range(4), chunksize=1)
+    cached = str(tmp_path / 'swisstext' / 'missing_langid.model')
+    assert results == [cached] * 4
+    assert [p.name for p in (tmp_path / 'swisstext').iterdir()] == ['missing_langid.model']
+    with open(os.path.join(cached, 'model.json')) as f:
+        pid = str(json.load(f)['pid'])
+    for name in ['ngrams', 'idf', 'coef']:  # all the files come from the same export
+        with open(os.path.join(cached, f'{name}.npy')) as f:
+            assert f.read() == pid
@@ -0,0 +1,60 @@
+"""
+Lightweight existence lookups, going straight to the :py:mod:`pymongo` collection of a document class.
+
+The mongoengine way (``cls.objects(id=...).count()``, ``cls.objects.with_id(...)`` or even
+``cls.objects(...).scalar('id')``) builds a :py:class:`~mongoengine.queryset.QuerySet` and instantiates a
+document for every match, which dominates the cost of the lookups done for every sentence and URL by the scraper.
+The functions below only ask for the ``_id`` (an indexed projection) and never instantiate a document.
+
+They work with any (concrete) document class, including the Flask-MongoEngine ones:
+
+.. code-block:: python
+
+    from swisstext.mongo.models import MongoSentence, MongoBlacklist
+    from swisstext.mongo.abstract.lookups import id_exists, find_ids, find_values, iter_ids
+
+    id_exists(MongoSentence, MongoSentence.get_hash('Hoi zäme'))  # True or False
+    find_ids(MongoSentence, hashes)  # the subset of hashes present in the collection
+    find_values(MongoBlacklist, 'url', urls)  # the subset of urls blacklisted
+    iter_ids(MongoSentence, {'date_added': {'$gte': since}})  # the ids of the sentences added since
+"""
+
+from typing import Iterable, Iterator, Set
+
+_ID_ONLY = {'_id': 1}
+
+
+def _db_field(document, field: str) -> str:
+    # name of the field in the collection, e.g. "id" => "_id"
+    return document._fields[field].db_field
+
+
+def id_exists(document, id) -> bool:
+    """Test if a document with the given primary key exists."""
+    return document._get_collection().find_one({'_id': id}, projection=_ID_ONLY) is not None
+
+
+def value_exists(document, field: str, value) -> bool:
+    """Test if a document has the given value for ``field`` (which should be indexed)."""
+    return document._get_collection().find_one({_db_field(document, field): value}, projection=_ID_ONLY) is not None
+
+
+def find_ids(document, ids: Iterable) -> Set:
+    """Return the subset of the primary keys ``ids`` present in the collection, using a single query."""
+    ids = list(ids)
+    if not ids: return set()
+    return {d['_id'] for d in document._get_collection().find({'_id': {'$in': ids}}, projection=_ID_ONLY)}
+
+
+def find_values(document, field: str, values: Iterable) -> Set:
+    """Return the subset of ``values`` found in ``field`` (which should be indexed), using a single query."""
+    values = list(values)
+    if not values: return set()
+    db_field = _db_field(document, field)
+    cursor = document._get_collection().find({db_field: {'$in': values}}, projection={db_field: 1, '_id': 0})
+    return {d[db_field] for d in cursor}
+
+
+def iter_ids(document, query: dict = None) -> Iterator:
+    """Iterate over the primary keys of the documents matching the (raw pymongo) ``query``, or all documents."""
+    return (d['_id'] for d in document._get_collection().find(query or {}, projection=_ID_ONLY))
@@ -11,6 +11,7 @@ from datetime import datetime
 
 from mongoengine import *
 from .generic import CrawlMeta, Source, Deleted
+from .lookups import id_exists
 
 
 class AbstractMongoSeed(Document):
@@ -86,7 +87,7 @@ class AbstractMongoSeed(Document):
 
         :param text: the seed
         """
-        return cls.objects.with_id(text) is not None
+        return id_exists(cls, text)
 
     def add_search_history(self, new_links_count):
         """Add a search history entry. This should be call after each usage of the seed.
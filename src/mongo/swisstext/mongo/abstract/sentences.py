@@ -17,6 +17,7 @@ from datetime import datetime
 from mongoengine import *
 
 from .generic import Deleted
+from .lookups import id_exists
 from .users import AbstractMongoUser
 from .urls import AbstractMongoURL
 
@@ -253,7 +254,7 @@ class AbstractMongoSentence(Document):
     @classmethod
     def exists(cls, text) -> bool:
         """Test if a sentence already exists (case sensitive)."""
-        return cls.objects(id=cls.get_hash(text)).count() == 1
+        return id_exists(cls, cls.get_hash(text))
 
     @classmethod
     def create(cls, text, url, proba):
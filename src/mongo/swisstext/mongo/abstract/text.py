@@ -8,6 +8,8 @@ from mongoengine import *
 
 from cityhash import CityHash128
 
+from .lookups import id_exists
+
 
 class AbstractMongoText(Document):
     """
@@ -31,7 +33,8 @@ class AbstractMongoText(Document):
     @classmethod
     def exists(cls, text, hash=None) -> bool:
         """Test if a Text exists."""
-        return cls.get(text, hash) is not None
+        if hash is None: hash = cls.get_hash(text)
+        return id_exists(cls, hash)
 
     @classmethod
     def get(cls, text, hash=None) -> Document:
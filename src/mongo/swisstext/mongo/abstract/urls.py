@@ -20,6 +20,7 @@ from cityhash import CityHash64
 from mongoengine import *
 
 from .generic import Source, CrawlMeta
+from .lookups import id_exists, value_exists
 
 class UrlCrawlMeta(CrawlMeta):
     """ Keep more information on the crawl """
@@ -70,6 +71,12 @@ class AbstractMongoURL(Document):
     delta_date = DateTimeField(default=None)
     """The date of the last visit (same as ``crawl_history[-1].date``). Inexistant if the URL was never crawled."""
 
+    etag = StringField(default=None)
+    """The HTTP ETag header returned on the last visit, used for conditional requests. Inexistant if unknown."""
+
+    last_modified = StringField(default=None)
+    """The HTTP Last-Modified header returned on the last visit, used for conditional requests. Inexistant if unknown."""
+
     meta = {'collection': 'urls', 'abstract': True, 'indexes': [
         {'fields': ['#url']}, # add a hashed index on URL
         {'fields': ['source.extra']}  # one for speeding up seeds view in frontend
@@ -84,7 +91,7 @@ class AbstractMongoURL(Document):
     @classmethod
     def exists(cls, url: str = None, id: str = None) -> bool:
         """Test if a url exists."""
-        return cls.get(url, id) is not None
+        return id_exists(cls, id) if id is not None else value_exists(cls, 'url', url)
 
     @classmethod
     def create(cls, url, source=Source()) -> Document:
@@ -153,9 +160,7 @@ class AbstractMongoBlacklist(Document):
     @classmethod
     def exists(cls, url: str = None, hash: str = None) -> bool:
         """Test if a url is blacklisted."""
-        return (cls.objects.with_id(hash) if hash is not None
-                else cls.objects(url=url).first()
-                ) is not None
+        return id_exists(cls, hash) if hash is not None else value_exists(cls, 'url', url)
 
     @classmethod
     def add_url(cls, url: str, source: Source = None):